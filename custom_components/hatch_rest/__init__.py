@@ -1,15 +1,44 @@
 """Hatch Rest integration."""
 
+from bleak.backends.device import BLEDevice
+
 from homeassistant import config_entries, core
 from homeassistant.components import bluetooth
 from homeassistant.const import CONF_ADDRESS, Platform
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.hass_dict import HassKey
 
 from .api import PyHatchBabyRestAsync
-from .coordinator import HatchBabyRestUpdateCoordinator
+from .const import DOMAIN
+from .coordinator import (
+    DATA_POLL_PHASES,
+    HatchBabyRestUpdateCoordinator,
+    PollPhases,
+    state_store,
+)
+from .fanout import DATA_ADAPTER_SLOTS, AdapterSlots
+from .routing import async_track_device
+from .services import async_setup_services
 
 PLATFORMS = [Platform.LIGHT, Platform.MEDIA_PLAYER, Platform.SWITCH]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# device clients by address; they outlive entry reloads so a reload reuses
+# the cached state (and any open connection) instead of starting over
+DATA_DEVICES: HassKey[dict[str, PyHatchBabyRestAsync]] = HassKey(f"{DOMAIN}_devices")
+
+
+async def async_setup(hass: core.HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Hatch Rest services."""
+    hass.data[DATA_ADAPTER_SLOTS] = AdapterSlots()
+    hass.data[DATA_DEVICES] = {}
+    hass.data[DATA_POLL_PHASES] = PollPhases()
+    async_setup_services(hass)
+    return True
+
 
 # async_setup_entry handles the setup of individual configuration
 # entries created by users via the UI (i.e., Config Entry)
@@ -19,29 +48,47 @@ async def async_setup_entry(
     """Set up the Hatch Rest component."""
 
     address = entry.data[CONF_ADDRESS]
-    ble_device = bluetooth.async_ble_device_from_address(hass, address.upper())
-    if not ble_device:
-        raise ConfigEntryNotReady(
-            f"Could not find Hatch Rest device with address {address}"
-        )
-    hatch_rest_device = PyHatchBabyRestAsync(ble_device)
+    store = state_store(hass, entry.entry_id)
+    devices = hass.data.setdefault(DATA_DEVICES, {})
+    if (hatch_rest_device := devices.get(address.upper())) is None:
+        ble_device = bluetooth.async_ble_device_from_address(hass, address.upper())
+        if not ble_device:
+            if not await store.async_load():
+                raise ConfigEntryNotReady(
+                    f"Could not find Hatch Rest device with address {address}"
+                )
+            # not heard since startup: async_track_device replaces this once
+            # the device advertises, and until then refreshes simply fail
+            ble_device = BLEDevice(address.upper(), None, None)
+        hatch_rest_device = devices[address.upper()] = PyHatchBabyRestAsync(ble_device)
+    entry.async_on_unload(async_track_device(hass, hatch_rest_device))
     coordinator = HatchBabyRestUpdateCoordinator(
-        hass,
-        entry.unique_id,
-        hatch_rest_device,
+        hass, entry.unique_id, hatch_rest_device, store
     )
+    coordinator.async_apply_options(entry.options)
     entry.runtime_data = coordinator
+    entry.async_on_unload(
+        hass.data.setdefault(DATA_POLL_PHASES, PollPhases()).async_register(coordinator)
+    )
 
-    # Fetch initial data so we have data when entities subscribe
-    #
-    # If the refresh fails, async_config_entry_first_refresh will
-    # raise ConfigEntryNotReady and setup will try again later
-    #
-    # If you do not want to retry setup on failure, use
-    # coordinator.async_refresh() instead
+    # with a stored state, entities start from it (as assumed state) and the
+    # first read runs in the background instead of holding up startup
+    if await coordinator.async_restore():
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"hatch_rest first refresh {address}"
+        )
+    else:
+        # Fetch initial data so we have data when entities subscribe
+        #
+        # If the refresh fails, async_config_entry_first_refresh will
+        # raise ConfigEntryNotReady and setup will try again later
+        #
+        # If you do not want to retry setup on failure, use
+        # coordinator.async_refresh() instead
 
-    await coordinator.async_config_entry_first_refresh()
+        await coordinator.async_config_entry_first_refresh()
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(options_update_listener))
 
     return True
 
@@ -50,11 +97,21 @@ async def async_unload_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
     """Unload Hatch Rest config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        await entry.runtime_data.async_shutdown()
+    return unload_ok
+
+
+async def async_remove_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Forget the device client and stored state of a removed config entry."""
+    hass.data.get(DATA_DEVICES, {}).pop(entry.data[CONF_ADDRESS].upper(), None)
+    await state_store(hass, entry.entry_id).async_remove()
 
 
 async def options_update_listener(
     hass: core.HomeAssistant, config_entry: config_entries.ConfigEntry
 ):
-    """Handle options update."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Apply updated options to the running entry without a reload."""
+    config_entry.runtime_data.async_apply_options(config_entry.options)
@@ -1,283 +1,1006 @@
-"""pyhatchbabyrestasync.
-
-Derived from kjoconnor's pyhatchbabyrest repo.
-All rights reserved.
-https://github.com/kjoconnor/pyhatchbabyrest/blob/master/LICENSE
-
-"""
-
-import asyncio
-from datetime import datetime
-import logging
-from time import monotonic
-
-from bleak.backends.device import BLEDevice
-from bleak_retry_connector import (
-    BleakAbortedError,
-    BleakClientWithServiceCache,
-    BleakConnectionError,
-    BleakNotFoundError,
-    BleakOutOfConnectionSlotsError,
-    establish_connection,
-)
-
-from .const import CHAR_FEEDBACK, CHAR_TX, PyHatchBabyRestSound
-
-_LOGGER = logging.getLogger(__name__)
-
-
-def _assert_value(check_val: list[str], index: int, assert_val: str):
-    if check_val[index] != assert_val:
-        raise ValueError(f'response[{index}] "{check_val[index]}" != "{assert_val}"')
-
-
-class PyHatchBabyRestAsync:
-    """An asynchronous interface to a Hatch Rest device using bleak."""
-
-    def __init__(self, ble_device: BLEDevice) -> None:
-        """Init PyHatchBabyRestAsync."""
-        self.device = ble_device
-        self.address = ble_device.address
-
-        self._client: BleakClientWithServiceCache | None = None
-        self._active_operations: int = 0
-
-        # connection synchronization primitizes / state
-        self._connection_cv = asyncio.Condition()
-        self._connecting: bool = False
-
-        # cached device state
-        self.color: tuple[int, int, int] | None = None
-        self.brightness: int | None = None
-        self.sound: PyHatchBabyRestSound | None = None
-        self.volume: int | None = None
-        self.power: bool | None = None
-
-    def _set_active_operations(self, amount: int):
-        """Change the number of running tasks."""
-        if amount > 0:
-            _LOGGER.debug("Incrementing self._active_operations by %d", amount)
-            self._active_operations += 1
-        if amount < 0:
-            _LOGGER.debug("Decrementing self._active_operations by %d", abs(amount))
-            self._active_operations -= 1
-        _LOGGER.debug("self._active_operations = %d", self._active_operations)
-
-    def _client_disconnected(self, client: BleakClientWithServiceCache) -> None:
-        """Callback for when the client disconnects."""
-        _LOGGER.debug("API client has successfully disconnected")
-        self._client = None
-
-    async def _client_connect(self) -> None:
-        """Connect to the device."""
-        async with self._connection_cv:
-            if self._client and self._client.is_connected:
-                _LOGGER.debug(
-                    "self._client = %s and and self._client.is_connected = %s -- using existing connection",
-                    self._client,
-                    self._client.is_connected,
-                )
-                return
-
-            if self._connecting:
-                _LOGGER.debug(
-                    "self._connecting = %s -- wait for connection to establish",
-                    self._connecting,
-                )
-                await self._connection_cv.wait()
-                return
-
-            _LOGGER.debug("No existing connection -- setting self._connecting = True")
-            self._connecting = True
-
-        try:
-            client = await establish_connection(
-                BleakClientWithServiceCache,
-                self.device,
-                self.device.address,
-                disconnected_callback=self._client_disconnected,
-            )
-            _LOGGER.debug("Client connected: %s", client.is_connected)
-
-        except (
-            BleakNotFoundError,
-            BleakOutOfConnectionSlotsError,
-            BleakAbortedError,
-            BleakConnectionError,
-            Exception,  # noqa: BLE001
-        ) as e:
-            _LOGGER.warning("Exception during _client_connect -- %r", e)
-            client = None
-
-        async with self._connection_cv:
-            self._connecting = False
-            self._client = client
-            self._connection_cv.notify_all()
-
-    async def _client_disconnect(self) -> None:
-        """Disconnect from the device."""
-        if self._client and self._active_operations == 0:
-            # if self._client:
-            _LOGGER.debug(
-                "self._client = %s and self._running_tasks = %d, attempting to disconnect",
-                # "self._client = %s, attempting to disconnect",
-                self._client,
-                self._active_operations,
-            )
-            try:
-                await self._client.disconnect()
-
-            except (
-                BleakNotFoundError,
-                BleakOutOfConnectionSlotsError,
-                BleakAbortedError,
-                BleakConnectionError,
-                Exception,  # noqa: BLE001
-            ) as e:
-                _LOGGER.warning("Exception during _client_disconnect -- %r", e)
-        else:
-            _LOGGER.debug(
-                "self._client = %s and self._running_tasks = %d, cannot currently disconnect",
-                # "self._client = %s, cannot currently disconnect",
-                self._client,
-                self._active_operations,
-            )
-
-    async def _send_command(self, command: str):
-        """Send a command do the device.
-
-        :param command: The command to send.
-        """
-        if log_timing := _LOGGER.isEnabledFor(logging.DEBUG):
-            start = monotonic()
-            _LOGGER.debug("Started _send_command at %s", datetime.now().isoformat())
-
-        self._set_active_operations(1)
-        await self._client_connect()
-
-        try:
-            await self._client.write_gatt_char(  # pyright: ignore[reportOptionalMemberAccess]
-                char_specifier=CHAR_TX,
-                data=bytearray(command, "utf-8"),
-                response=True,
-            )
-
-        except (
-            BleakNotFoundError,
-            BleakOutOfConnectionSlotsError,
-            BleakAbortedError,
-            BleakConnectionError,
-            Exception,  # noqa: BLE001
-        ) as e:
-            _LOGGER.warning("Exception during _send_command -- %r", e)
-
-        self._set_active_operations(-1)
-        # seemingly need some time for Hatch Rest to "catch up"
-        await asyncio.sleep(1)
-        await self.refresh_data()
-
-        if log_timing:
-            _LOGGER.debug(
-                "Finished _send_command at %s (total of %.3f seconds)",
-                datetime.now().isoformat(),
-                monotonic() - start,  # pyright: ignore[reportPossiblyUnboundVariable]
-            )
-
-    async def refresh_data(self):
-        """Refresh data from Hatch Rest device."""
-        if log_timing := _LOGGER.isEnabledFor(logging.DEBUG):
-            start = monotonic()
-            _LOGGER.debug("Started refresh_data at %s", datetime.now().isoformat())
-
-        self._set_active_operations(1)
-        await self._client_connect()
-
-        try:
-            raw_char_read = await self._client.read_gatt_char(CHAR_FEEDBACK)  # pyright: ignore[reportOptionalMemberAccess]
-            _LOGGER.debug("Raw char read from refresh_data: %s", raw_char_read)
-
-            response = [hex(x) for x in raw_char_read]
-
-            # Make sure the data is where we think it is
-            _assert_value(response, 5, "0x43")  # color
-            _assert_value(response, 10, "0x53")  # audio
-            _assert_value(response, 13, "0x50")  # power
-
-            red, green, blue, brightness = [int(x, 16) for x in response[6:10]]
-
-            sound = PyHatchBabyRestSound(int(response[11], 16))
-            volume = int(response[12], 16)
-
-            power = not bool(int("11000000", 2) & int(response[14], 16))
-
-            self.color = (red, green, blue)
-            _LOGGER.debug("refresh_data color: %s", self.color)
-            self.brightness = brightness
-            _LOGGER.debug("refresh_data brightness: %s", self.brightness)
-            self.sound = sound
-            _LOGGER.debug("refresh_data sound: %s", self.sound)
-            self.volume = volume
-            _LOGGER.debug("refresh_data volume: %s", self.volume)
-            self.power = power
-            _LOGGER.debug("refresh_data power: %s", self.power)
-
-        except (
-            BleakNotFoundError,
-            BleakOutOfConnectionSlotsError,
-            BleakAbortedError,
-            BleakConnectionError,
-            Exception,  # noqa: BLE001
-        ) as e:
-            _LOGGER.warning("Exception during refresh_data -- %r", e)
-
-        self._set_active_operations(-1)
-        await self._client_disconnect()
-
-        if log_timing:
-            _LOGGER.debug(
-                "Finished refresh_data at %s (total of %.3f seconds)",
-                datetime.now().isoformat(),
-                monotonic() - start,  # pyright: ignore[reportPossiblyUnboundVariable]
-            )
-
-    async def turn_power_on(self):
-        """Power on the Hatch Rest device."""
-        command = f"SI{1:02x}"
-        _LOGGER.debug("API command: turn_power_on")
-        await self._send_command(command)
-
-    async def turn_power_off(self):
-        """Power off the Hatch Rest device."""
-        command = f"SI{0:02x}"
-        _LOGGER.debug("API command: turn_power_off")
-        await self._send_command(command)
-
-    async def set_sound(self, sound: int):
-        """Set the sound of the Hatch Rest device."""
-        command = f"SN{sound:02x}"
-        _LOGGER.debug("API command: set_sound to %s", command)
-        return await self._send_command(command)
-
-    async def set_volume(self, volume: int):
-        """Set the volume of the Hatch Rest device."""
-        command = f"SV{volume:02x}"
-        _LOGGER.debug("API command: set_volume to %s", command)
-        return await self._send_command(command)
-
-    async def set_color(self, red: int, green: int, blue: int):
-        """Set the color of the Hatch Rest device."""
-        command = f"SC{red:02x}{green:02x}{blue:02x}{self.brightness:02x}"
-        _LOGGER.debug("API command: set_color to %s", command)
-        return await self._send_command(command)
-
-    async def set_brightness(self, brightness: int):
-        """Set the brightness of the Hatch Rest device."""
-        if self.color:
-            command = f"SC{self.color[0]:02x}{self.color[1]:02x}{self.color[2]:02x}{brightness:02x}"
-        _LOGGER.debug("API command: set_brightness to %s", command)
-        return await self._send_command(command)
-
-    @property
-    def name(self):
-        """Return the name of the Hatch Rest device."""
-        return self.device.name
+"""pyhatchbabyrestasync.
+
+Derived from kjoconnor's pyhatchbabyrest repo.
+All rights reserved.
+https://github.com/kjoconnor/pyhatchbabyrest/blob/master/LICENSE
+
+"""
+
+import asyncio
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Sequence
+import contextlib
+from dataclasses import dataclass
+import logging
+
+from bleak.backends.device import BLEDevice
+from bleak_retry_connector import (
+    MAX_CONNECT_ATTEMPTS,
+    BleakAbortedError,
+    BleakClientWithServiceCache,
+    BleakConnectionError,
+    BleakNotFoundError,
+    BleakOutOfConnectionSlotsError,
+    establish_connection,
+)
+
+from .clock import SYSTEM_CLOCK, Clock
+from .const import (
+    BATCH_WINDOW,
+    CHAR_FEEDBACK,
+    CHAR_TX,
+    COMMAND_BUDGET,
+    CONNECT_TIMEOUT,
+    DISCONNECT_TIMEOUT,
+    GATT_TIMEOUT,
+    IDLE_TIMEOUT,
+    MIN_COMMAND_INTERVAL,
+    POLL_BUDGET,
+    REDUNDANT_WRITE_MAX_AGE,
+    SETTLE_TIME,
+    SHUTDOWN_TIMEOUT,
+    WRITE_ATTEMPTS,
+    WRITE_RETRY_BACKOFF,
+    PyHatchBabyRestSound,
+)
+from .recording import (
+    EVENT_CONNECT,
+    EVENT_DISCONNECT,
+    EVENT_READ,
+    EVENT_WRITE,
+    GattRecorder,
+)
+from .tracing import Trace, Tracer, current_traces, record_span, span
+from .watchdog import LoopWatchdog
+
+_LOGGER = logging.getLogger(__name__)
+
+# commands that set an absolute value, so writing one twice is harmless
+_IDEMPOTENT_COMMANDS = frozenset({"SI", "SN", "SV", "SC"})
+
+# the fields an SC command carries
+_FIELD_COLOR = "color"
+_FIELD_BRIGHTNESS = "brightness"
+_COLOR_FIELDS = frozenset({_FIELD_COLOR, _FIELD_BRIGHTNESS})
+
+
+class CommandError(Exception):
+    """A command could not be written to the device."""
+
+
+class _CommandDropped(CommandError):
+    """A queued command was dropped when the client shut down."""
+
+
+def _assert_value(check_val: list[str], index: int, assert_val: str):
+    if check_val[index] != assert_val:
+        raise ValueError(f'response[{index}] "{check_val[index]}" != "{assert_val}"')
+
+
+def _decode_feedback(
+    raw: bytes,
+) -> tuple[tuple[int, int, int], int, PyHatchBabyRestSound, int, bool]:
+    """Decode a feedback frame into color, brightness, sound, volume and power."""
+    response = [hex(x) for x in raw]
+
+    # Make sure the data is where we think it is
+    _assert_value(response, 5, "0x43")  # color
+    _assert_value(response, 10, "0x53")  # audio
+    _assert_value(response, 13, "0x50")  # power
+
+    red, green, blue, brightness = [int(x, 16) for x in response[6:10]]
+
+    sound = PyHatchBabyRestSound(int(response[11], 16))
+    volume = int(response[12], 16)
+
+    power = not bool(int("11000000", 2) & int(response[14], 16))
+    return (red, green, blue), brightness, sound, volume, power
+
+
+def _was_dropped(queued: "_QueuedCommand") -> bool:
+    """Return whether a queued command was dropped unwritten."""
+    accepted = queued.accepted
+    return accepted.done() and isinstance(accepted.exception(), _CommandDropped)
+
+
+@dataclass(slots=True)
+class _QueuedCommand:
+    """A command waiting in the per-device pipeline."""
+
+    command: str
+    accepted: asyncio.Future[None]
+    completed: asyncio.Future[None]
+    # clock time the command was queued at
+    enqueued: float
+    # traces of the service calls that queued the command
+    traces: Sequence[Trace] = ()
+    # for an SC command, the fields its caller set; the others were filled
+    # in from the cache and yield to queued commands that set them
+    fields: frozenset[str] = _COLOR_FIELDS
+
+
+class _Budget:
+    """Deadline shared by the phases of one logical operation."""
+
+    def __init__(self, seconds: float, clock: Clock) -> None:
+        self.clock = clock
+        self.deadline = clock.time() + seconds
+
+    def remaining(self) -> float:
+        """Return the seconds left before the deadline."""
+        return max(0.0, self.deadline - self.clock.time())
+
+    def phase(self, ceiling: float) -> float:
+        """Return a phase timeout: its own ceiling, cut to what is left."""
+        return min(ceiling, self.remaining())
+
+
+@dataclass(slots=True)
+class ShutdownReport:
+    """What happened to queued commands when a device client shut down."""
+
+    drained: list[str]
+    dropped: list[str]
+
+
+@dataclass(slots=True)
+class RouteStats:
+    """Connection outcomes through one scanner."""
+
+    attempts: int = 0
+    successes: int = 0
+
+
+class PyHatchBabyRestAsync:
+    """An asynchronous interface to a Hatch Rest device using bleak."""
+
+    def __init__(
+        self,
+        ble_device: BLEDevice,
+        wait_for_confirmation: bool = False,
+        redundant_write_max_age: float = REDUNDANT_WRITE_MAX_AGE,
+        batch_window: float = BATCH_WINDOW,
+        settle_time: float = SETTLE_TIME,
+        idle_timeout: float = IDLE_TIMEOUT,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """Init PyHatchBabyRestAsync."""
+        self.device = ble_device
+        self.address = ble_device.address
+        # every delay, deadline and timer of the client runs on this clock
+        self.clock = clock
+
+        self._client: BleakClientWithServiceCache | None = None
+        self._active_operations: int = 0
+
+        # seconds an unused connection is kept open after a read; 0 closes
+        # it right away
+        self.idle_timeout = idle_timeout
+        self._idle_handle: asyncio.TimerHandle | None = None
+        self._idle_task: asyncio.Task[None] | None = None
+
+        # (scanner, BLEDevice) paths to the device, best first; connects fail
+        # over along them and record per-scanner outcomes in route_stats
+        self.routes_callback: Callable[[], list[tuple[str, BLEDevice]]] | None = None
+        self.route_stats: dict[str, RouteStats] = {}
+
+        # GATT phases (connect, write, read, disconnect) that ran out of time
+        self.timeouts: Counter[str] = Counter()
+        # command pipeline outcomes (write_retries, write_failures,
+        # skipped_writes)
+        self.metrics: Counter[str] = Counter()
+        # sampled spans of the operations service calls cause
+        self.tracer = Tracer(clock=clock)
+        # opt-in record of the raw GATT traffic, for replay
+        self.recorder: GattRecorder | None = None
+        # event loop time of this device's decode and update handling
+        self.watchdog = LoopWatchdog()
+
+        # commands matching state read within this many seconds are skipped
+        self.redundant_write_max_age = redundant_write_max_age
+
+        # connection synchronization primitizes / state
+        self._connection_cv = asyncio.Condition()
+        self._connecting: bool = False
+
+        # single-flight refresh state; a read only satisfies callers if it
+        # started after the most recent write
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._refresh_generation: int = 0
+        self._write_generation: int = 0
+        self._last_read: float | None = None
+        self._last_read_generation: int = -1
+
+        # command pipeline; setters return once their write is accepted
+        self.wait_for_confirmation = wait_for_confirmation
+        self.batch_window = batch_window
+        # seconds the device gets to apply writes before they are read back
+        self.settle_time = settle_time
+        self._command_queue: deque[_QueuedCommand] = deque()
+        self._command_worker: asyncio.Task[None] | None = None
+        self._closing = False
+        # bumped by every shutdown, so streams can tell one happened
+        self._shutdowns = 0
+        self._listeners: list[Callable[[], None]] = []
+
+        # moving average of write_gatt_char latency, used to pace streams
+        self._write_latency: float = MIN_COMMAND_INTERVAL
+
+        # cached device state
+        self.color: tuple[int, int, int] | None = None
+        self.brightness: int | None = None
+        self.sound: PyHatchBabyRestSound | None = None
+        self.volume: int | None = None
+        self.power: bool | None = None
+
+    def _set_active_operations(self, amount: int):
+        """Change the number of running tasks."""
+        if amount > 0:
+            self._active_operations += 1
+        if amount < 0:
+            self._active_operations -= 1
+
+    def _client_disconnected(self, client: BleakClientWithServiceCache) -> None:
+        """Callback for when the client disconnects."""
+        _LOGGER.debug("API client has successfully disconnected")
+        if self.recorder:
+            self.recorder.record(EVENT_DISCONNECT)
+        self._client = None
+
+    async def _client_connect(self, timeout: float = CONNECT_TIMEOUT) -> None:
+        """Connect to the device.
+
+        :param timeout: Seconds the connect phase may take over all routes.
+        """
+        self._cancel_idle_disconnect()
+        async with self._connection_cv:
+            if self._client and self._client.is_connected:
+                _LOGGER.debug(
+                    "self._client = %s and and self._client.is_connected = %s -- using existing connection",
+                    self._client,
+                    self._client.is_connected,
+                )
+                return
+
+            if self._connecting:
+                _LOGGER.debug(
+                    "self._connecting = %s -- wait for connection to establish",
+                    self._connecting,
+                )
+                await self._connection_cv.wait()
+                return
+
+            _LOGGER.debug("No existing connection -- setting self._connecting = True")
+            self._connecting = True
+
+        routes = (self.routes_callback and self.routes_callback()) or [
+            ("default", self.device)
+        ]
+        client = None
+        try:
+            async with self.clock.timeout(timeout):
+                for index, (source, device) in enumerate(routes):
+                    stats = self.route_stats.setdefault(source, RouteStats())
+                    stats.attempts += 1
+                    try:
+                        with span("connect", source):
+                            client = await establish_connection(
+                                BleakClientWithServiceCache,
+                                device,
+                                device.address,
+                                disconnected_callback=self._client_disconnected,
+                                # one try per route while another scanner remains
+                                max_attempts=MAX_CONNECT_ATTEMPTS
+                                if index == len(routes) - 1
+                                else 1,
+                                ble_device_callback=lambda: self.device,
+                            )
+                        _LOGGER.debug(
+                            "Client connected via %s: %s", source, client.is_connected
+                        )
+
+                    except (
+                        BleakNotFoundError,
+                        BleakOutOfConnectionSlotsError,
+                        BleakAbortedError,
+                        BleakConnectionError,
+                        Exception,  # noqa: BLE001
+                    ) as e:
+                        _LOGGER.warning(
+                            "Exception during _client_connect via %s -- %r", source, e
+                        )
+                    else:
+                        stats.successes += 1
+                        self.device = device
+                        if self.recorder:
+                            self.recorder.record(EVENT_CONNECT, source)
+                        break
+        except TimeoutError:
+            _LOGGER.warning("Timed out connecting after %.1f seconds", timeout)
+            self.timeouts["connect"] += 1
+            client = None
+
+        async with self._connection_cv:
+            self._connecting = False
+            self._client = client
+            self._connection_cv.notify_all()
+
+    @property
+    def is_connected(self) -> bool:
+        """Return whether a connection to the device is open."""
+        return bool(self._client and self._client.is_connected)
+
+    @property
+    def last_read(self) -> float | None:
+        """Return when a feedback frame was last read, on the client's clock."""
+        return self._last_read
+
+    async def warm_up(self) -> bool:
+        """Open a connection ahead of upcoming commands.
+
+        Returns whether the device is connected.
+        """
+        await self._client_connect()
+        return self.is_connected
+
+    async def _client_disconnect(self) -> None:
+        """Disconnect from the device."""
+        if self._client and self._active_operations == 0:
+            # if self._client:
+            _LOGGER.debug(
+                "self._client = %s and self._running_tasks = %d, attempting to disconnect",
+                # "self._client = %s, attempting to disconnect",
+                self._client,
+                self._active_operations,
+            )
+            try:
+                async with self.clock.timeout(DISCONNECT_TIMEOUT):
+                    await self._client.disconnect()
+
+            except TimeoutError:
+                _LOGGER.warning("Timed out during _client_disconnect")
+                self.timeouts["disconnect"] += 1
+                self._client = None
+
+            except (
+                BleakNotFoundError,
+                BleakOutOfConnectionSlotsError,
+                BleakAbortedError,
+                BleakConnectionError,
+                Exception,  # noqa: BLE001
+            ) as e:
+                _LOGGER.warning("Exception during _client_disconnect -- %r", e)
+        else:
+            _LOGGER.debug(
+                "self._client = %s and self._running_tasks = %d, cannot currently disconnect",
+                # "self._client = %s, cannot currently disconnect",
+                self._client,
+                self._active_operations,
+            )
+
+    async def _release_connection(self) -> None:
+        """Disconnect now, or once the connection has sat idle_timeout unused."""
+        self._cancel_idle_disconnect()
+        if self.idle_timeout <= 0:
+            await self._client_disconnect()
+            return
+        self._idle_handle = self.clock.call_later(self.idle_timeout, self._idle_expired)
+
+    def _idle_expired(self) -> None:
+        """Disconnect a connection that stayed unused."""
+        self._idle_handle = None
+        self._idle_task = asyncio.create_task(self._client_disconnect())
+
+    def _cancel_idle_disconnect(self) -> None:
+        """Keep the connection open for a new operation."""
+        if self._idle_handle:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    async def _abort_connection(self) -> None:
+        """Drop a connection whose operation ran out of time."""
+        client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            async with self.clock.timeout(DISCONNECT_TIMEOUT):
+                await client.disconnect()
+        except (TimeoutError, Exception) as e:  # noqa: BLE001
+            _LOGGER.debug("Exception during _abort_connection -- %r", e)
+
+    async def async_shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> ShutdownReport:
+        """Drain queued commands, then release the device.
+
+        New commands are refused while shutting down. Commands already
+        queued get until the timeout to be written and confirmed; whatever
+        is left fails with CommandError. Listeners are dropped and the
+        connection is closed. The client can be used again afterwards.
+
+        :param timeout: Seconds to wait for queued commands.
+        """
+        self._closing = True
+        self._shutdowns += 1
+        queued = list(self._command_queue)
+        try:
+            if (worker := self._command_worker) and not worker.done():
+                try:
+                    async with self.clock.timeout(timeout):
+                        await asyncio.shield(worker)
+                except TimeoutError:
+                    worker.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await worker
+            if (refresh := self._refresh_task) and not refresh.done():
+                refresh.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await refresh
+            self._listeners.clear()
+            self._cancel_idle_disconnect()
+            await self._abort_connection()
+        finally:
+            self._closing = False
+
+        report = ShutdownReport(
+            drained=[q.command for q in queued if not _was_dropped(q)],
+            dropped=[q.command for q in queued if _was_dropped(q)],
+        )
+        _LOGGER.debug("Shut down with %s", report)
+        return report
+
+    async def _send_command(
+        self, command: str, fields: frozenset[str] = _COLOR_FIELDS
+    ) -> asyncio.Future[None]:
+        """Queue a command for the device.
+
+        Returns once the command has been written. The returned future
+        resolves after the device has settled and its state was read back;
+        it is awaited here as well when wait_for_confirmation is set.
+
+        :param command: The command to send.
+        :param fields: For an SC command, which of color and brightness
+            the caller set.
+        """
+        return await self._send_commands([command], fields)
+
+    async def _send_commands(
+        self, commands: list[str], fields: frozenset[str] = _COLOR_FIELDS
+    ) -> asyncio.Future[None]:
+        """Queue commands to be written in one session.
+
+        Behaves like _send_command; the returned future resolves once the
+        last of the commands has been confirmed.
+
+        :param commands: The commands to send, in order.
+        :param fields: For an SC command among them, which of color and
+            brightness the caller set.
+        """
+        if self._closing:
+            raise CommandError("Device client is shutting down")
+
+        loop = asyncio.get_running_loop()
+        if skipped := [c for c in commands if self._is_redundant(c)]:
+            _LOGGER.debug("Skipping redundant commands %s", skipped)
+            self.metrics["skipped_writes"] += len(skipped)
+            commands = [c for c in commands if c not in skipped]
+        if not commands:
+            completed = loop.create_future()
+            completed.set_result(None)
+            return completed
+
+        traces = current_traces()
+        queued = [
+            _QueuedCommand(
+                command,
+                loop.create_future(),
+                loop.create_future(),
+                self.clock.time(),
+                traces,
+                fields,
+            )
+            for command in commands
+        ]
+        self._command_queue.extend(queued)
+        if self._command_worker is None or self._command_worker.done():
+            self._command_worker = asyncio.create_task(self._process_commands())
+
+        for command in queued:
+            await asyncio.shield(command.accepted)
+        if self.wait_for_confirmation:
+            await asyncio.shield(queued[-1].completed)
+        return queued[-1].completed
+
+    def _is_redundant(self, command: str) -> bool:
+        """Return whether a command would leave the device state unchanged.
+
+        Only state confirmed by a read within redundant_write_max_age, with
+        no write since and no commands still in the pipeline, is trusted.
+        """
+        if (
+            self._last_read is None
+            or self._last_read_generation != self._write_generation
+            or self.clock.time() - self._last_read > self.redundant_write_max_age
+            or (self._command_worker is not None and not self._command_worker.done())
+        ):
+            return False
+        prefix, values = command[:2], bytes.fromhex(command[2:])
+        if prefix == "SI":
+            return self.power is bool(values[0])
+        if prefix == "SN":
+            return self.sound == values[0]
+        if prefix == "SV":
+            return self.volume == values[0]
+        if prefix == "SC":
+            return tuple(values) == (*(self.color or ()), self.brightness)
+        return False
+
+    async def _process_commands(self) -> None:
+        """Write queued commands, then settle and read back once per burst.
+
+        Each burst runs under a COMMAND_BUDGET deadline shared by its
+        connect, write, settle and read phases. When it runs out, the
+        outstanding commands fail with TimeoutError and the connection is
+        dropped.
+        """
+        pending: list[_QueuedCommand] = []
+        try:
+            # let commands other entities send in the same tick join the burst
+            await self.clock.sleep(self.batch_window)
+            while self._command_queue:
+                # spans of the burst go to every traced call it serves
+                traces: list[Trace] = []
+                budget = _Budget(COMMAND_BUDGET, self.clock)
+                with self.tracer.operation("commands", traces):
+                    self._set_active_operations(1)
+                    try:
+                        await self._client_connect(budget.phase(CONNECT_TIMEOUT))
+                        while self._command_queue:
+                            group, command = self._take_command_group()
+                            traces.extend(
+                                trace
+                                for queued in group
+                                for trace in queued.traces
+                                if trace not in traces
+                            )
+                            for queued in group:
+                                record_span("queue", queued.enqueued, queued.command)
+                            try:
+                                await self._write_with_retry(command, budget)
+                            except CommandError as e:
+                                for queued in group:
+                                    queued.accepted.set_exception(e)
+                                    queued.completed.cancel()
+                                continue
+                            except TimeoutError:
+                                self._command_queue.extendleft(reversed(group))
+                                raise
+                            for queued in group:
+                                queued.accepted.set_result(None)
+                            pending.extend(group)
+                    finally:
+                        self._set_active_operations(-1)
+
+                    # seemingly need some time for Hatch Rest to "catch up"
+                    with span("settle"):
+                        await self.clock.sleep(
+                            min(self.settle_time, budget.remaining())
+                        )
+                    if self._command_queue:
+                        # more commands arrived while settling; write those first
+                        continue
+
+                    await self.refresh_data(budget=budget.remaining())
+                    for queued in pending:
+                        queued.completed.set_result(None)
+                    pending.clear()
+                    self._notify_listeners()
+        except TimeoutError as e:
+            _LOGGER.warning("Timed out during _process_commands -- %r", e)
+            self._fail_commands((*pending, *self._command_queue), e)
+            await self._abort_connection()
+
+        except Exception as e:
+            self._fail_commands((*pending, *self._command_queue), e)
+            raise
+
+        finally:
+            for queued in (*pending, *self._command_queue):
+                self._fail_commands(
+                    (queued,), _CommandDropped(f"{queued.command} dropped on shutdown")
+                )
+            self._command_queue.clear()
+
+    @staticmethod
+    def _fail_commands(commands: Iterable[_QueuedCommand], exc: BaseException) -> None:
+        """Fail the unresolved futures of queued commands with exc."""
+        for queued in commands:
+            for future in (queued.accepted, queued.completed):
+                if not future.done():
+                    future.set_exception(exc)
+                    # callers in accept mode never await completion
+                    future.exception()
+
+    def _take_command_group(self) -> tuple[list[_QueuedCommand], str]:
+        """Pop the next command along with queued commands of the same kind.
+
+        Returns the group and the one command written for it: the last of
+        the group (last write wins), except that SC commands are resolved
+        per field, so a color and a brightness queued by different callers
+        are both kept. All of the group is resolved with the write's outcome.
+        """
+        first = self._command_queue.popleft()
+        group = [first]
+        group.extend(
+            queued
+            for queued in self._command_queue
+            if queued.command[:2] == first.command[:2]
+        )
+        for queued in group[1:]:
+            self._command_queue.remove(queued)
+        if first.command[:2] != "SC":
+            return group, group[-1].command
+
+        def _latest(field: str, start: int, end: int) -> str:
+            setting = [queued for queued in group if field in queued.fields]
+            return (setting or group)[-1].command[start:end]
+
+        return group, (
+            f"SC{_latest(_FIELD_COLOR, 2, 8)}{_latest(_FIELD_BRIGHTNESS, 8, 10)}"
+        )
+
+    async def _write_command(self, command: str, timeout: float = GATT_TIMEOUT) -> bool:
+        """Write a single command to the device.
+
+        :param command: The command to write.
+        :param timeout: Seconds the write may take.
+        """
+        start = self.clock.time()
+        try:
+            with span("write", command):
+                async with self.clock.timeout(timeout):
+                    await self._client.write_gatt_char(  # pyright: ignore[reportOptionalMemberAccess]
+                        char_specifier=CHAR_TX,
+                        data=bytearray(command, "utf-8"),
+                        response=True,
+                    )
+            self._write_latency += 0.2 * (
+                self.clock.time() - start - self._write_latency
+            )
+            if self.recorder:
+                self.recorder.record(EVENT_WRITE, command)
+
+        except TimeoutError:
+            _LOGGER.warning(
+                "Timed out during _send_command after %.1f seconds", timeout
+            )
+            self.timeouts["write"] += 1
+            return False
+
+        except (
+            BleakNotFoundError,
+            BleakOutOfConnectionSlotsError,
+            BleakAbortedError,
+            BleakConnectionError,
+            Exception,  # noqa: BLE001
+        ) as e:
+            _LOGGER.warning("Exception during _send_command -- %r", e)
+            return False
+
+        finally:
+            # invalidate any frame read (or still being read) before this write
+            self._write_generation += 1
+
+        self._apply_command(command)
+        return True
+
+    async def _write_with_retry(self, command: str, budget: _Budget) -> None:
+        """Write a command, retrying idempotent ones on failure.
+
+        Retries back off briefly and reconnect if the connection dropped.
+        Raises CommandError once the attempts are used up, or TimeoutError
+        once the operation's budget is.
+
+        :param command: The command to write.
+        :param budget: The deadline of the operation the write belongs to.
+        """
+        attempts = WRITE_ATTEMPTS if command[:2] in _IDEMPOTENT_COMMANDS else 1
+        for attempt in range(attempts):
+            if attempt:
+                self.metrics["write_retries"] += 1
+                await self.clock.sleep(
+                    min(WRITE_RETRY_BACKOFF * attempt, budget.remaining())
+                )
+                if not self.is_connected:
+                    await self._client_connect(budget.phase(CONNECT_TIMEOUT))
+            if not budget.remaining():
+                raise TimeoutError("Command budget exhausted")
+            if await self._write_command(command, budget.phase(GATT_TIMEOUT)):
+                return
+            if not budget.remaining():
+                raise TimeoutError("Command budget exhausted")
+
+        self.metrics["write_failures"] += 1
+        raise CommandError(f"Writing {command} failed after {attempts} attempt(s)")
+
+    @property
+    def command_interval(self) -> float:
+        """Return the minimum spacing of streamed writes, in seconds."""
+        return max(MIN_COMMAND_INTERVAL, self._write_latency)
+
+    async def stream_commands(self, steps: Iterable[tuple[float, str]]) -> None:
+        """Write timed commands over one held connection.
+
+        Each step is an (offset seconds, command) pair. Writes are paced to
+        command_interval; when the stream falls behind, only the latest due
+        step is written. The device settles and is read back once at the end.
+
+        A write that fails is retried, reconnecting if the link dropped,
+        for up to COMMAND_BUDGET; after that the stream ends with
+        CommandError or TimeoutError. The stream also stops, without a
+        read-back, once the client starts shutting down.
+
+        :param steps: The timed commands, ordered by offset.
+        """
+        if self._closing:
+            raise CommandError("Device client is shutting down")
+
+        shutdowns = self._shutdowns
+        with self.tracer.operation("stream"):
+            self._set_active_operations(1)
+            try:
+                await self._client_connect()
+                start = next_write = self.clock.time()
+                iterator = iter(steps)
+                step = next(iterator, None)
+                while step is not None:
+                    offset, command = step
+                    following = next(iterator, None)
+                    if (
+                        following is not None
+                        and start + following[0] <= self.clock.time()
+                    ):
+                        # behind schedule; the following step supersedes this one
+                        step = following
+                        continue
+                    if (
+                        delay := max(start + offset, next_write) - self.clock.time()
+                    ) > 0:
+                        await self.clock.sleep(delay)
+                    if self._shutdowns != shutdowns:
+                        _LOGGER.debug("Stream stopped; device client shut down")
+                        return
+                    await self._write_with_retry(
+                        command, _Budget(COMMAND_BUDGET, self.clock)
+                    )
+                    next_write = self.clock.time() + self.command_interval
+                    step = following
+            except (CommandError, TimeoutError) as e:
+                _LOGGER.warning("Stream ended -- %r", e)
+                await self._abort_connection()
+                raise
+            finally:
+                self._set_active_operations(-1)
+
+            # seemingly need some time for Hatch Rest to "catch up"
+            with span("settle"):
+                await self.clock.sleep(self.settle_time)
+            await self.refresh_data()
+            self._notify_listeners()
+
+    def _apply_command(self, command: str) -> None:
+        """Update the cached state with the values a written command sets."""
+        prefix, values = command[:2], bytes.fromhex(command[2:])
+        if prefix == "SI":
+            self.power = bool(values[0])
+        elif prefix == "SN" and values[0] in PyHatchBabyRestSound:
+            self.sound = PyHatchBabyRestSound(values[0])
+        elif prefix == "SV":
+            self.volume = values[0]
+        elif prefix == "SC":
+            self.color = (values[0], values[1], values[2])
+            self.brightness = values[3]
+
+    def register_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Register a listener called after commands are confirmed.
+
+        Returns a callable that removes the listener.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify_listeners(self) -> None:
+        """Notify listeners that confirmed device state is available."""
+        # event loop time spent in the integration's callbacks
+        with span("callbacks"):
+            for listener in list(self._listeners):
+                listener()
+
+    async def refresh_data(
+        self, max_age: float | None = None, budget: float = POLL_BUDGET
+    ) -> None:
+        """Refresh data from Hatch Rest device.
+
+        Concurrent callers join a single in-flight read. When max_age is
+        given, a frame read within the last max_age seconds (and after the
+        most recent write) is reused without touching the device.
+
+        :param max_age: Maximum age in seconds of a reusable frame.
+        :param budget: Seconds a new read may take, connect included.
+        """
+        if (
+            max_age is not None
+            and self._last_read is not None
+            and self._last_read_generation == self._write_generation
+            and self.clock.time() - self._last_read <= max_age
+        ):
+            _LOGGER.debug("refresh_data reusing frame read within %.3fs", max_age)
+            return
+
+        task = self._refresh_task
+        if task is None or self._refresh_generation != self._write_generation:
+            task = asyncio.create_task(self._refresh_data(_Budget(budget, self.clock)))
+            self._refresh_task = task
+            self._refresh_generation = self._write_generation
+            task.add_done_callback(self._refresh_done)
+        else:
+            _LOGGER.debug("refresh_data joining in-flight read")
+
+        await asyncio.shield(task)
+
+    def _refresh_done(self, task: asyncio.Task[None]) -> None:
+        """Clear the in-flight refresh once it completes."""
+        if self._refresh_task is task:
+            self._refresh_task = None
+
+    async def _refresh_data(self, budget: _Budget) -> None:
+        """Read and decode the feedback characteristic."""
+        with self.tracer.operation("refresh"):
+            await self._read_feedback(budget)
+
+    async def _read_feedback(self, budget: _Budget) -> None:
+        """Connect, read the feedback characteristic and decode it."""
+        generation = self._write_generation
+        self._set_active_operations(1)
+        timed_out = False
+        try:
+            await self._client_connect(budget.phase(CONNECT_TIMEOUT))
+            with span("read"):
+                async with self.clock.timeout(budget.phase(GATT_TIMEOUT)):
+                    raw_char_read = await self._client.read_gatt_char(CHAR_FEEDBACK)  # pyright: ignore[reportOptionalMemberAccess]
+            _LOGGER.debug("Raw char read from refresh_data: %s", raw_char_read)
+            if self.recorder:
+                self.recorder.record(EVENT_READ, raw_char_read)
+
+            with span("decode", raw_char_read), self.watchdog.step("decode"):
+                color, brightness, sound, volume, power = _decode_feedback(
+                    raw_char_read
+                )
+
+            self.color = color
+            self.brightness = brightness
+            self.sound = sound
+            self.volume = volume
+            self.power = power
+
+            self._last_read = self.clock.time()
+            self._last_read_generation = generation
+
+        except TimeoutError:
+            _LOGGER.warning("Timed out during refresh_data")
+            self.timeouts["read"] += 1
+            timed_out = True
+
+        except (
+            BleakNotFoundError,
+            BleakOutOfConnectionSlotsError,
+            BleakAbortedError,
+            BleakConnectionError,
+            Exception,  # noqa: BLE001
+        ) as e:
+            _LOGGER.warning("Exception during refresh_data -- %r", e)
+
+        finally:
+            # also when cancelled (e.g. by shutdown), so the connection is
+            # not held open for good
+            self._set_active_operations(-1)
+            if timed_out:
+                await self._abort_connection()
+            else:
+                await self._release_connection()
+
+    async def apply_state(
+        self,
+        power: bool | None = None,
+        color: tuple[int, int, int] | None = None,
+        brightness: int | None = None,
+        sound: PyHatchBabyRestSound | None = None,
+        volume: int | None = None,
+    ) -> asyncio.Future[None] | None:
+        """Apply any subset of the device state in one session.
+
+        Values that match the cached state are skipped. The remaining
+        commands are written over one connection with a single settle and
+        read-back. Returns the completion future, or None if nothing changed.
+        """
+        commands: list[str] = []
+        fields = _COLOR_FIELDS
+        if power and not self.power:
+            commands.append(f"SI{1:02x}")
+        if (color is not None and color != self.color) or (
+            brightness is not None and brightness != self.brightness
+        ):
+            fields = frozenset(
+                field
+                for field, value in (
+                    (_FIELD_COLOR, color),
+                    (_FIELD_BRIGHTNESS, brightness),
+                )
+                if value is not None
+            )
+            color = color or self.color
+            brightness = self.brightness if brightness is None else brightness
+            if color is None or brightness is None:
+                raise ValueError("Cannot set color before the device state is known")
+            commands.append(
+                f"SC{color[0]:02x}{color[1]:02x}{color[2]:02x}{brightness:02x}"
+            )
+        if sound is not None and sound != self.sound:
+            commands.append(f"SN{sound:02x}")
+        if volume is not None and volume != self.volume:
+            commands.append(f"SV{volume:02x}")
+        if power is False and self.power is not False:
+            commands.append(f"SI{0:02x}")
+
+        _LOGGER.debug("API command: apply_state with %s", commands)
+        if not commands:
+            return None
+        return await self._send_commands(commands, fields)
+
+    async def turn_power_on(self):
+        """Power on the Hatch Rest device."""
+        command = f"SI{1:02x}"
+        _LOGGER.debug("API command: turn_power_on")
+        return await self._send_command(command)
+
+    async def turn_power_off(self):
+        """Power off the Hatch Rest device."""
+        command = f"SI{0:02x}"
+        _LOGGER.debug("API command: turn_power_off")
+        return await self._send_command(command)
+
+    async def set_sound(self, sound: int):
+        """Set the sound of the Hatch Rest device."""
+        command = f"SN{sound:02x}"
+        _LOGGER.debug("API command: set_sound to %s", command)
+        return await self._send_command(command)
+
+    async def set_volume(self, volume: int):
+        """Set the volume of the Hatch Rest device."""
+        command = f"SV{volume:02x}"
+        _LOGGER.debug("API command: set_volume to %s", command)
+        return await self._send_command(command)
+
+    async def set_color(self, red: int, green: int, blue: int):
+        """Set the color of the Hatch Rest device."""
+        command = f"SC{red:02x}{green:02x}{blue:02x}{self.brightness:02x}"
+        _LOGGER.debug("API command: set_color to %s", command)
+        return await self._send_command(command, frozenset({_FIELD_COLOR}))
+
+    async def set_color_brightness(
+        self, red: int, green: int, blue: int, brightness: int
+    ):
+        """Set the color and brightness of the Hatch Rest device together."""
+        command = f"SC{red:02x}{green:02x}{blue:02x}{brightness:02x}"
+        _LOGGER.debug("API command: set_color_brightness to %s", command)
+        return await self._send_command(command)
+
+    async def set_brightness(self, brightness: int):
+        """Set the brightness of the Hatch Rest device."""
+        if self.color:
+            command = f"SC{self.color[0]:02x}{self.color[1]:02x}{self.color[2]:02x}{brightness:02x}"
+        _LOGGER.debug("API command: set_brightness to %s", command)
+        return await self._send_command(command, frozenset({_FIELD_BRIGHTNESS}))
+
+    @property
+    def name(self):
+        """Return the name of the Hatch Rest device."""
+        return self.device.name
@@ -0,0 +1,40 @@
+"""Hatch Rest clock."""
+
+import asyncio
+from collections.abc import Callable
+import contextlib
+from time import monotonic
+from typing import Any
+
+
+class Clock:
+    """Time source, sleeper and timers of a device client.
+
+    Every delay, deadline, idle timer and poll schedule of a device goes
+    through its clock. This one reads the monotonic clock and schedules on
+    the running event loop; tests and the simulator substitute a virtual
+    clock to run the real protocol paths without waiting.
+    """
+
+    def time(self) -> float:
+        """Return the current time, in seconds."""
+        return monotonic()
+
+    async def sleep(self, delay: float) -> None:
+        """Sleep for delay seconds."""
+        await asyncio.sleep(delay)
+
+    def call_later(
+        self, delay: float, callback: Callable[..., object], *args: Any
+    ) -> asyncio.TimerHandle:
+        """Call callback(*args) in delay seconds."""
+        return asyncio.get_running_loop().call_later(delay, callback, *args)
+
+    def timeout(
+        self, delay: float | None
+    ) -> contextlib.AbstractAsyncContextManager[Any]:
+        """Return a context manager raising TimeoutError after delay seconds."""
+        return asyncio.timeout(delay)
+
+
+SYSTEM_CLOCK = Clock()
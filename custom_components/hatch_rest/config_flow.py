@@ -9,17 +9,34 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.components.bluetooth import (
     BluetoothServiceInfoBleak,
-    async_ble_device_from_address,
     async_discovered_service_info,
 )
-from homeassistant.config_entries import ConfigFlowResult
+from homeassistant.config_entries import ConfigEntry, ConfigFlowResult, OptionsFlow
 from homeassistant.const import CONF_ADDRESS, CONF_SENSOR_TYPE
-
-from .api import PyHatchBabyRestAsync
-from .const import DOMAIN, MANUFACTURER_ID
+from homeassistant.core import callback
+
+from .const import (
+    BATCH_WINDOW,
+    CONF_BATCH_WINDOW,
+    CONF_IDLE_TIMEOUT,
+    CONF_POLL_INTERVAL,
+    CONF_SETTLE_TIME,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_WRITE_MODE,
+    DOMAIN,
+    IDLE_TIMEOUT,
+    MANUFACTURER_ID,
+    POLL_INTERVAL,
+    SETTLE_TIME,
+    TRACE_SAMPLE_RATE,
+    WRITE_MODE_ACCEPTED,
+    WRITE_MODES,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_NAME = "Hatch Rest"
+
 
 # Much of this is sourced from the Switchbot official component
 def format_unique_id(address: str) -> str:
@@ -33,25 +50,43 @@ def short_address(address: str) -> str:
     return f"{results[-2].upper()}{results[-1].upper()}"[-4:]
 
 
+def discovered_name(discovery_info: BluetoothServiceInfoBleak) -> str:
+    """Return a Hatch Rest's advertised name, or a default if it has none."""
+    name = discovery_info.name
+    if not name or name.replace("-", ":").upper() == discovery_info.address.upper():
+        return DEFAULT_NAME
+    return name
+
+
 @dataclasses.dataclass
 class DiscoveredDevice:
     """Discovered device information."""
 
     name: str
     discovery_info: BluetoothServiceInfoBleak
-    hatch_rest_device: PyHatchBabyRestAsync
 
 
 class HatchBabyRestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    """Hatch Rest config flow."""
+    """Hatch Rest config flow.
+
+    Devices are discovered from their advertisements alone (name and
+    manufacturer data); the flow never connects, so listing several devices
+    in range is instant and an unreachable one cannot abort it. Setup
+    connects and retries on its own.
+    """
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow."""
+        return HatchBabyRestOptionsFlow()
+
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._discovered_device: DiscoveredDevice | None = None
         self._discovered_devices: dict[str, DiscoveredDevice] = {}
-        self._device_name: str | None = None
 
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfoBleak
@@ -60,28 +95,13 @@ class HatchBabyRestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         _LOGGER.debug("Discovered Hatch Rest %s", discovery_info.as_dict())
         await self.async_set_unique_id(format_unique_id(discovery_info.address))
         self._abort_if_unique_id_configured()
+        self._async_abort_entries_match({CONF_ADDRESS: discovery_info.address})
 
-        try:
-            ble_device = async_ble_device_from_address(
-                self.hass, discovery_info.address, connectable=True
-            )
-            if not ble_device:
-                raise ValueError("BLEDevice does not exist")  # noqa: TRY301
-            hatch_rest_device = PyHatchBabyRestAsync(ble_device)
-            await hatch_rest_device.refresh_data()
-        except Exception as e:  # noqa: BLE001
-            _LOGGER.debug("Unexpected error during async_step_bluetooth: %r", e)
-            return self.async_abort(reason="unknown")
-
-        self._device_name = hatch_rest_device.name
         self._discovered_device = DiscoveredDevice(
-            name=hatch_rest_device.name or "",
-            discovery_info=discovery_info,
-            hatch_rest_device=hatch_rest_device,
+            discovered_name(discovery_info), discovery_info
         )
-
         self.context["title_placeholders"] = {
-            "name": self._device_name or "",
+            "name": self._discovered_device.name,
             "address": short_address(discovery_info.address),
         }
 
@@ -109,9 +129,10 @@ class HatchBabyRestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             address = user_input[CONF_ADDRESS]
             await self.async_set_unique_id(
-                short_address(address), raise_on_progress=False
+                format_unique_id(address), raise_on_progress=False
             )
             self._abort_if_unique_id_configured()
+            self._async_abort_entries_match({CONF_ADDRESS: address})
             discovery = self._discovered_devices[address]
 
             self.context["title_placeholders"] = {"name": discovery.name}
@@ -120,36 +141,41 @@ class HatchBabyRestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             return await self._async_create_entry_from_discovery(user_input)
 
-        current_addresses = self._async_current_ids()
+        current_ids = self._async_current_ids()
+        # entries added from the user step before unique IDs were unified
+        # carry the short address as unique ID; match those by address
+        current_addresses = {
+            entry.data.get(CONF_ADDRESS)
+            for entry in self._async_current_entries(include_ignore=False)
+        }
         for discovery_info in async_discovered_service_info(self.hass):
             address = discovery_info.address
-            if address in current_addresses or address in self._discovered_devices:
+            if (
+                format_unique_id(address) in current_ids
+                or address in current_addresses
+                or address in self._discovered_devices
+            ):
                 continue
 
             if MANUFACTURER_ID not in discovery_info.manufacturer_data:
                 continue
 
-            try:
-                ble_device = async_ble_device_from_address(
-                    self.hass, discovery_info.address
-                )
-                if not ble_device:
-                    raise ValueError("BLEDevice does not exist")  # noqa: TRY301
-                hatch_rest_device = PyHatchBabyRestAsync(ble_device)
-                await hatch_rest_device.refresh_data()
-            except Exception as e:  # noqa: BLE001
-                _LOGGER.debug("Unexpected error during async_step_user: %r", e)
-                return self.async_abort(reason="unknown")
-            name = hatch_rest_device.name
             self._discovered_devices[address] = DiscoveredDevice(
-                name or "", discovery_info, hatch_rest_device
+                discovered_name(discovery_info), discovery_info
             )
 
         if not self._discovered_devices:
             return self.async_abort(reason="no_devices_found")
 
+        # strongest signal first; the closest device is most likely the one
+        # being set up
         titles = {
-            address: name for (address, discovery) in self._discovered_devices.items()
+            address: f"{discovery.name} ({short_address(address)})"
+            for address, discovery in sorted(
+                self._discovered_devices.items(),
+                key=lambda item: item[1].discovery_info.rssi,
+                reverse=True,
+            )
         }
         return self.async_show_form(
             step_id="user",
@@ -159,13 +185,60 @@ class HatchBabyRestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def _async_create_entry_from_discovery(
         self, user_input: dict[str, Any]
     ) -> ConfigFlowResult:
-        if self._discovered_device:
-            address = self._discovered_device.discovery_info.address
+        assert self._discovered_device is not None
         return self.async_create_entry(
-            title=self._device_name or "",
+            title=self._discovered_device.name,
             data={
                 **user_input,
-                CONF_ADDRESS: address,
+                CONF_ADDRESS: self._discovered_device.discovery_info.address,
                 CONF_SENSOR_TYPE: "switch",  # is this even required? I have other platforms supported
             },
         )
+
+
+class HatchBabyRestOptionsFlow(OptionsFlow):
+    """Hatch Rest options flow.
+
+    Options are applied to the running entry as soon as they are saved;
+    the entry is not reloaded.
+    """
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the polling, connection and write options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_POLL_INTERVAL,
+                        default=options.get(CONF_POLL_INTERVAL, POLL_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Required(
+                        CONF_IDLE_TIMEOUT,
+                        default=options.get(CONF_IDLE_TIMEOUT, IDLE_TIMEOUT),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=600)),
+                    vol.Required(
+                        CONF_WRITE_MODE,
+                        default=options.get(CONF_WRITE_MODE, WRITE_MODE_ACCEPTED),
+                    ): vol.In(WRITE_MODES),
+                    vol.Required(
+                        CONF_SETTLE_TIME,
+                        default=options.get(CONF_SETTLE_TIME, SETTLE_TIME),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                    vol.Required(
+                        CONF_BATCH_WINDOW,
+                        default=options.get(CONF_BATCH_WINDOW, BATCH_WINDOW),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                    vol.Required(
+                        CONF_TRACE_SAMPLE_RATE,
+                        default=options.get(CONF_TRACE_SAMPLE_RATE, TRACE_SAMPLE_RATE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                }
+            ),
+        )
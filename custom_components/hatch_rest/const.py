@@ -10,6 +10,111 @@ CHAR_TX = "02240002-5efd-47eb-9c1a-de53f7a2b232"
 CHAR_FEEDBACK = "02260002-5efd-47eb-9c1a-de53f7a2b232"
 BT_MANUFACTURER_ID = 1076
 
+# seconds a feedback frame may be reused by polls instead of re-reading it
+REFRESH_MAX_AGE = 2.0
+
+# last known device state is stored per entry, written at most this often
+STORAGE_VERSION = 1
+STATE_SAVE_DELAY = 10
+
+# deadline (seconds) for a command burst or a poll end to end, and the most
+# any one GATT phase of it may take
+COMMAND_BUDGET = 30.0
+POLL_BUDGET = 30.0
+CONNECT_TIMEOUT = 20.0
+GATT_TIMEOUT = 5.0
+DISCONNECT_TIMEOUT = 5.0
+
+# seconds queued commands wait for others before a burst starts, so one
+# scene touching several entities of a device becomes one session
+BATCH_WINDOW = 0.03
+
+# seconds a read-back state is trusted to skip writes that change nothing
+REDUNDANT_WRITE_MAX_AGE = 60.0
+
+# seconds an unloading entry waits for queued commands before dropping them
+SHUTDOWN_TIMEOUT = 10.0
+
+# attempts for an idempotent write, and the backoff step (seconds) between
+WRITE_ATTEMPTS = 3
+WRITE_RETRY_BACKOFF = 0.25
+
+# seconds the device gets to apply writes before they are read back
+SETTLE_TIME = 1.0
+
+# seconds a connection is kept open after a read in case more traffic
+# follows; 0 disconnects right away
+IDLE_TIMEOUT = 0.0
+
+# seconds between polls
+POLL_INTERVAL = 60
+
+# options, changeable at runtime without a reload
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_IDLE_TIMEOUT = "idle_timeout"
+CONF_WRITE_MODE = "write_mode"
+CONF_SETTLE_TIME = "settle_time"
+CONF_BATCH_WINDOW = "batch_window"
+CONF_TRACE_SAMPLE_RATE = "trace_sample_rate"
+WRITE_MODE_ACCEPTED = "accepted"
+WRITE_MODE_CONFIRMED = "confirmed"
+WRITE_MODES = [WRITE_MODE_ACCEPTED, WRITE_MODE_CONFIRMED]
+
+# fraction of service calls traced (0 disables tracing), and how many
+# recent traces each device keeps
+TRACE_SAMPLE_RATE = 0.0
+TRACE_HISTORY = 20
+
+# default bounds of a profile capture: operations, and seconds
+PROFILE_OPERATIONS = 10
+PROFILE_DURATION = 300
+
+# seconds integration code may hold the event loop before it is flagged,
+# and how many of the slowest steps diagnostics keep
+LOOP_STEP_THRESHOLD = 0.05
+LOOP_WORST_STEPS = 10
+
+# GATT events an opt-in recorder keeps before dropping the oldest, and the
+# default seconds the record service captures
+GATT_RECORD_LIMIT = 10000
+RECORD_DURATION = 600
+
+# floor (seconds) between streamed writes; raised to the measured write latency
+MIN_COMMAND_INTERVAL = 0.1
+
+EFFECT_GRADIENT = "Gradient"
+EFFECT_FADE_TO_OFF = "Fade to off"
+EFFECT_SLOW_PULSE = "Slow pulse"
+EFFECT_LIST = [EFFECT_GRADIENT, EFFECT_FADE_TO_OFF, EFFECT_SLOW_PULSE]
+FADE_TO_OFF_DURATION = 30.0
+SLOW_PULSE_PERIOD = 8.0
+SLOW_PULSE_FLOOR = 16
+
+# ramps: minimum seconds between steps, how long before a step to connect,
+# and how long to keep retrying a lost device before giving up
+RAMP_MIN_INTERVAL = 2.0
+RAMP_WARMUP = 5.0
+RAMP_RETRY_INTERVAL = 5.0
+RAMP_RESUME_TIMEOUT = 120.0
+
+# concurrent connections a Bluetooth adapter or proxy is assumed to allow
+ADAPTER_CONNECTION_SLOTS = 3
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_DURATION = "duration"
+ATTR_POWER = "power"
+ATTR_SOUND = "sound"
+ATTR_VOLUME = "volume"
+
+SERVICE_START_RAMP = "start_ramp"
+SERVICE_STOP_RAMP = "stop_ramp"
+SERVICE_APPLY_STATE = "apply_state"
+SERVICE_FAN_OUT = "fan_out"
+SERVICE_PROFILE = "profile"
+SERVICE_RECORD = "record"
+
+ATTR_OPERATIONS = "operations"
+
 
 class PyHatchBabyRestSound(IntEnum):
     """Enum for Hatch Rest sound options."""
@@ -1,108 +1,489 @@
-"""Hatch Rest coordinator."""
-
-from datetime import timedelta
-import logging
-
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-
-from .api import PyHatchBabyRestAsync
-from .const import DOMAIN, PyHatchBabyRestSound
-
-_LOGGER = logging.getLogger(__name__)
-
-
-class HatchBabyRestUpdateCoordinator(DataUpdateCoordinator):
-    """Hatch Rest data update coordinator."""
-
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        unique_id: str | None,
-        hatch_rest_device: PyHatchBabyRestAsync,
-    ) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=60),
-        )
-        self.unique_id = unique_id
-        self.hatch_rest_device = hatch_rest_device
-        self._last_data: dict[
-            str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None
-        ] = {}
-
-    def get_current_data(
-        self,
-    ) -> dict[str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None]:
-        """Get the current state of the Hatch Rest device."""
-        data: dict[
-            str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None
-        ] = {
-            "brightness": self.hatch_rest_device.brightness,
-            "color": self.hatch_rest_device.color,
-            "power": self.hatch_rest_device.power,
-            "sound": self.hatch_rest_device.sound,
-            "volume": self.hatch_rest_device.volume,
-        }
-        _LOGGER.debug("Data updated: %s", data)
-        return data
-
-    async def _async_update_data(
-        self,
-    ) -> dict[str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None]:
-        _LOGGER.debug("Starting coordinator async update")
-        self._last_data = self.data if self.data else {}
-        try:
-            await self.hatch_rest_device.refresh_data()
-        except Exception as e:
-            _LOGGER.warning(
-                "_async_update_data failed to refresh Hatch Rest data: %r", e
-            )
-            # Don’t raise; use previous successful data if available
-            if self._last_data:
-                _LOGGER.debug("Using cached data due to _async_update_data failure")
-                return self._last_data
-            raise UpdateFailed(f"Device update failed: {e}") from e
-        else:
-            return self.get_current_data()
-
-
-class HatchBabyRestEntity(CoordinatorEntity[HatchBabyRestUpdateCoordinator]):
-    """Hatch Rest entity."""
-
-    def __init__(self, coordinator: HatchBabyRestUpdateCoordinator) -> None:
-        """Initialize the entity."""
-        super().__init__(coordinator)
-        self._hatch_rest_device = coordinator.hatch_rest_device
-        self._attr_unique_id = coordinator.unique_id
-
-    @property
-    def device_info(self) -> DeviceInfo:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return device specific attributes."""
-        if not all((self._hatch_rest_device.address, self.unique_id)):
-            raise ValueError("Missing bluetooth address for hatch rest device")
-
-        assert self._hatch_rest_device.address
-        assert self.unique_id
-
-        return DeviceInfo(
-            connections={(dr.CONNECTION_BLUETOOTH, self._hatch_rest_device.address)},
-            identifiers={(DOMAIN, self.unique_id)},
-            manufacturer="Hatch",
-            model="Rest",
-            name=self.device_name,
-        )
-
-    @property
-    def device_name(self):
-        """Return the name of the device."""
-        return self._hatch_rest_device.name
+"""Hatch Rest coordinator."""
+
+from collections.abc import Awaitable, Callable, Coroutine, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cached_property, wraps
+import logging
+import math
+from typing import Any, Concatenate
+
+from homeassistant.components.media_player import MediaPlayerState
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    CoordinatorEntity,
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util.hass_dict import HassKey
+
+from .api import CommandError, PyHatchBabyRestAsync
+from .const import (
+    BATCH_WINDOW,
+    COLOR_GRADIENT,
+    CONF_BATCH_WINDOW,
+    CONF_IDLE_TIMEOUT,
+    CONF_POLL_INTERVAL,
+    CONF_SETTLE_TIME,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_WRITE_MODE,
+    DOMAIN,
+    EFFECT_GRADIENT,
+    IDLE_TIMEOUT,
+    POLL_INTERVAL,
+    REFRESH_MAX_AGE,
+    SETTLE_TIME,
+    STATE_SAVE_DELAY,
+    STORAGE_VERSION,
+    TRACE_SAMPLE_RATE,
+    WRITE_MODE_CONFIRMED,
+    PyHatchBabyRestSound,
+)
+from .ramp import HatchRestRamp
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class HatchRestSnapshot:
+    """Entity-facing attributes derived once from a coordinator update."""
+
+    power: bool | None = None
+    brightness: int | None = None
+    rgb_color: tuple[int, int, int] | None = None
+    light_is_on: bool = False
+    light_effect: str | None = None
+    sound: PyHatchBabyRestSound | None = None
+    source: str | None = None
+    media_state: MediaPlayerState = MediaPlayerState.PLAYING
+    volume_level: float | None = None
+
+    @classmethod
+    def from_data(
+        cls,
+        data: dict[str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None]
+        | None,
+    ) -> "HatchRestSnapshot":
+        """Build a snapshot from coordinator data."""
+        if not data:
+            return cls()
+
+        power = data.get("power")
+        brightness = data.get("brightness")
+        sound = data.get("sound")
+        volume = data.get("volume")
+        rgb_color = data.get("color")
+
+        # if power is off, then it's off
+        if power is False:
+            media_state = MediaPlayerState.OFF
+        elif sound == PyHatchBabyRestSound.none:
+            media_state = MediaPlayerState.PAUSED
+        else:
+            media_state = MediaPlayerState.PLAYING
+
+        return cls(
+            power=power,  # pyright: ignore[reportArgumentType]
+            brightness=brightness,  # pyright: ignore[reportArgumentType]
+            rgb_color=rgb_color,  # pyright: ignore[reportArgumentType]
+            # if brightness is greater than 0, then it's on
+            light_is_on=power is not False and bool(brightness),
+            light_effect=EFFECT_GRADIENT if rgb_color == COLOR_GRADIENT else None,
+            sound=sound,  # pyright: ignore[reportArgumentType]
+            source=sound.name.capitalize() if sound else None,  # pyright: ignore[reportAttributeAccessIssue]
+            media_state=media_state,
+            volume_level=volume / 255 if volume else None,  # pyright: ignore[reportOperatorIssue]
+        )
+
+
+def state_store(hass: HomeAssistant, entry_id: str) -> Store[dict]:
+    """Return the store holding an entry's last known device state."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
+@contextmanager
+def device_errors(device: PyHatchBabyRestAsync) -> Iterator[None]:
+    """Raise HomeAssistantError for commands the device did not take."""
+    try:
+        yield
+    except CommandError as e:
+        raise HomeAssistantError(f"Hatch Rest {device.address}: {e}") from e
+    except TimeoutError as e:
+        raise HomeAssistantError(
+            f"Hatch Rest {device.address} did not respond in time"
+        ) from e
+
+
+def device_command[EntityT: HatchBabyRestEntity, **P](
+    func: Callable[Concatenate[EntityT, P], Awaitable[None]],
+) -> Callable[Concatenate[EntityT, P], Coroutine[Any, Any, None]]:
+    """Decorate an entity service method sending commands to its device."""
+
+    @wraps(func)
+    async def _async_wrap(self: EntityT, *args: P.args, **kwargs: P.kwargs) -> None:
+        with device_errors(self.coordinator.hatch_rest_device):
+            await func(self, *args, **kwargs)
+
+    return _async_wrap
+
+
+class HatchBabyRestUpdateCoordinator(DataUpdateCoordinator):
+    """Hatch Rest data update coordinator."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        unique_id: str | None,
+        hatch_rest_device: PyHatchBabyRestAsync,
+        store: Store[dict] | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=POLL_INTERVAL),
+        )
+        self.unique_id = unique_id
+        self.hatch_rest_device = hatch_rest_device
+        self._last_data: dict[
+            str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None
+        ] = {}
+        self._snapshot = HatchRestSnapshot()
+        self._snapshot_data: object = None
+        self.ramp: HatchRestRamp | None = None
+        # True while data comes from the store rather than the device
+        self.stale = False
+        # the device's last_read when stale was last cleared
+        self._confirmed_read: float | None = None
+        # fraction of the update interval this coordinator polls at
+        self.poll_phase: float | None = None
+        self._store = store
+        self._unsub_device_listener = hatch_rest_device.register_listener(
+            self._async_handle_device_update
+        )
+
+    @property
+    def snapshot(self) -> HatchRestSnapshot:
+        """Return the entity-facing snapshot of the current data.
+
+        The snapshot is rebuilt only when a new data object is published, so
+        repeated property reads during a state write are plain field reads.
+        """
+        if self.data is not self._snapshot_data:
+            self._snapshot = HatchRestSnapshot.from_data(self.data)
+            self._snapshot_data = self.data
+        return self._snapshot
+
+    async def async_restore(self) -> bool:
+        """Seed the device and data from the last stored state.
+
+        Returns whether a state was restored; the data is marked stale until
+        the first successful refresh. A device client that already holds
+        state (kept across a reload) is left alone.
+        """
+        if self.hatch_rest_device.power is not None:
+            return False
+        if not self._store or not (stored := await self._store.async_load()):
+            return False
+
+        device = self.hatch_rest_device
+        device.power = stored.get("power")
+        device.brightness = stored.get("brightness")
+        device.volume = stored.get("volume")
+        if (color := stored.get("color")) is not None:
+            device.color = tuple(color)  # pyright: ignore[reportAttributeAccessIssue]
+        if (sound := stored.get("sound")) is not None:
+            device.sound = PyHatchBabyRestSound(sound)
+
+        self.stale = True
+        self.data = self.get_current_data()
+        _LOGGER.debug("Restored state for %s: %s", device.address, self.data)
+        return True
+
+    @callback
+    def _async_schedule_save(
+        self,
+        data: dict[
+            str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None
+        ],
+    ) -> None:
+        """Store live device data once updates settle."""
+        if self._store:
+            self._store.async_delay_save(
+                lambda: {
+                    "power": data["power"],
+                    "brightness": data["brightness"],
+                    "color": data["color"],
+                    "sound": data["sound"],
+                    "volume": data["volume"],
+                },
+                STATE_SAVE_DELAY,
+            )
+
+    @callback
+    def async_apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply config entry options to the coordinator and device.
+
+        Takes effect from the next poll and command burst; a pending poll
+        is moved onto the new interval.
+        """
+        self.update_interval = timedelta(
+            seconds=options.get(CONF_POLL_INTERVAL, POLL_INTERVAL)
+        )
+        device = self.hatch_rest_device
+        device.wait_for_confirmation = (
+            options.get(CONF_WRITE_MODE) == WRITE_MODE_CONFIRMED
+        )
+        device.idle_timeout = options.get(CONF_IDLE_TIMEOUT, IDLE_TIMEOUT)
+        device.settle_time = options.get(CONF_SETTLE_TIME, SETTLE_TIME)
+        device.batch_window = options.get(CONF_BATCH_WINDOW, BATCH_WINDOW)
+        device.tracer.sample_rate = options.get(
+            CONF_TRACE_SAMPLE_RATE, TRACE_SAMPLE_RATE
+        )
+        if self._unsub_refresh:
+            self._schedule_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update entities, timing the update on the event loop."""
+        with self.hatch_rest_device.watchdog.step("coordinator_update"):
+            super().async_update_listeners()
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next poll on the device clock, on this coordinator's phase.
+
+        Polls land on a grid of the update interval offset by poll_phase, so
+        devices polled through the same adapter do not all poll together.
+        The next poll is the grid point between half and one and a half
+        intervals from now. Without a phase, polls are staggered within the
+        second as DataUpdateCoordinator does.
+        """
+        if self.update_interval is None:
+            return
+        if self.config_entry and self.config_entry.pref_disable_polling:
+            return
+
+        self._async_unsub_refresh()
+        clock = self.hatch_rest_device.clock
+        interval = self.update_interval.total_seconds()
+        now = clock.time()
+        if self.poll_phase is None:
+            target = int(now) + self._microsecond + interval
+        else:
+            offset = self.poll_phase * interval
+            target = (
+                math.floor((now + interval / 2 - offset) / interval) + 1
+            ) * interval + offset
+        self._unsub_refresh = clock.call_later(
+            target - now, self._async_handle_poll_due
+        ).cancel
+
+    @callback
+    def _async_handle_poll_due(self) -> None:
+        """Run a scheduled poll in the background."""
+        name = f"hatch_rest poll {self.hatch_rest_device.address}"
+        # tied to the entry when there is one, so an unload cancels it
+        if self.config_entry:
+            self.config_entry.async_create_background_task(
+                self.hass, self._handle_refresh_interval(), name, eager_start=True
+            )
+        else:
+            self.hass.async_create_background_task(
+                self._handle_refresh_interval(), name, eager_start=True
+            )
+
+    @callback
+    def _async_handle_device_update(self) -> None:
+        """Publish device state confirmed after queued commands."""
+        data = self.get_current_data()
+        self.async_set_updated_data(data)
+        self._async_confirm_read(data)
+
+    @callback
+    def _async_confirm_read(
+        self,
+        data: dict[
+            str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None
+        ],
+    ) -> None:
+        """Clear stale and store data if a new frame was read from the device.
+
+        refresh_data does not raise when the device cannot be reached, so
+        the data may still be the restored or optimistic state.
+        """
+        last_read = self.hatch_rest_device.last_read
+        if last_read is None or last_read == self._confirmed_read:
+            return
+        self._confirmed_read = last_read
+        self.stale = False
+        self._async_schedule_save(data)
+
+    async def async_shutdown(self) -> None:
+        """Release the device and shut down the coordinator.
+
+        Queued commands are drained (or dropped after SHUTDOWN_TIMEOUT) and
+        the connection is closed, so a reload does not find the adapter
+        slot still taken.
+        """
+        if self.ramp:
+            self.ramp.async_cancel()
+            self.ramp = None
+        if self._unsub_device_listener:
+            self._unsub_device_listener()
+            self._unsub_device_listener = None
+            report = await self.hatch_rest_device.async_shutdown()
+            if report.dropped:
+                _LOGGER.warning(
+                    "Dropped %d queued command(s) for %s on shutdown: %s",
+                    len(report.dropped),
+                    self.hatch_rest_device.address,
+                    report.dropped,
+                )
+        await super().async_shutdown()
+
+    def get_current_data(
+        self,
+    ) -> dict[str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None]:
+        """Get the current state of the Hatch Rest device."""
+        data: dict[
+            str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None
+        ] = {
+            "brightness": self.hatch_rest_device.brightness,
+            "color": self.hatch_rest_device.color,
+            "power": self.hatch_rest_device.power,
+            "sound": self.hatch_rest_device.sound,
+            "volume": self.hatch_rest_device.volume,
+        }
+        _LOGGER.debug("Data updated: %s", data)
+        return data
+
+    async def _async_update_data(
+        self,
+    ) -> dict[str, int | tuple[int, int, int] | bool | PyHatchBabyRestSound | None]:
+        _LOGGER.debug("Starting coordinator async update")
+        self._last_data = self.data if self.data else {}
+        try:
+            await self.hatch_rest_device.refresh_data(max_age=REFRESH_MAX_AGE)
+        except Exception as e:
+            _LOGGER.warning(
+                "_async_update_data failed to refresh Hatch Rest data: %r", e
+            )
+            # Don’t raise; use previous successful data if available
+            if self._last_data:
+                _LOGGER.debug("Using cached data due to _async_update_data failure")
+                return self._last_data
+            raise UpdateFailed(f"Device update failed: {e}") from e
+        else:
+            data = self.get_current_data()
+            self._async_confirm_read(data)
+            return data
+
+
+class PollPhases:
+    """Spread the polls of all Hatch Rest coordinators across the interval.
+
+    Each registered coordinator gets an evenly spaced phase, as a fraction
+    of its update interval; phases are re-balanced whenever a coordinator
+    is registered or removed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the allocator."""
+        self._coordinators: list[HatchBabyRestUpdateCoordinator] = []
+
+    @callback
+    def async_register(
+        self, coordinator: HatchBabyRestUpdateCoordinator
+    ) -> CALLBACK_TYPE:
+        """Give a coordinator a poll phase; returns a callback to release it."""
+        self._coordinators.append(coordinator)
+        self._async_rebalance()
+
+        @callback
+        def _async_remove() -> None:
+            self._coordinators.remove(coordinator)
+            coordinator.poll_phase = None
+            self._async_rebalance()
+
+        return _async_remove
+
+    @callback
+    def _async_rebalance(self) -> None:
+        """Space the registered coordinators' phases evenly."""
+        count = len(self._coordinators)
+        for index, coordinator in enumerate(self._coordinators):
+            coordinator.poll_phase = index / count
+
+
+DATA_POLL_PHASES: HassKey[PollPhases] = HassKey(f"{DOMAIN}_poll_phases")
+
+
+class HatchBabyRestEntity(CoordinatorEntity[HatchBabyRestUpdateCoordinator]):
+    """Hatch Rest entity."""
+
+    # suffix appended to the device name; static for the entity lifetime
+    _name_suffix: str | None = None
+
+    def __init__(self, coordinator: HatchBabyRestUpdateCoordinator) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._hatch_rest_device = coordinator.hatch_rest_device
+        self._attr_unique_id = coordinator.unique_id
+
+    @cached_property
+    def device_info(self) -> DeviceInfo:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return device specific attributes."""
+        if not all((self._hatch_rest_device.address, self.unique_id)):
+            raise ValueError("Missing bluetooth address for hatch rest device")
+
+        assert self._hatch_rest_device.address
+        assert self.unique_id
+
+        return DeviceInfo(
+            connections={(dr.CONNECTION_BLUETOOTH, self._hatch_rest_device.address)},
+            identifiers={(DOMAIN, self.unique_id)},
+            manufacturer="Hatch",
+            model="Rest",
+            name=self.device_name,
+        )
+
+    @property
+    def assumed_state(self) -> bool:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return True while the state is restored rather than read."""
+        return self.coordinator.stale
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the entity state, timing the write on the event loop."""
+        with self._hatch_rest_device.watchdog.step("state_write"):
+            super()._handle_coordinator_update()
+
+    @callback
+    def async_set_context(self, context: Context) -> None:
+        """Set the context, and trace the commands it causes if sampled.
+
+        Home Assistant sets the context before running a service method in
+        the same task, so the trace follows the call's commands through the
+        device's command pipeline under the context's ID.
+        """
+        super().async_set_context(context)
+        self._hatch_rest_device.tracer.begin(context.id)
+
+    @property
+    def device_name(self):
+        """Return the name of the device."""
+        return self._hatch_rest_device.name
+
+    @cached_property
+    def name(self) -> str | None:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return the name of the entity."""
+        if self._name_suffix and self._hatch_rest_device.name:
+            return f"{self._hatch_rest_device.name.title()} {self._name_suffix}"
+        return None
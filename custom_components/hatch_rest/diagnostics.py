@@ -0,0 +1,33 @@
+"""Hatch Rest diagnostics."""
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+
+TO_REDACT = {CONF_ADDRESS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = entry.runtime_data
+    device = coordinator.hatch_rest_device
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "state": coordinator.data,
+        "stale": coordinator.stale,
+        "event_loop": device.watchdog.as_dict(),
+        "timeouts": dict(device.timeouts),
+        "metrics": dict(device.metrics),
+        "route_stats": {
+            source: asdict(stats) for source, stats in device.route_stats.items()
+        },
+    }
@@ -0,0 +1,72 @@
+"""Hatch Rest light transitions and effects."""
+
+from collections.abc import Iterator
+
+from .const import SLOW_PULSE_FLOOR
+
+
+def plan_transition(
+    start: tuple[int, ...],
+    end: tuple[int, ...],
+    duration: float,
+    min_interval: float,
+) -> list[tuple[float, tuple[int, ...]]]:
+    """Plan the steps of a transition between two 8-bit channel tuples.
+
+    Returns (offset seconds, values) pairs. The device quantizes every
+    channel to 8 bits, so there are never more steps than the largest
+    channel delta; fewer are used when the duration cannot fit them at
+    min_interval.
+    """
+    delta = max(abs(b - a) for a, b in zip(start, end, strict=True))
+    if duration <= 0 or delta == 0:
+        return [(0.0, end)]
+
+    steps = max(1, min(delta, int(duration / min_interval)))
+    return [
+        (
+            duration * i / steps,
+            tuple(round(a + (b - a) * i / steps) for a, b in zip(start, end)),
+        )
+        for i in range(1, steps + 1)
+    ]
+
+
+def color_command(color: tuple[int, ...]) -> str:
+    """Encode an (red, green, blue, brightness) tuple as a device command."""
+    return "SC" + "".join(f"{value:02x}" for value in color)
+
+
+def transition_commands(
+    start: tuple[int, int, int, int],
+    end: tuple[int, int, int, int],
+    duration: float,
+    min_interval: float,
+) -> list[tuple[float, str]]:
+    """Plan a color/brightness transition as timed device commands."""
+    return [
+        (offset, color_command(values))
+        for offset, values in plan_transition(start, end, duration, min_interval)
+    ]
+
+
+def slow_pulse_commands(
+    color: tuple[int, int, int],
+    brightness: int,
+    period: float,
+    min_interval: float,
+) -> Iterator[tuple[float, str]]:
+    """Yield an endless brightness pulse between brightness and a floor."""
+    low = (*color, min(brightness, SLOW_PULSE_FLOOR))
+    high = (*color, brightness)
+    down = transition_commands(high, low, period / 2, min_interval)
+    up = transition_commands(low, high, period / 2, min_interval)
+
+    elapsed = 0.0
+    while True:
+        for offset, command in down:
+            yield elapsed + offset, command
+        elapsed += period / 2
+        for offset, command in up:
+            yield elapsed + offset, command
+        elapsed += period / 2
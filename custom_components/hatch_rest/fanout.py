@@ -0,0 +1,101 @@
+"""Hatch Rest multi-device fan-out."""
+
+import asyncio
+from dataclasses import asdict, dataclass
+import logging
+from typing import Any
+
+from homeassistant.components import bluetooth
+from homeassistant.core import HomeAssistant
+from homeassistant.util.hass_dict import HassKey
+
+from .const import ADAPTER_CONNECTION_SLOTS, DOMAIN
+from .coordinator import HatchBabyRestUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_ADAPTER_SLOTS: HassKey["AdapterSlots"] = HassKey(f"{DOMAIN}_adapter_slots")
+
+
+@dataclass(slots=True)
+class FanOutResult:
+    """Outcome of a fan-out for one device."""
+
+    success: bool
+    slot_wait: float
+    elapsed: float
+    error: str | None = None
+
+
+class AdapterSlots:
+    """Bound the number of concurrent fan-out connections per Bluetooth adapter.
+
+    Only fan-out takes these slots; polls, entity commands and ramps
+    connect without them, so they share the adapter's real connection
+    slots with a fan-out unaccounted. Slots are keyed by the adapter that
+    last heard a device, which is not necessarily the route its connect
+    ends up using (see routing).
+    """
+
+    def __init__(self, slots: int = ADAPTER_CONNECTION_SLOTS) -> None:
+        """Initialize the slot limits."""
+        self.slots = slots
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def semaphore(self, source: str) -> asyncio.Semaphore:
+        """Return the semaphore guarding an adapter's connection slots."""
+        if (semaphore := self._semaphores.get(source)) is None:
+            semaphore = self._semaphores[source] = asyncio.Semaphore(self.slots)
+        return semaphore
+
+
+def async_adapter_source(hass: HomeAssistant, address: str) -> str:
+    """Return the source of the adapter that last heard a device."""
+    service_info = bluetooth.async_last_service_info(
+        hass, address.upper(), connectable=True
+    )
+    return service_info.source if service_info else "unknown"
+
+
+async def async_fan_out(
+    hass: HomeAssistant,
+    adapter_slots: AdapterSlots,
+    coordinators: dict[str, HatchBabyRestUpdateCoordinator],
+    state: dict[str, Any],
+) -> dict[str, dict[str, Any]]:
+    """Apply a state to several devices concurrently.
+
+    Each device holds one of its adapter's connection slots from the time
+    its commands are written until they are confirmed, so the fan-out
+    itself never asks an adapter for more connections than it has; other
+    connections to the same adapter are not counted (see AdapterSlots).
+    Returns per-entry results and timings.
+    """
+
+    async def _async_apply(
+        coordinator: HatchBabyRestUpdateCoordinator,
+    ) -> FanOutResult:
+        device = coordinator.hatch_rest_device
+        clock = device.clock
+        start = clock.time()
+        async with adapter_slots.semaphore(async_adapter_source(hass, device.address)):
+            acquired = clock.time()
+            try:
+                if completed := await device.apply_state(**state):
+                    await completed
+            except Exception as e:  # noqa: BLE001
+                _LOGGER.warning("Fan-out to %s failed: %r", device.address, e)
+                return FanOutResult(
+                    False, acquired - start, clock.time() - start, repr(e)
+                )
+
+        coordinator.async_set_updated_data(coordinator.get_current_data())
+        return FanOutResult(True, acquired - start, clock.time() - start)
+
+    results = await asyncio.gather(
+        *(_async_apply(coordinator) for coordinator in coordinators.values())
+    )
+    return {
+        entry_id: asdict(result)
+        for entry_id, result in zip(coordinators, results, strict=True)
+    }
@@ -1,105 +1,219 @@
-"""Hatch Rest light."""
-
-import logging
-from typing import Any
-
-from homeassistant.components.light import (
-    ATTR_BRIGHTNESS,
-    ATTR_RGB_COLOR,
-    LightEntity,
-)
-from homeassistant.components.light.const import ColorMode
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-from .coordinator import HatchBabyRestEntity
-
-_LOGGER = logging.getLogger(__name__)
-
-
-async def async_setup_entry(
-    hass: HomeAssistant,
-    config_entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    """Set up Hatch Rest light."""
-    coordinator = config_entry.runtime_data
-    # only need to update_before_add on one entity -- switch is "master" entity
-    async_add_entities([HatchBabyRestLight(coordinator)], update_before_add=False)
-
-
-class HatchBabyRestLight(HatchBabyRestEntity, LightEntity):  # pyright: ignore[reportIncompatibleVariableOverride]
-    """Hatch Rest light entity."""
-
-    @property
-    def brightness(self) -> int | None:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return the brightness of the light."""
-        _LOGGER.debug("light brightness = %s", self.coordinator.data.get("brightness"))
-        return self.coordinator.data.get("brightness")
-
-    @property
-    def color_mode(self) -> ColorMode:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return color mode."""
-        return ColorMode.RGB
-
-    @property
-    def is_on(self) -> bool:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return if the light is on."""
-        # if power is off, then it's off
-        if self.coordinator.data.get("power") is False:
-            return False
-        brightness = self.coordinator.data.get("brightness")
-        if brightness:
-            _LOGGER.debug("light is_on = %s", brightness > 0)
-            # if brightness is greater than 0, then it's on
-            return brightness > 0
-        return False
-
-    @property
-    def name(self) -> str | None:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return the name of the entity."""
-        if self._hatch_rest_device.name:
-            return f"{self._hatch_rest_device.name.title()} Light"
-        return None
-
-    @property
-    def rgb_color(self) -> tuple[int, int, int] | None:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return the RGB color of the light."""
-        _LOGGER.debug("light rgb_color = %s", self.coordinator.data.get("color"))
-        return self.coordinator.data.get("color")
-
-    @property
-    def supported_color_modes(self) -> set[ColorMode]:  # pyright: ignore[reportIncompatibleVariableOverride]
-        """Return supported color modes."""
-        return {ColorMode.RGB}
-
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        """Set the light on."""
-        brightness = kwargs.get(ATTR_BRIGHTNESS)
-        rgb = kwargs.get(ATTR_RGB_COLOR)
-
-        if not self._hatch_rest_device.power:
-            _LOGGER.debug("light _hatch_rest_device power not on -- turning on")
-            await self._hatch_rest_device.turn_power_on()
-
-        if brightness:
-            _LOGGER.debug("light setting brightness = %s", brightness)
-            await self._hatch_rest_device.set_brightness(brightness)
-        if rgb:
-            _LOGGER.debug("light setting RBG = (%s[0], %s[1], %s[2])", *rgb)
-            await self._hatch_rest_device.set_color(*rgb)
-
-        # https://developers.home-assistant.io/docs/integration_fetching_data/
-        # If this method is used on a coordinator that polls, it will reset the time until the next time it will poll for data.
-        # each _send_command calls _refresh_data and updates API data states, so use that
-        self.coordinator.async_set_updated_data(self.coordinator.get_current_data())
-
-    async def async_turn_off(self, **kwargs: Any) -> None:
-        """Set the light off."""
-        await self._hatch_rest_device.set_brightness(0)
-
-        # https://developers.home-assistant.io/docs/integration_fetching_data/
-        # If this method is used on a coordinator that polls, it will reset the time until the next time it will poll for data.
-        # each _send_command calls _refresh_data and updates API data states, so use that
-        self.coordinator.async_set_updated_data(self.coordinator.get_current_data())
+"""Hatch Rest light."""
+
+import asyncio
+from collections.abc import Iterable
+import logging
+from typing import Any
+
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_EFFECT,
+    ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
+    LightEntity,
+    LightEntityFeature,
+)
+from homeassistant.components.light.const import ColorMode
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .api import CommandError
+from .const import (
+    COLOR_GRADIENT,
+    EFFECT_FADE_TO_OFF,
+    EFFECT_GRADIENT,
+    EFFECT_LIST,
+    EFFECT_SLOW_PULSE,
+    FADE_TO_OFF_DURATION,
+    SLOW_PULSE_PERIOD,
+)
+from .coordinator import (
+    HatchBabyRestEntity,
+    HatchBabyRestUpdateCoordinator,
+    device_command,
+)
+from .effects import slow_pulse_commands, transition_commands
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Hatch Rest light."""
+    coordinator = config_entry.runtime_data
+    # only need to update_before_add on one entity -- switch is "master" entity
+    async_add_entities([HatchBabyRestLight(coordinator)], update_before_add=False)
+
+
+class HatchBabyRestLight(HatchBabyRestEntity, LightEntity):  # pyright: ignore[reportIncompatibleVariableOverride]
+    """Hatch Rest light entity."""
+
+    _name_suffix = "Light"
+    _attr_color_mode = ColorMode.RGB
+    _attr_supported_features = LightEntityFeature.EFFECT | LightEntityFeature.TRANSITION
+    _attr_effect_list = EFFECT_LIST
+
+    def __init__(self, coordinator: HatchBabyRestUpdateCoordinator) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+
+        self._attr_supported_color_modes = {ColorMode.RGB}
+        self._active_effect: str | None = None
+        self._effect_task: asyncio.Task[None] | None = None
+
+    @property
+    def brightness(self) -> int | None:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return the brightness of the light."""
+        return self.coordinator.snapshot.brightness
+
+    @property
+    def is_on(self) -> bool:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return if the light is on."""
+        return self.coordinator.snapshot.light_is_on
+
+    @property
+    def rgb_color(self) -> tuple[int, int, int] | None:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return the RGB color of the light."""
+        return self.coordinator.snapshot.rgb_color
+
+    @property
+    def effect(self) -> str | None:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return the current effect of the light."""
+        return self._active_effect or self.coordinator.snapshot.light_effect
+
+    @device_command
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Set the light on."""
+        brightness = kwargs.get(ATTR_BRIGHTNESS)
+        rgb = kwargs.get(ATTR_RGB_COLOR)
+        effect = kwargs.get(ATTR_EFFECT)
+        transition = kwargs.get(ATTR_TRANSITION)
+
+        self._async_cancel_effect()
+
+        if not self._hatch_rest_device.power:
+            _LOGGER.debug("light _hatch_rest_device power not on -- turning on")
+            await self._hatch_rest_device.turn_power_on()
+
+        current = self._current_color()
+        if effect == EFFECT_GRADIENT:
+            _LOGGER.debug("light setting gradient mode")
+            await self._hatch_rest_device.set_color(*COLOR_GRADIENT)
+        elif effect in (EFFECT_FADE_TO_OFF, EFFECT_SLOW_PULSE) and current:
+            if effect == EFFECT_FADE_TO_OFF:
+                steps = transition_commands(
+                    current,
+                    (*current[:3], 0),
+                    transition or FADE_TO_OFF_DURATION,
+                    self._hatch_rest_device.command_interval,
+                )
+            else:
+                steps = slow_pulse_commands(
+                    current[:3],
+                    brightness or current[3] or 255,
+                    SLOW_PULSE_PERIOD,
+                    self._hatch_rest_device.command_interval,
+                )
+            self._async_start_effect(effect, steps)
+        elif transition and (brightness or rgb) and current:
+            target = (*(rgb or current[:3]), brightness or current[3])
+            _LOGGER.debug("light transitioning to %s over %ss", target, transition)
+            self._async_start_effect(
+                None,
+                transition_commands(
+                    current,
+                    target,
+                    transition,
+                    self._hatch_rest_device.command_interval,
+                ),
+            )
+        else:
+            if brightness:
+                _LOGGER.debug("light setting brightness = %s", brightness)
+                await self._hatch_rest_device.set_brightness(brightness)
+            if rgb:
+                _LOGGER.debug("light setting RBG = (%s[0], %s[1], %s[2])", *rgb)
+                await self._hatch_rest_device.set_color(*rgb)
+
+        # https://developers.home-assistant.io/docs/integration_fetching_data/
+        # If this method is used on a coordinator that polls, it will reset the time until the next time it will poll for data.
+        # setters have applied their writes to the cached state by the time they
+        # return (once accepted, or confirmed in confirmed write mode), so publish
+        # that; the state read back later arrives through the device listener
+        self.coordinator.async_set_updated_data(self.coordinator.get_current_data())
+
+    @device_command
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Set the light off."""
+        transition = kwargs.get(ATTR_TRANSITION)
+
+        self._async_cancel_effect()
+
+        if transition and (current := self._current_color()):
+            self._async_start_effect(
+                None,
+                transition_commands(
+                    current,
+                    (*current[:3], 0),
+                    transition,
+                    self._hatch_rest_device.command_interval,
+                ),
+            )
+        else:
+            await self._hatch_rest_device.set_brightness(0)
+
+        # https://developers.home-assistant.io/docs/integration_fetching_data/
+        # If this method is used on a coordinator that polls, it will reset the time until the next time it will poll for data.
+        # setters have applied their writes to the cached state by the time they
+        # return (once accepted, or confirmed in confirmed write mode), so publish
+        # that; the state read back later arrives through the device listener
+        self.coordinator.async_set_updated_data(self.coordinator.get_current_data())
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop any running transition or effect."""
+        self._async_cancel_effect()
+        await super().async_will_remove_from_hass()
+
+    def _current_color(self) -> tuple[int, int, int, int] | None:
+        """Return the cached (red, green, blue, brightness) of the device."""
+        color = self._hatch_rest_device.color
+        brightness = self._hatch_rest_device.brightness
+        if color is None or brightness is None:
+            return None
+        return (*color, brightness)
+
+    @callback
+    def _async_start_effect(
+        self, effect: str | None, steps: Iterable[tuple[float, str]]
+    ) -> None:
+        """Stream a transition or effect to the device in the background."""
+        self._active_effect = effect
+        # not eager: the task must be recorded before it can finish
+        self._effect_task = self.hass.async_create_background_task(
+            self._async_run_effect(steps), f"{self.entity_id} effect", eager_start=False
+        )
+
+    async def _async_run_effect(self, steps: Iterable[tuple[float, str]]) -> None:
+        """Run a streamed transition or effect until done or cancelled."""
+        try:
+            await self._hatch_rest_device.stream_commands(steps)
+        except (CommandError, TimeoutError) as e:
+            _LOGGER.warning("Effect on %s stopped -- %r", self.entity_id, e)
+        finally:
+            # not when cancelled; whatever cancelled it publishes the state
+            if self._effect_task is asyncio.current_task():
+                self._active_effect = None
+                self._effect_task = None
+                self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_effect(self) -> None:
+        """Cancel a running transition or effect."""
+        if self._effect_task:
+            self._effect_task.cancel()
+            self._effect_task = None
+        self._active_effect = None
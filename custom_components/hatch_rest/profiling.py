@@ -0,0 +1,98 @@
+"""Hatch Rest in-place profiling and traffic capture."""
+
+from dataclasses import asdict
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import save_json
+from homeassistant.util import dt as dt_util
+
+from .coordinator import HatchBabyRestUpdateCoordinator
+from .recording import GattRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def profile_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the config directory path for a new profile of an entry."""
+    return hass.config.path(
+        f"hatch_rest_profile_{entry_id}_{dt_util.utcnow():%Y%m%d%H%M%S}.json"
+    )
+
+
+def recording_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the config directory path for a new GATT recording of an entry."""
+    return hass.config.path(
+        f"hatch_rest_recording_{entry_id}_{dt_util.utcnow():%Y%m%d%H%M%S}.jsonl"
+    )
+
+
+async def async_profile(
+    hass: HomeAssistant,
+    entry_id: str,
+    coordinator: HatchBabyRestUpdateCoordinator,
+    operations: int,
+    duration: float,
+    path: str,
+) -> None:
+    """Capture the next device operations and write them to a JSON file.
+
+    Every poll, command burst and stream of the device is recorded, with
+    the phase timings and raw frames of its spans, how long commands
+    waited in the queue and the event loop time spent in the integration's
+    callbacks, until operations have run or duration seconds have passed.
+    """
+    device = coordinator.hatch_rest_device
+    started = dt_util.utcnow()
+    start = device.clock.time()
+    trace = await device.tracer.async_capture(operations, duration)
+
+    profile: dict[str, Any] = {
+        "entry_id": entry_id,
+        "address": device.address,
+        "started": started.isoformat(),
+        "elapsed": device.clock.time() - start,
+        "requested": {"operations": operations, "duration": duration},
+        "spans": [asdict(span) for span in trace.spans],
+        "timeouts": dict(device.timeouts),
+        "metrics": dict(device.metrics),
+        "event_loop": device.watchdog.as_dict(),
+        "route_stats": {
+            source: asdict(stats) for source, stats in device.route_stats.items()
+        },
+    }
+    await hass.async_add_executor_job(save_json, path, profile)
+    _LOGGER.info(
+        "Profile of %s written to %s (%d spans)",
+        device.address,
+        path,
+        len(trace.spans),
+    )
+
+
+async def async_record(
+    hass: HomeAssistant,
+    coordinator: HatchBabyRestUpdateCoordinator,
+    duration: float,
+    path: str,
+) -> None:
+    """Record the device's GATT traffic and write it to a JSON lines file.
+
+    Connects, disconnects, written commands and raw feedback frames are
+    kept for duration seconds; the file can be fed back through a client
+    with recording.async_replay.
+    """
+    device = coordinator.hatch_rest_device
+    recorder = device.recorder = GattRecorder(clock=device.clock)
+    try:
+        await device.clock.sleep(duration)
+    finally:
+        device.recorder = None
+    await hass.async_add_executor_job(recorder.save, path)
+    _LOGGER.info(
+        "Recording of %s written to %s (%d events)",
+        device.address,
+        path,
+        len(recorder.events),
+    )
@@ -0,0 +1,175 @@
+"""Hatch Rest sunrise/sunset ramps."""
+
+import asyncio
+from dataclasses import dataclass
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import CommandError, PyHatchBabyRestAsync
+from .const import (
+    RAMP_MIN_INTERVAL,
+    RAMP_RESUME_TIMEOUT,
+    RAMP_RETRY_INTERVAL,
+    RAMP_WARMUP,
+)
+from .effects import plan_transition
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class RampStep:
+    """Device values to write at an offset into a ramp."""
+
+    offset: float
+    color: tuple[int, int, int, int] | None = None
+    volume: int | None = None
+
+
+def plan_ramp(
+    current_color: tuple[int, int, int, int] | None,
+    current_volume: int | None,
+    duration: float,
+    brightness: int | None = None,
+    rgb_color: tuple[int, int, int] | None = None,
+    volume: int | None = None,
+) -> list[RampStep]:
+    """Plan the steps of a ramp.
+
+    Only offsets where a quantized device value actually changes become
+    steps, at most one per RAMP_MIN_INTERVAL per characteristic. Color and
+    volume changes that fall on the same offset share a step.
+    """
+    colors: dict[float, tuple[int, ...]] = {}
+    volumes: dict[float, tuple[int, ...]] = {}
+
+    if current_color is not None and (brightness is not None or rgb_color):
+        target = (
+            *(rgb_color or current_color[:3]),
+            current_color[3] if brightness is None else brightness,
+        )
+        if target != current_color:
+            colors = dict(
+                plan_transition(current_color, target, duration, RAMP_MIN_INTERVAL)
+            )
+
+    if current_volume is not None and volume is not None and volume != current_volume:
+        volumes = dict(
+            plan_transition((current_volume,), (volume,), duration, RAMP_MIN_INTERVAL)
+        )
+
+    return [
+        RampStep(
+            offset,
+            color=colors.get(offset),  # pyright: ignore[reportArgumentType]
+            volume=volumes[offset][0] if offset in volumes else None,
+        )
+        for offset in sorted(colors.keys() | volumes.keys())
+    ]
+
+
+class HatchRestRamp:
+    """A ramp running against one Hatch Rest device."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hatch_rest_device: PyHatchBabyRestAsync,
+        steps: list[RampStep],
+    ) -> None:
+        """Initialize the ramp."""
+        self.hass = hass
+        self.hatch_rest_device = hatch_rest_device
+        self.steps = steps
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return whether the ramp is still running."""
+        return self._task is not None and not self._task.done()
+
+    @callback
+    def async_start(self) -> None:
+        """Start the ramp in the background."""
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"hatch_rest ramp {self.hatch_rest_device.address}"
+        )
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the ramp."""
+        if self._task:
+            self._task.cancel()
+
+    async def _async_run(self) -> None:
+        """Warm up the connection before each step, then write it."""
+        clock = self.hatch_rest_device.clock
+        start = clock.time()
+        index = 0
+        while index < len(self.steps):
+            due = start + self.steps[index].offset
+            deadline = due + RAMP_RESUME_TIMEOUT
+            if (delay := due - RAMP_WARMUP - clock.time()) > 0:
+                await clock.sleep(delay)
+
+            color, volume = self.steps[index].color, self.steps[index].volume
+            while True:
+                if not await self._async_warm_up(deadline):
+                    _LOGGER.warning(
+                        "Ramp for %s stopped; device unreachable",
+                        self.hatch_rest_device.address,
+                    )
+                    return
+
+                if (delay := due - clock.time()) > 0:
+                    await clock.sleep(delay)
+
+                # after a disconnect, catch up with the latest due values only
+                while (
+                    index + 1 < len(self.steps)
+                    and start + self.steps[index + 1].offset <= clock.time()
+                ):
+                    index += 1
+                    step = self.steps[index]
+                    if step.color is not None:
+                        color = step.color
+                    if step.volume is not None:
+                        volume = step.volume
+
+                try:
+                    if color is not None:
+                        await self.hatch_rest_device.set_color_brightness(*color)
+                        color = None
+                    if volume is not None:
+                        await self.hatch_rest_device.set_volume(volume)
+                except (CommandError, TimeoutError) as e:
+                    # the connection dropped mid-step; reconnect and retry
+                    if clock.time() >= deadline:
+                        _LOGGER.warning(
+                            "Ramp for %s stopped; writes failing -- %r",
+                            self.hatch_rest_device.address,
+                            e,
+                        )
+                        return
+                    _LOGGER.debug(
+                        "Ramp for %s write failed -- %r",
+                        self.hatch_rest_device.address,
+                        e,
+                    )
+                    await clock.sleep(RAMP_RETRY_INTERVAL)
+                    continue
+                break
+            index += 1
+
+    async def _async_warm_up(self, deadline: float) -> bool:
+        """Connect to the device, retrying until the deadline."""
+        clock = self.hatch_rest_device.clock
+        while not await self.hatch_rest_device.warm_up():
+            if clock.time() >= deadline:
+                return False
+            _LOGGER.debug(
+                "Ramp for %s waiting for device", self.hatch_rest_device.address
+            )
+            await clock.sleep(RAMP_RETRY_INTERVAL)
+        return True
@@ -0,0 +1,155 @@
+"""Hatch Rest GATT traffic recording and replay."""
+
+from collections import deque
+from dataclasses import dataclass
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from .clock import SYSTEM_CLOCK, Clock
+from .const import GATT_RECORD_LIMIT
+
+if TYPE_CHECKING:
+    from .api import PyHatchBabyRestAsync
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_CONNECT = "connect"
+EVENT_DISCONNECT = "disconnect"
+EVENT_WRITE = "write"
+EVENT_READ = "read"
+
+
+@dataclass(frozen=True, slots=True)
+class GattEvent:
+    """One recorded GATT event.
+
+    data is the route of a connect, the encoded command of a write or the
+    hex feedback frame of a read.
+    """
+
+    # seconds since the recording started
+    time: float
+    kind: str
+    data: str | None = None
+
+    def to_json(self) -> str:
+        """Encode the event as a compact JSON line."""
+        return json.dumps(
+            {"t": round(self.time, 6), "k": self.kind, "d": self.data},
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "GattEvent":
+        """Decode an event from a JSON line."""
+        event = json.loads(line)
+        return cls(event["t"], event["k"], event["d"])
+
+
+class GattRecorder:
+    """Opt-in recorder of a device client's GATT traffic.
+
+    Events are kept in memory, the oldest dropped past limit, until they
+    are saved as JSON lines.
+    """
+
+    def __init__(
+        self, limit: int = GATT_RECORD_LIMIT, clock: Clock = SYSTEM_CLOCK
+    ) -> None:
+        """Initialize the recorder."""
+        self.clock = clock
+        self.start = clock.time()
+        self.events: deque[GattEvent] = deque(maxlen=limit)
+
+    def record(self, kind: str, data: str | bytes | None = None) -> None:
+        """Record an event; bytes are stored hex-encoded."""
+        if isinstance(data, (bytes, bytearray)):
+            data = data.hex()
+        self.events.append(GattEvent(self.clock.time() - self.start, kind, data))
+
+    def save(self, path: str) -> None:
+        """Write the recorded events to a JSON lines file (blocking)."""
+        with open(path, "w", encoding="utf-8") as file:
+            file.writelines(f"{event.to_json()}\n" for event in self.events)
+
+
+def load_capture(path: str) -> list[GattEvent]:
+    """Read a JSON lines capture (blocking)."""
+    with open(path, encoding="utf-8") as file:
+        return [GattEvent.from_json(line) for line in file if line.strip()]
+
+
+class ReplayClient:
+    """Stand-in for a connected BleakClient that serves recorded frames."""
+
+    is_connected = True
+
+    def __init__(self) -> None:
+        """Initialize the replay transport."""
+        self.frames: deque[bytearray] = deque()
+        self.writes: list[str] = []
+
+    async def read_gatt_char(self, char_specifier: str) -> bytearray:
+        """Return the next recorded frame."""
+        return self.frames.popleft()
+
+    async def write_gatt_char(
+        self, char_specifier: str, data: bytearray, response: bool = True
+    ) -> None:
+        """Keep a written command."""
+        self.writes.append(data.decode())
+
+    async def disconnect(self) -> bool:
+        """Stay connected; the replay owns the transport."""
+        return True
+
+
+@dataclass(slots=True)
+class ReplayReport:
+    """What a replay fed through the device client."""
+
+    reads: int = 0
+    writes: int = 0
+    elapsed: float = 0.0
+
+
+async def async_replay(
+    device: "PyHatchBabyRestAsync",
+    events: list[GattEvent],
+    speed: float | None = 1.0,
+) -> ReplayReport:
+    """Feed a capture through a device client's decoder and listeners.
+
+    Reads are decoded by the client as if they came from the device and
+    writes update its cached state as a written command would. Listeners
+    (the coordinator) are notified after each, so coordinator and entity
+    updates run as they did in the field. The device client must not be
+    connected to hardware.
+
+    :param device: The client to replay into.
+    :param events: The recorded events, in order.
+    :param speed: Playback speed relative to the recording; None replays
+        as fast as possible.
+    """
+    client = ReplayClient()
+    device._client = client  # pyright: ignore[reportAttributeAccessIssue]
+    report = ReplayReport()
+    clock = device.clock
+    start = clock.time()
+    for event in events:
+        if event.kind not in (EVENT_READ, EVENT_WRITE) or event.data is None:
+            continue
+        if speed and (delay := start + event.time / speed - clock.time()) > 0:
+            await clock.sleep(delay)
+        if event.kind == EVENT_READ:
+            client.frames.append(bytearray.fromhex(event.data))
+            await device.refresh_data()
+            report.reads += 1
+        else:
+            device._apply_command(event.data)
+            report.writes += 1
+        device._notify_listeners()
+    report.elapsed = clock.time() - start
+    _LOGGER.debug("Replayed %s into %s", report, device.address)
+    return report
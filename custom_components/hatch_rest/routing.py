@@ -0,0 +1,61 @@
+"""Hatch Rest Bluetooth routing."""
+
+from bleak.backends.device import BLEDevice
+
+from homeassistant.components import bluetooth
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .api import PyHatchBabyRestAsync
+
+
+@callback
+def async_device_routes(
+    hass: HomeAssistant, address: str
+) -> list[tuple[str, BLEDevice]]:
+    """Return the connectable scanners that hear a device, best RSSI first."""
+    return [
+        (scanner_device.scanner.source, scanner_device.ble_device)
+        for scanner_device in sorted(
+            bluetooth.async_scanner_devices_by_address(
+                hass, address.upper(), connectable=True
+            ),
+            key=lambda scanner_device: scanner_device.advertisement.rssi,
+            reverse=True,
+        )
+    ]
+
+
+@callback
+def async_track_device(
+    hass: HomeAssistant, hatch_rest_device: PyHatchBabyRestAsync
+) -> CALLBACK_TYPE:
+    """Keep a device client's BLEDevice and routes current.
+
+    Every advertisement updates the BLEDevice to the path Home Assistant
+    currently prefers, and connects are routed through all scanners that
+    hear the device so a failed attempt falls over to the next best one.
+    Returns a callback that stops tracking.
+    """
+    address = hatch_rest_device.address
+
+    @callback
+    def _async_update_ble_device(
+        service_info: bluetooth.BluetoothServiceInfoBleak,
+        change: bluetooth.BluetoothChange,
+    ) -> None:
+        hatch_rest_device.device = service_info.device
+
+    hatch_rest_device.routes_callback = lambda: async_device_routes(hass, address)
+    unsub = bluetooth.async_register_callback(
+        hass,
+        _async_update_ble_device,
+        bluetooth.BluetoothCallbackMatcher(address=address.upper(), connectable=True),
+        bluetooth.BluetoothScanningMode.PASSIVE,
+    )
+
+    @callback
+    def _async_stop() -> None:
+        unsub()
+        hatch_rest_device.routes_callback = None
+
+    return _async_stop
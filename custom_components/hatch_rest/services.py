@@ -0,0 +1,254 @@
+"""Hatch Rest services."""
+
+from datetime import timedelta
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DURATION,
+    ATTR_OPERATIONS,
+    ATTR_POWER,
+    ATTR_SOUND,
+    ATTR_VOLUME,
+    DOMAIN,
+    PROFILE_DURATION,
+    PROFILE_OPERATIONS,
+    RECORD_DURATION,
+    SERVICE_FAN_OUT,
+    SERVICE_PROFILE,
+    SERVICE_RECORD,
+    SERVICE_START_RAMP,
+    SERVICE_STOP_RAMP,
+    PyHatchBabyRestSound,
+)
+from .coordinator import HatchBabyRestUpdateCoordinator, device_errors
+from .fanout import DATA_ADAPTER_SLOTS, async_fan_out
+from .profiling import async_profile, async_record, profile_path, recording_path
+from .ramp import HatchRestRamp, plan_ramp
+
+_LOGGER = logging.getLogger(__name__)
+
+APPLY_STATE_FIELDS = {
+    vol.Optional(ATTR_POWER): cv.boolean,
+    vol.Optional(ATTR_RGB_COLOR): vol.All(
+        vol.Coerce(tuple), vol.ExactSequence((cv.byte,) * 3)
+    ),
+    vol.Optional(ATTR_BRIGHTNESS): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+    vol.Optional(ATTR_SOUND): vol.All(
+        cv.string, vol.Lower, vol.In(PyHatchBabyRestSound.__members__)
+    ),
+    vol.Optional(ATTR_VOLUME): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+}
+FAN_OUT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        **APPLY_STATE_FIELDS,
+    }
+)
+START_RAMP_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_DURATION): cv.positive_time_period,
+        vol.Optional(ATTR_BRIGHTNESS): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=255)
+        ),
+        vol.Optional(ATTR_RGB_COLOR): vol.All(
+            vol.Coerce(tuple), vol.ExactSequence((cv.byte,) * 3)
+        ),
+        vol.Optional(ATTR_VOLUME): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+    }
+)
+STOP_RAMP_SCHEMA = vol.Schema({vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string})
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_OPERATIONS, default=PROFILE_OPERATIONS): cv.positive_int,
+        vol.Optional(
+            ATTR_DURATION, default=timedelta(seconds=PROFILE_DURATION)
+        ): cv.positive_time_period,
+    }
+)
+RECORD_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(
+            ATTR_DURATION, default=timedelta(seconds=RECORD_DURATION)
+        ): cv.positive_time_period,
+    }
+)
+
+
+def apply_state_kwargs(data: dict[str, Any]) -> dict[str, Any]:
+    """Convert apply_state service data to PyHatchBabyRestAsync arguments."""
+    sound = data.get(ATTR_SOUND)
+    volume = data.get(ATTR_VOLUME)
+    return {
+        "power": data.get(ATTR_POWER),
+        "color": data.get(ATTR_RGB_COLOR),
+        "brightness": data.get(ATTR_BRIGHTNESS),
+        "sound": None if sound is None else PyHatchBabyRestSound[sound],
+        "volume": None if volume is None else int(255 * volume),
+    }
+
+
+@callback
+def _async_get_coordinator(
+    hass: HomeAssistant, entry_id: str
+) -> HatchBabyRestUpdateCoordinator:
+    """Return the coordinator of a loaded Hatch Rest config entry."""
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if not entry or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"Unknown Hatch Rest config entry {entry_id}")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"Hatch Rest config entry {entry_id} not loaded")
+    return entry.runtime_data
+
+
+async def _async_start_ramp(call: ServiceCall) -> None:
+    """Plan a ramp and start it, replacing any running ramp."""
+    coordinator = _async_get_coordinator(call.hass, call.data[ATTR_CONFIG_ENTRY_ID])
+    device = coordinator.hatch_rest_device
+
+    current_color = (
+        (*device.color, device.brightness)
+        if device.color is not None and device.brightness is not None
+        else None
+    )
+    volume = call.data.get(ATTR_VOLUME)
+    steps = plan_ramp(
+        current_color,
+        device.volume,
+        call.data[ATTR_DURATION].total_seconds(),
+        brightness=call.data.get(ATTR_BRIGHTNESS),
+        rgb_color=call.data.get(ATTR_RGB_COLOR),
+        volume=None if volume is None else int(255 * volume),
+    )
+    _LOGGER.debug("Ramp for %s planned with %d steps", device.address, len(steps))
+
+    if coordinator.ramp:
+        coordinator.ramp.async_cancel()
+    if not steps:
+        coordinator.ramp = None
+        return
+
+    if not device.power:
+        with device_errors(device):
+            await device.turn_power_on()
+    coordinator.ramp = HatchRestRamp(call.hass, device, steps)
+    coordinator.ramp.async_start()
+
+
+async def _async_stop_ramp(call: ServiceCall) -> None:
+    """Cancel a running ramp."""
+    coordinator = _async_get_coordinator(call.hass, call.data[ATTR_CONFIG_ENTRY_ID])
+    if coordinator.ramp:
+        coordinator.ramp.async_cancel()
+        coordinator.ramp = None
+
+
+async def _async_fan_out(call: ServiceCall) -> ServiceResponse:
+    """Apply a state to several devices concurrently."""
+    coordinators = {
+        entry_id: _async_get_coordinator(call.hass, entry_id)
+        for entry_id in call.data[ATTR_CONFIG_ENTRY_ID]
+    }
+    return await async_fan_out(
+        call.hass,
+        call.hass.data[DATA_ADAPTER_SLOTS],
+        coordinators,
+        apply_state_kwargs(call.data),
+    )
+
+
+async def _async_profile(call: ServiceCall) -> ServiceResponse:
+    """Start capturing a device's next operations into a profile file."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    coordinator = _async_get_coordinator(call.hass, entry_id)
+    if coordinator.hatch_rest_device.tracer.capture is not None:
+        raise ServiceValidationError(f"Hatch Rest {entry_id} is already profiling")
+
+    path = profile_path(call.hass, entry_id)
+    # the capture is abandoned if the entry unloads
+    entry = call.hass.config_entries.async_get_entry(entry_id)
+    assert entry
+    entry.async_create_background_task(
+        call.hass,
+        async_profile(
+            call.hass,
+            entry_id,
+            coordinator,
+            call.data[ATTR_OPERATIONS],
+            call.data[ATTR_DURATION].total_seconds(),
+            path,
+        ),
+        f"hatch_rest profile {entry_id}",
+    )
+    return {"path": path}
+
+
+async def _async_record(call: ServiceCall) -> ServiceResponse:
+    """Start recording a device's GATT traffic into a capture file."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    coordinator = _async_get_coordinator(call.hass, entry_id)
+    if coordinator.hatch_rest_device.recorder is not None:
+        raise ServiceValidationError(f"Hatch Rest {entry_id} is already recording")
+
+    path = recording_path(call.hass, entry_id)
+    # the recording is abandoned if the entry unloads
+    entry = call.hass.config_entries.async_get_entry(entry_id)
+    assert entry
+    entry.async_create_background_task(
+        call.hass,
+        async_record(
+            call.hass, coordinator, call.data[ATTR_DURATION].total_seconds(), path
+        ),
+        f"hatch_rest record {entry_id}",
+    )
+    return {"path": path}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register Hatch Rest services."""
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_RAMP, _async_start_ramp, schema=START_RAMP_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_STOP_RAMP, _async_stop_ramp, schema=STOP_RAMP_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FAN_OUT,
+        _async_fan_out,
+        schema=FAN_OUT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD,
+        _async_record,
+        schema=RECORD_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,224 @@
+"""Hatch Rest command tracing."""
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator, Sequence
+import contextlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import logging
+import zlib
+
+from .clock import SYSTEM_CLOCK, Clock
+from .const import TRACE_HISTORY
+
+_LOGGER = logging.getLogger(__name__)
+
+# traces the current task's device operations are recorded into; empty
+# unless a sampled service call started them
+_current_traces: ContextVar[Sequence["Trace"]] = ContextVar(
+    "hatch_rest_traces", default=()
+)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+@dataclass(slots=True)
+class Span:
+    """One timed phase of a device operation."""
+
+    name: str
+    # seconds from the start of the trace
+    start: float
+    duration: float
+    detail: str | None = None
+    error: str | None = None
+
+
+@dataclass(eq=False, slots=True)
+class Trace:
+    """The spans recorded for one service call or profile capture."""
+
+    trace_id: str
+    # the clock of the device client whose operations are traced
+    clock: Clock = field(default=SYSTEM_CLOCK, repr=False)
+    start: float = field(init=False)
+    spans: list[Span] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        """Start the trace."""
+        self.start = self.clock.time()
+
+
+class Capture:
+    """Every device operation over a bounded window, for profiling."""
+
+    def __init__(self, operations: int, clock: Clock = SYSTEM_CLOCK) -> None:
+        """Initialize the capture."""
+        self.trace = Trace("profile", clock)
+        # operations still to be captured, and those running
+        self.operations = operations
+        self.running = 0
+        self.finished = asyncio.Event()
+        if not operations:
+            self.finished.set()
+
+    def start_operation(self) -> bool:
+        """Return whether a starting operation is captured."""
+        if not self.operations:
+            return False
+        self.operations -= 1
+        self.running += 1
+        return True
+
+    def finish_operation(self) -> None:
+        """Finish the capture once its last operation ends."""
+        self.running -= 1
+        if not self.operations and not self.running:
+            self.finished.set()
+
+
+class Tracer:
+    """Sample service calls and record spans of the operations they cause.
+
+    Sampling is decided by the correlation ID, so every entity acting on
+    one service call agrees. With a sample rate of 0 nothing is recorded
+    and spans cost a context variable lookup. A capture records every
+    operation regardless of sampling.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, clock: Clock = SYSTEM_CLOCK) -> None:
+        """Initialize the tracer."""
+        self.sample_rate = sample_rate
+        self.clock = clock
+        self.traces: deque[Trace] = deque(maxlen=TRACE_HISTORY)
+        self.capture: Capture | None = None
+
+    def begin(self, trace_id: str) -> None:
+        """Trace the current task's device operations if trace_id is sampled."""
+        if (
+            self.sample_rate
+            and zlib.crc32(trace_id.encode()) / 2**32 < self.sample_rate
+        ):
+            trace = next((t for t in self.traces if t.trace_id == trace_id), None)
+            if trace is None:
+                trace = Trace(trace_id, self.clock)
+                self.traces.append(trace)
+            _current_traces.set((trace,))
+        elif _current_traces.get():
+            _current_traces.set(())
+
+    @contextlib.contextmanager
+    def operation(self, name: str, traces: list[Trace] | None = None) -> Iterator[None]:
+        """Run a device operation, spanning it in its traces and any capture.
+
+        :param name: The span name of the whole operation.
+        :param traces: A list the operation records into and may extend;
+            defaults to the current task's traces.
+        """
+        if traces is None:
+            traces = list(_current_traces.get())
+        capture = self.capture
+        # operations nested in a captured one are part of it
+        captured = (
+            capture is not None
+            and capture.trace not in traces
+            and capture.start_operation()
+        )
+        if captured:
+            traces.append(capture.trace)  # pyright: ignore[reportOptionalMemberAccess]
+        try:
+            # traces may still be added to, so the span is always timed
+            with use_traces(traces), _record_span(self.clock, traces, name, None):
+                yield
+        finally:
+            if captured:
+                capture.finish_operation()  # pyright: ignore[reportOptionalMemberAccess]
+
+    async def async_capture(self, operations: int, duration: float) -> Trace:
+        """Record the next operations, for at most duration seconds.
+
+        :param operations: How many device operations to capture.
+        :param duration: Seconds to wait for them.
+        """
+        if self.capture is not None:
+            raise RuntimeError("A capture is already running")
+        capture = self.capture = Capture(operations, self.clock)
+        try:
+            async with self.clock.timeout(duration):
+                await capture.finished.wait()
+        except TimeoutError:
+            pass
+        finally:
+            self.capture = None
+        return capture.trace
+
+
+def current_traces() -> Sequence[Trace]:
+    """Return the traces of the current task."""
+    return _current_traces.get()
+
+
+@contextlib.contextmanager
+def use_traces(traces: Sequence[Trace]) -> Iterator[None]:
+    """Record spans into traces, e.g. for work done on behalf of queued calls."""
+    token = _current_traces.set(traces)
+    try:
+        yield
+    finally:
+        _current_traces.reset(token)
+
+
+def span(
+    name: str, detail: str | bytes | None = None
+) -> contextlib.AbstractContextManager[None]:
+    """Time a phase into the current traces; a no-op when there are none.
+
+    Bytes details (raw frames) are only hex-encoded when recorded.
+    """
+    if not (traces := _current_traces.get()):
+        return _NULL_SPAN
+    return _record_span(traces[0].clock, traces, name, detail)
+
+
+def record_span(name: str, start: float, detail: str | None = None) -> None:
+    """Record a phase that started at start (on the traces' clock) and ends now."""
+    if traces := _current_traces.get():
+        _add_span(traces, name, start, traces[0].clock.time() - start, detail, None)
+
+
+@contextlib.contextmanager
+def _record_span(
+    clock: Clock, traces: Sequence[Trace], name: str, detail: str | bytes | None
+) -> Iterator[None]:
+    start = clock.time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        if isinstance(detail, (bytes, bytearray)):
+            detail = detail.hex()
+        _add_span(traces, name, start, clock.time() - start, detail, error)
+
+
+def _add_span(
+    traces: Sequence[Trace],
+    name: str,
+    start: float,
+    duration: float,
+    detail: str | None,
+    error: str | None,
+) -> None:
+    for trace in traces:
+        trace.spans.append(Span(name, start - trace.start, duration, detail, error))
+        _LOGGER.debug(
+            "Trace %s: %s%s took %.3fs%s",
+            trace.trace_id,
+            name,
+            f" ({detail})" if detail else "",
+            duration,
+            f" -- {error}" if error else "",
+        )
@@ -0,0 +1,85 @@
+"""Hatch Rest event loop watchdog."""
+
+from collections.abc import Iterator
+import contextlib
+from dataclasses import asdict, dataclass
+import heapq
+import logging
+from time import perf_counter
+from typing import Any
+
+from .const import LOOP_STEP_THRESHOLD, LOOP_WORST_STEPS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class StepStats:
+    """Event loop time of one kind of step."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    slow: int = 0
+
+
+class LoopWatchdog:
+    """Time integration code that runs on the event loop without yielding.
+
+    Only synchronous sections (callbacks, or the code between two awaits)
+    may be stepped, so a step's duration is time the loop could not run
+    anything else. Steps over the threshold are logged, and the slowest
+    are kept for diagnostics.
+    """
+
+    def __init__(
+        self, threshold: float = LOOP_STEP_THRESHOLD, keep: int = LOOP_WORST_STEPS
+    ) -> None:
+        """Initialize the watchdog."""
+        self.threshold = threshold
+        self.keep = keep
+        self.stats: dict[str, StepStats] = {}
+        # min-heap of (duration, name), so the fastest of the worst is popped
+        self._worst: list[tuple[float, str]] = []
+
+    @contextlib.contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time a synchronous step."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, perf_counter() - start)
+
+    def _record(self, name: str, duration: float) -> None:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StepStats()
+        stats.count += 1
+        stats.total += duration
+        stats.max = max(stats.max, duration)
+        if duration <= self.threshold:
+            return
+
+        stats.slow += 1
+        _LOGGER.warning(
+            "%s blocked the event loop for %.3fs (threshold %.3fs)",
+            name,
+            duration,
+            self.threshold,
+        )
+        if len(self._worst) < self.keep:
+            heapq.heappush(self._worst, (duration, name))
+        else:
+            heapq.heappushpop(self._worst, (duration, name))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the step statistics and worst offenders."""
+        return {
+            "threshold": self.threshold,
+            "steps": {name: asdict(stats) for name, stats in self.stats.items()},
+            "worst": [
+                {"name": name, "duration": duration}
+                for duration, name in sorted(self._worst, reverse=True)
+            ],
+        }
@@ -1,21 +1,28 @@
 """Fixtures for Hatch Rest tests."""
 
 from collections.abc import Generator
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from bleak.backends.device import BLEDevice
 from homeassistant.components.bluetooth import BluetoothServiceInfoBleak
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 # from custom_components.hatch_rest.api import PyHatchBabyRestAsync
+from custom_components.hatch_rest.api import ShutdownReport
+from custom_components.hatch_rest.clock import Clock
 from custom_components.hatch_rest.const import (
     DOMAIN,
     MANUFACTURER_ID,
     PyHatchBabyRestSound,
 )
 from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
+from custom_components.hatch_rest.services import async_setup_services
+from custom_components.hatch_rest.tracing import Tracer
+from custom_components.hatch_rest.watchdog import LoopWatchdog
 
 
 @pytest.fixture(autouse=True)
@@ -69,15 +76,25 @@ def mock_hatch_api(mock_ble_device: BLEDevice) -> Generator[AsyncMock, None, Non
         mock_api.sound = PyHatchBabyRestSound.ocean
         mock_api.volume = 100
         mock_api.power = True
+        mock_api.tracer = Tracer()
+        mock_api.watchdog = LoopWatchdog()
+        mock_api.clock = Clock()
+        mock_api.recorder = None
 
         # Async methods
-        mock_api.refresh_data = AsyncMock()
+        mock_api.last_read = None
+
+        async def _refresh_data(*args: Any, **kwargs: Any) -> None:
+            mock_api.last_read = mock_api.clock.time()
+
+        mock_api.refresh_data = AsyncMock(side_effect=_refresh_data)
         mock_api.turn_power_on = AsyncMock()
         mock_api.turn_power_off = AsyncMock()
         mock_api.set_sound = AsyncMock()
         mock_api.set_volume = AsyncMock()
         mock_api.set_color = AsyncMock()
         mock_api.set_brightness = AsyncMock()
+        mock_api.async_shutdown = AsyncMock(return_value=ShutdownReport([], []))
 
         yield mock_api
 
@@ -115,3 +132,17 @@ def mock_config_entry() -> MockConfigEntry:
         },
         options={},
     )
+
+
+@pytest.fixture
+def loaded_entry(
+    hass: HomeAssistant,
+    mock_config_entry: MockConfigEntry,
+    mock_coordinator: HatchBabyRestUpdateCoordinator,
+) -> MockConfigEntry:
+    """Register services and a loaded config entry."""
+    async_setup_services(hass)
+    mock_config_entry.add_to_hass(hass)
+    mock_config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    mock_config_entry.runtime_data = mock_coordinator
+    return mock_config_entry
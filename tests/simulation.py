@@ -0,0 +1,284 @@
+"""Simulated Hatch Rest devices behind a simulated Bluetooth adapter."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import contextlib
+import contextvars
+import heapq
+import itertools
+from typing import Any, TypeVar
+
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
+from bleak_retry_connector import BleakOutOfConnectionSlotsError
+
+from custom_components.hatch_rest.clock import SYSTEM_CLOCK, Clock
+from custom_components.hatch_rest.const import ADAPTER_CONNECTION_SLOTS
+
+_T = TypeVar("_T")
+
+
+def _wake(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class VirtualClock(Clock):
+    """A clock whose time only moves when advanced.
+
+    Sleeps, timeouts and timers wait on virtual time. advance() and run()
+    fire them in order, letting the event loop run whatever they woke
+    before moving on, so waits of any length take no real time and always
+    resolve in the same order.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        """Initialize the clock."""
+        self.now = start
+        # (when, sequence, handle, callback, args, context) heap; the handle
+        # is only there to be cancelled
+        self._timers: list[
+            tuple[
+                float,
+                int,
+                asyncio.TimerHandle,
+                Callable[..., object],
+                tuple[Any, ...],
+                contextvars.Context,
+            ]
+        ] = []
+        self._sequence = itertools.count()
+
+    def time(self) -> float:
+        """Return the virtual time."""
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        """Sleep for delay virtual seconds."""
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        handle = self.call_later(delay, _wake, future)
+        try:
+            await future
+        finally:
+            handle.cancel()
+
+    def call_later(
+        self, delay: float, callback: Callable[..., object], *args: Any
+    ) -> asyncio.TimerHandle:
+        """Call callback(*args) once delay virtual seconds have passed."""
+        loop = asyncio.get_running_loop()
+        when = self.now + max(delay, 0.0)
+        handle = asyncio.TimerHandle(when, callback, args, loop)
+        heapq.heappush(
+            self._timers,
+            (
+                when,
+                next(self._sequence),
+                handle,
+                callback,
+                args,
+                contextvars.copy_context(),
+            ),
+        )
+        return handle
+
+    @contextlib.asynccontextmanager
+    async def timeout(self, delay: float | None):
+        """Raise TimeoutError if the block runs past delay virtual seconds."""
+        async with asyncio.timeout(None) as timeout:
+            handle = None
+            if delay is not None:
+                loop = asyncio.get_running_loop()
+                # expiring the real timeout now cancels the block
+                handle = self.call_later(delay, lambda: timeout.reschedule(loop.time()))
+            try:
+                yield timeout
+            finally:
+                if handle:
+                    handle.cancel()
+
+    async def advance(self, seconds: float) -> None:
+        """Move time forward, firing the timers due on the way."""
+        target = self.now + seconds
+        await self._run_ready()
+        while self._timers and self._timers[0][0] <= target:
+            await self._fire_next()
+        self.now = max(self.now, target)
+
+    async def run(self, awaitable: Awaitable[_T]) -> _T:
+        """Await awaitable, jumping to the next timer whenever all is idle."""
+        task = asyncio.ensure_future(awaitable)
+        while not task.done():
+            await self._run_ready()
+            if task.done():
+                break
+            if self._timers:
+                await self._fire_next()
+            else:
+                # waiting on something outside virtual time
+                await asyncio.sleep(0.001)
+        return task.result()
+
+    async def _fire_next(self) -> None:
+        when, _, handle, callback, args, context = heapq.heappop(self._timers)
+        if handle.cancelled():
+            return
+        self.now = max(self.now, when)
+        asyncio.get_running_loop().call_soon(callback, *args, context=context)
+        await self._run_ready()
+
+    async def _run_ready(self) -> None:
+        """Yield until the event loop has no callbacks ready to run."""
+        loop = asyncio.get_running_loop()
+        for _ in range(10000):
+            await asyncio.sleep(0)
+            if not loop._ready:  # type: ignore[attr-defined]
+                return
+
+
+class SimulatedDevice:
+    """The state and GATT protocol of one Hatch Rest."""
+
+    def __init__(self, address: str) -> None:
+        """Initialize the device."""
+        self.ble_device = BLEDevice(address, "Hatch Rest", None)
+        self.power = True
+        self.color = (255, 128, 64)
+        self.brightness = 100
+        self.sound = 5
+        self.volume = 100
+        self.writes = 0
+        self.reads = 0
+
+    def write(self, data: bytes) -> None:
+        """Apply a written command."""
+        command = data.decode()
+        prefix, values = command[:2], bytes.fromhex(command[2:])
+        if prefix == "SI":
+            self.power = bool(values[0])
+        elif prefix == "SN":
+            self.sound = values[0]
+        elif prefix == "SV":
+            self.volume = values[0]
+        elif prefix == "SC":
+            self.color = (values[0], values[1], values[2])
+            self.brightness = values[3]
+        self.writes += 1
+
+    def frame(self) -> bytearray:
+        """Encode the state as a feedback frame."""
+        self.reads += 1
+        return bytearray(
+            [0, 0, 0, 0, 0, 0x43, *self.color, self.brightness]
+            + [0x53, self.sound, self.volume, 0x50, 0x00 if self.power else 0xC0]
+        )
+
+
+class SimulatedClient:
+    """A connection to a simulated device through a simulated adapter."""
+
+    def __init__(
+        self,
+        adapter: "SimulatedAdapter",
+        device: SimulatedDevice,
+        disconnected_callback: Callable[[Any], None] | None,
+    ) -> None:
+        """Initialize the connection."""
+        self.adapter = adapter
+        self.device = device
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = True
+
+    async def write_gatt_char(
+        self, char_specifier: str, data: bytearray, response: bool = True
+    ) -> None:
+        """Write a command after the adapter's GATT latency."""
+        await self.adapter.clock.sleep(self.adapter.gatt_latency)
+        if not self.is_connected:
+            raise BleakError("Not connected")
+        self.device.write(data)
+
+    async def read_gatt_char(self, char_specifier: str) -> bytearray:
+        """Read the feedback frame after the adapter's GATT latency."""
+        await self.adapter.clock.sleep(self.adapter.gatt_latency)
+        if not self.is_connected:
+            raise BleakError("Not connected")
+        return self.device.frame()
+
+    async def disconnect(self) -> bool:
+        """Close the connection and free its adapter slot."""
+        if self.is_connected:
+            self.is_connected = False
+            self.adapter.connections.discard(self)
+            if self.disconnected_callback:
+                self.disconnected_callback(self)
+        return True
+
+
+class SimulatedAdapter:
+    """A Bluetooth adapter with a limited number of connection slots.
+
+    Its establish_connection stands in for bleak_retry_connector's: a
+    connect when every slot is taken fails as out of slots, and is retried
+    with a short backoff up to max_attempts.
+    """
+
+    def __init__(
+        self,
+        slots: int = ADAPTER_CONNECTION_SLOTS,
+        connect_latency: float = 0.01,
+        gatt_latency: float = 0.002,
+        retry_backoff: float = 0.01,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """Initialize the adapter."""
+        self.clock = clock
+        self.slots = slots
+        self.connect_latency = connect_latency
+        self.gatt_latency = gatt_latency
+        self.retry_backoff = retry_backoff
+        self.devices: dict[str, SimulatedDevice] = {}
+        self.connections: set[SimulatedClient] = set()
+        self.connect_attempts = 0
+        self.slot_exhaustions = 0
+        self.peak_connections = 0
+
+    def add_device(self, address: str) -> SimulatedDevice:
+        """Put a device in range of the adapter."""
+        device = self.devices[address] = SimulatedDevice(address)
+        return device
+
+    def ble_device(self, hass: Any, address: str) -> BLEDevice | None:
+        """Stand in for bluetooth.async_ble_device_from_address."""
+        device = self.devices.get(address.upper())
+        return device.ble_device if device else None
+
+    async def establish_connection(
+        self,
+        client_class: type,
+        device: BLEDevice,
+        name: str,
+        disconnected_callback: Callable[[Any], None] | None = None,
+        max_attempts: int = 4,
+        **kwargs: Any,
+    ) -> SimulatedClient:
+        """Connect to a device, retrying while the adapter is out of slots."""
+        for attempt in range(max_attempts):
+            if attempt:
+                await self.clock.sleep(self.retry_backoff * attempt)
+            self.connect_attempts += 1
+            await self.clock.sleep(self.connect_latency)
+            if len(self.connections) < self.slots:
+                client = SimulatedClient(
+                    self, self.devices[device.address], disconnected_callback
+                )
+                self.connections.add(client)
+                self.peak_connections = max(
+                    self.peak_connections, len(self.connections)
+                )
+                return client
+            self.slot_exhaustions += 1
+        raise BleakOutOfConnectionSlotsError(f"No free slot for {name}")
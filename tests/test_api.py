@@ -1,13 +1,29 @@
 """Tests for Hatch Rest API."""
 
+import asyncio
+from collections import deque
+from time import monotonic
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from bleak.backends.device import BLEDevice
 from bleak_retry_connector import BleakConnectionError
 
-from custom_components.hatch_rest.api import PyHatchBabyRestAsync, _assert_value
-from custom_components.hatch_rest.const import CHAR_TX, PyHatchBabyRestSound
+from custom_components.hatch_rest.api import (
+    CommandError,
+    PyHatchBabyRestAsync,
+    _assert_value,
+)
+from custom_components.hatch_rest.const import (
+    BATCH_WINDOW,
+    CHAR_TX,
+    CONNECT_TIMEOUT,
+    SETTLE_TIME,
+    WRITE_ATTEMPTS,
+    PyHatchBabyRestSound,
+)
+
+from .simulation import SimulatedAdapter, VirtualClock
 
 
 class TestAssertValue:
@@ -72,6 +88,32 @@ class TestPyHatchBabyRestAsync:
             await api._client_connect()
             assert api._client is None
 
+    @pytest.mark.asyncio
+    async def test_client_connect_fails_over_routes(self, api: PyHatchBabyRestAsync):
+        """Test a failed connect falls over to the next route and records stats."""
+        mock_client = MagicMock()
+        mock_client.is_connected = True
+        near, far = (
+            MagicMock(address="AA:BB:CC:DD:EE:FF"),
+            MagicMock(address="AA:BB:CC:DD:EE:FF"),
+        )
+        api.routes_callback = lambda: [("near", near), ("far", far)]
+
+        with patch(
+            "custom_components.hatch_rest.api.establish_connection",
+            new_callable=AsyncMock,
+            side_effect=[BleakConnectionError("Connection failed"), mock_client],
+        ) as mock_establish:
+            await api._client_connect()
+
+        assert api._client is mock_client
+        assert api.device is far
+        assert [call.args[1] for call in mock_establish.call_args_list] == [near, far]
+        assert mock_establish.call_args_list[0].kwargs["max_attempts"] == 1
+        assert api.route_stats["near"].attempts == 1
+        assert api.route_stats["near"].successes == 0
+        assert api.route_stats["far"].successes == 1
+
     @pytest.mark.asyncio
     async def test_client_disconnect_when_idle(self, api: PyHatchBabyRestAsync):
         """Test client disconnects when no active operations."""
@@ -94,6 +136,34 @@ class TestPyHatchBabyRestAsync:
         await api._client_disconnect()
         mock_client.disconnect.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_idle_timeout_keeps_connection_open(self, api: PyHatchBabyRestAsync):
+        """Test an idle connection is closed only after idle_timeout."""
+        mock_client = AsyncMock()
+        mock_client.is_connected = True
+        api._client = mock_client
+        api.idle_timeout = 0.05
+
+        await api._release_connection()
+        mock_client.disconnect.assert_not_called()
+
+        await asyncio.sleep(0.1)
+        mock_client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_idle_timeout_cancelled_by_reuse(self, api: PyHatchBabyRestAsync):
+        """Test reusing the connection cancels the pending idle disconnect."""
+        mock_client = AsyncMock()
+        mock_client.is_connected = True
+        api._client = mock_client
+        api.idle_timeout = 0.05
+
+        await api._release_connection()
+        await api._client_connect()
+        await asyncio.sleep(0.1)
+
+        mock_client.disconnect.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_refresh_data_parses_response(self, api: PyHatchBabyRestAsync):
         """Test refresh_data correctly parses device response."""
@@ -133,6 +203,52 @@ class TestPyHatchBabyRestAsync:
         assert api.volume == 100
         assert api.power is True
 
+    @pytest.mark.asyncio
+    async def test_refresh_data_concurrent_callers_share_read(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test concurrent refresh_data calls join one in-flight read."""
+        release = asyncio.Event()
+
+        async def slow_read(budget):
+            await release.wait()
+
+        with patch.object(api, "_refresh_data", side_effect=slow_read) as mock_refresh:
+            callers = [asyncio.create_task(api.refresh_data()) for _ in range(3)]
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(*callers)
+
+        mock_refresh.assert_called_once()
+        assert api._refresh_task is None
+
+    @pytest.mark.asyncio
+    async def test_refresh_data_reuses_fresh_frame(self, api: PyHatchBabyRestAsync):
+        """Test a recent frame is reused within max_age."""
+        api._last_read = monotonic()
+        api._last_read_generation = api._write_generation
+
+        with patch.object(api, "_refresh_data", new_callable=AsyncMock) as mock_read:
+            await api.refresh_data(max_age=5)
+            mock_read.assert_not_called()
+
+            await api.refresh_data()
+            mock_read.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_refresh_data_write_invalidates_fresh_frame(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test a frame read before a write is not reused."""
+        api._last_read = monotonic()
+        api._last_read_generation = api._write_generation
+        api._write_generation += 1
+
+        with patch.object(api, "_refresh_data", new_callable=AsyncMock) as mock_read:
+            await api.refresh_data(max_age=5)
+
+        mock_read.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_turn_power_on(self, api: PyHatchBabyRestAsync):
         """Test turn_power_on sends correct command."""
@@ -167,7 +283,7 @@ class TestPyHatchBabyRestAsync:
         api.brightness = 100
         with patch.object(api, "_send_command", new_callable=AsyncMock) as mock_send:
             await api.set_color(255, 128, 64)
-            mock_send.assert_called_once_with("SCff804064")
+            mock_send.assert_called_once_with("SCff804064", frozenset({"color"}))
 
     @pytest.mark.asyncio
     async def test_set_brightness(self, api: PyHatchBabyRestAsync):
@@ -175,7 +291,58 @@ class TestPyHatchBabyRestAsync:
         api.color = (255, 128, 64)
         with patch.object(api, "_send_command", new_callable=AsyncMock) as mock_send:
             await api.set_brightness(200)
-            mock_send.assert_called_once_with("SCff8040c8")  # 200 in hex = c8
+            mock_send.assert_called_once_with(
+                "SCff8040c8",  # 200 in hex = c8
+                frozenset({"brightness"}),
+            )
+
+    @pytest.mark.asyncio
+    async def test_apply_state_skips_unchanged_fields(self, api: PyHatchBabyRestAsync):
+        """Test apply_state only sends fields that differ from the cache."""
+        api.power = True
+        api.color = (255, 128, 64)
+        api.brightness = 100
+        api.sound = PyHatchBabyRestSound.ocean
+        api.volume = 50
+
+        with patch.object(api, "_send_commands", new_callable=AsyncMock) as mock_send:
+            await api.apply_state(
+                power=True,
+                brightness=200,
+                sound=PyHatchBabyRestSound.ocean,
+                volume=128,
+            )
+
+        mock_send.assert_called_once_with(
+            ["SCff8040c8", "SV80"], frozenset({"brightness"})
+        )
+
+    @pytest.mark.asyncio
+    async def test_apply_state_orders_power(self, api: PyHatchBabyRestAsync):
+        """Test power on is sent first and power off last."""
+        api.power = False
+        api.sound = PyHatchBabyRestSound.none
+
+        with patch.object(api, "_send_commands", new_callable=AsyncMock) as mock_send:
+            await api.apply_state(power=True, sound=PyHatchBabyRestSound.rain)
+            mock_send.assert_called_once()
+            assert mock_send.call_args.args[0] == ["SI01", "SN07"]
+
+            api.power = True
+            mock_send.reset_mock()
+            await api.apply_state(power=False, volume=0)
+            mock_send.assert_called_once()
+            assert mock_send.call_args.args[0] == ["SV00", "SI00"]
+
+    @pytest.mark.asyncio
+    async def test_apply_state_nothing_to_do(self, api: PyHatchBabyRestAsync):
+        """Test apply_state sends nothing when the state already matches."""
+        api.volume = 50
+
+        with patch.object(api, "_send_commands", new_callable=AsyncMock) as mock_send:
+            assert await api.apply_state(volume=50) is None
+
+        mock_send.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_send_command_writes_to_characteristic(
@@ -189,7 +356,8 @@ class TestPyHatchBabyRestAsync:
         with patch.object(api, "_client_connect", new_callable=AsyncMock):
             with patch.object(api, "refresh_data", new_callable=AsyncMock):
                 with patch("asyncio.sleep", new_callable=AsyncMock):
-                    await api._send_command("SI01")
+                    completed = await api._send_command("SI01")
+                    await completed
 
         mock_client.write_gatt_char.assert_called_once_with(
             char_specifier=CHAR_TX,
@@ -197,6 +365,476 @@ class TestPyHatchBabyRestAsync:
             response=True,
         )
 
+    @pytest.mark.asyncio
+    async def test_send_command_returns_once_accepted(self, api: PyHatchBabyRestAsync):
+        """Test _send_command returns after the write, before the read-back."""
+        api._client = AsyncMock()
+        release = asyncio.Event()
+        listener = MagicMock()
+        api.register_listener(listener)
+
+        async def slow_refresh(*_, **__):
+            await release.wait()
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", side_effect=slow_refresh),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            completed = await api._send_command("SN05")
+
+            assert not completed.done()
+            # cached state is updated as soon as the write is accepted
+            assert api.sound == PyHatchBabyRestSound.ocean
+            listener.assert_not_called()
+
+            release.set()
+            await completed
+
+        listener.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_write_timeout_counted(self, api: PyHatchBabyRestAsync):
+        """Test a hung write is cut off at its deadline and counted."""
+
+        async def hang(**kwargs):
+            await asyncio.Event().wait()
+
+        api._client = MagicMock()
+        api._client.write_gatt_char = AsyncMock(side_effect=hang)
+
+        assert await api._write_command("SI01", timeout=0.01) is False
+        assert api.timeouts["write"] == 1
+        assert api.power is None
+
+    @pytest.mark.asyncio
+    async def test_read_timeout_drops_connection(self, api: PyHatchBabyRestAsync):
+        """Test a hung read is counted, cleaned up and does not raise."""
+
+        async def hang(*args):
+            await asyncio.Event().wait()
+
+        client = MagicMock()
+        client.is_connected = True
+        client.read_gatt_char = AsyncMock(side_effect=hang)
+        client.disconnect = AsyncMock()
+        api._client = client
+
+        with patch("custom_components.hatch_rest.api.GATT_TIMEOUT", 0.01):
+            await api.refresh_data()
+
+        assert api.timeouts["read"] == 1
+        assert api._client is None
+        assert api._active_operations == 0
+        client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_connect_timeout_counted(self, api: PyHatchBabyRestAsync):
+        """Test a hung connect gives up at its deadline and can be retried."""
+
+        async def hang(*args, **kwargs):
+            await asyncio.Event().wait()
+
+        with patch(
+            "custom_components.hatch_rest.api.establish_connection",
+            side_effect=hang,
+        ):
+            await api._client_connect(timeout=0.01)
+
+        assert api._client is None
+        assert api._connecting is False
+        assert api.timeouts["connect"] == 1
+
+    @pytest.mark.asyncio
+    async def test_command_budget_exhausted(self, api: PyHatchBabyRestAsync):
+        """Test commands fail with TimeoutError once the budget runs out."""
+        client = MagicMock()
+        client.is_connected = True
+        client.disconnect = AsyncMock()
+        api._client = client
+
+        async def slow_write(**kwargs):
+            await asyncio.sleep(0.02)
+
+        client.write_gatt_char = AsyncMock(side_effect=slow_write)
+
+        with (
+            patch("custom_components.hatch_rest.api.COMMAND_BUDGET", 0.01),
+            pytest.raises(TimeoutError),
+        ):
+            await api._send_commands(["SI01", "SN05"])
+
+        assert api._active_operations == 0
+        assert api._client is None
+        client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_command_budget_exhausted_marks_failures_retrieved(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test failed completions nobody awaits are not logged as unretrieved."""
+        client = MagicMock()
+        client.is_connected = True
+        client.disconnect = AsyncMock()
+        api._client = client
+
+        async def slow_write(**kwargs):
+            await asyncio.sleep(0.02)
+
+        client.write_gatt_char = AsyncMock(side_effect=slow_write)
+
+        with patch("custom_components.hatch_rest.api.COMMAND_BUDGET", 0.01):
+            send = asyncio.create_task(api._send_commands(["SI01", "SN05"]))
+            await asyncio.sleep(0)
+            queued = list(api._command_queue)
+            with pytest.raises(TimeoutError):
+                await send
+            await api._command_worker
+
+        futures = [f for q in queued for f in (q.accepted, q.completed)]
+        assert all(f.done() for f in futures)
+        # asyncio logs "Future exception was never retrieved" for these
+        assert not any(f._log_traceback for f in futures)
+
+    @pytest.mark.asyncio
+    async def test_send_command_retries_failed_write(self, api: PyHatchBabyRestAsync):
+        """Test an idempotent write is retried after reconnecting."""
+        api._client = MagicMock()
+        api._client.is_connected = False
+        api._client.write_gatt_char = AsyncMock(
+            side_effect=[BleakConnectionError("Dropped"), None]
+        )
+
+        with (
+            patch.object(
+                api, "_client_connect", new_callable=AsyncMock
+            ) as mock_connect,
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await api._send_command("SI01")
+
+        assert api._client.write_gatt_char.call_count == 2
+        assert mock_connect.call_count == 2
+        assert api.metrics["write_retries"] == 1
+        assert api.power is True
+
+    @pytest.mark.asyncio
+    async def test_send_command_raises_after_retries(self, api: PyHatchBabyRestAsync):
+        """Test a write that keeps failing raises CommandError to the caller."""
+        api._client = AsyncMock()
+        api._client.write_gatt_char = AsyncMock(
+            side_effect=BleakConnectionError("Dropped")
+        )
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+            pytest.raises(CommandError),
+        ):
+            await api._send_command("SV40")
+
+        assert api._client.write_gatt_char.call_count == WRITE_ATTEMPTS
+        assert api.metrics["write_retries"] == WRITE_ATTEMPTS - 1
+        assert api.metrics["write_failures"] == 1
+        assert api.volume is None
+
+    @pytest.mark.asyncio
+    async def test_send_command_skips_redundant_write(self, api: PyHatchBabyRestAsync):
+        """Test writes matching freshly read state are skipped and counted."""
+        api._client = AsyncMock()
+        api.power = True
+        api.color = (255, 128, 64)
+        api.brightness = 100
+        api.sound = PyHatchBabyRestSound.ocean
+        api.volume = 64
+        api._last_read = monotonic()
+        api._last_read_generation = api._write_generation
+
+        for command in ("SI01", "SCff804064", "SN05", "SV40"):
+            completed = await api._send_command(command)
+            assert completed.done()
+
+        api._client.write_gatt_char.assert_not_called()
+        assert api.metrics["skipped_writes"] == 4
+
+    @pytest.mark.asyncio
+    async def test_send_command_writes_when_state_stale(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test a matching write is still sent once the read is too old."""
+        api._client = AsyncMock()
+        api.power = True
+        api.redundant_write_max_age = 60
+        api._last_read = monotonic() - 61
+        api._last_read_generation = api._write_generation
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await api._send_command("SI01")
+
+        api._client.write_gatt_char.assert_called_once()
+        assert api.metrics["skipped_writes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_send_commands_batch_window(self, api: PyHatchBabyRestAsync):
+        """Test commands within the batch window share one session."""
+        api._client = AsyncMock()
+        api.batch_window = 0.05
+        real_sleep = asyncio.sleep
+
+        async def sleep(delay):
+            if delay == api.batch_window:
+                await real_sleep(delay)
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock) as mock_refresh,
+            patch("asyncio.sleep", side_effect=sleep),
+        ):
+            light = asyncio.create_task(api._send_command("SCff000080"))
+            await real_sleep(0.01)
+            media = asyncio.create_task(api._send_command("SN05"))
+            light_again = asyncio.create_task(api._send_command("SC00ff0080"))
+            completions = await asyncio.gather(light, media, light_again)
+            await asyncio.gather(*completions)
+
+        written = [
+            call.kwargs["data"].decode()
+            for call in api._client.write_gatt_char.call_args_list
+        ]
+        # last write wins for the color; the first color command is dropped
+        assert written == ["SC00ff0080", "SN05"]
+        assert api.color == (0, 255, 0)
+        mock_refresh.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_drains_queue(self, api: PyHatchBabyRestAsync):
+        """Test shutdown waits for queued commands, then disconnects."""
+        client = AsyncMock()
+        api._client = client
+        api.register_listener(MagicMock())
+        real_sleep = asyncio.sleep
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            sending = asyncio.create_task(api._send_command("SI01"))
+            await real_sleep(0)
+            report = await api.async_shutdown()
+            await sending
+
+        assert report.drained == ["SI01"]
+        assert report.dropped == []
+        assert api._listeners == []
+        assert api._client is None
+        client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_drops_after_timeout(self, api: PyHatchBabyRestAsync):
+        """Test commands still queued at the deadline are dropped."""
+
+        async def hang(*args, **kwargs):
+            await asyncio.Event().wait()
+
+        with patch.object(api, "_client_connect", side_effect=hang):
+            sending = asyncio.create_task(api._send_commands(["SI01", "SN05"]))
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            report = await api.async_shutdown(timeout=0.01)
+
+            with pytest.raises(CommandError, match="dropped on shutdown"):
+                await sending
+
+        assert report.dropped == ["SI01", "SN05"]
+        assert api._command_queue == deque()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_cancelling_read_releases_client(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test a read cancelled by shutdown leaves the client reusable."""
+        client = AsyncMock()
+        client.is_connected = True
+        read_started = asyncio.Event()
+
+        async def hang(*args, **kwargs):
+            read_started.set()
+            await asyncio.Event().wait()
+
+        client.read_gatt_char.side_effect = hang
+        api._client = client
+
+        with patch.object(api, "_client_connect", new_callable=AsyncMock):
+            refreshing = asyncio.create_task(api.refresh_data())
+            await read_started.wait()
+            await api.async_shutdown()
+            with pytest.raises(asyncio.CancelledError):
+                await refreshing
+
+            assert api._active_operations == 0
+
+            api._closing = False
+            api._client = client
+            client.disconnect.reset_mock()
+            client.read_gatt_char.side_effect = None
+            client.read_gatt_char.return_value = bytearray(15)
+            await api.refresh_data()
+
+        client.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_refuses_new_commands(self, api: PyHatchBabyRestAsync):
+        """Test commands sent while shutting down are refused."""
+        api._closing = True
+
+        with pytest.raises(CommandError):
+            await api._send_command("SI01")
+
+    @pytest.mark.asyncio
+    async def test_send_command_wait_for_confirmation(self, mock_ble_device: BLEDevice):
+        """Test _send_command waits for the read-back when configured to."""
+        api = PyHatchBabyRestAsync(mock_ble_device, wait_for_confirmation=True)
+        api._client = AsyncMock()
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            completed = await api._send_command("SI01")
+
+        assert completed.done()
+        assert api.power is True
+
+    @pytest.mark.asyncio
+    async def test_send_command_burst_shares_read_back(self, api: PyHatchBabyRestAsync):
+        """Test commands queued together settle and read back once."""
+        api._client = AsyncMock()
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock) as mock_refresh,
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            completions = await asyncio.gather(
+                api._send_command("SI01"),
+                api._send_command("SCff8040c8"),
+                api._send_command("SV80"),
+            )
+            await asyncio.gather(*completions)
+
+        assert api._client.write_gatt_char.call_count == 3
+        mock_refresh.assert_called_once()
+        assert api.color == (255, 128, 64)
+        assert api.brightness == 200
+        assert api.volume == 128
+
+    @pytest.mark.asyncio
+    async def test_send_command_settles_for_settle_time(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test the read-back waits the configured settle time."""
+        api._client = AsyncMock()
+        api.settle_time = 0.25
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep,
+        ):
+            await (await api._send_command("SI01"))
+
+        assert mock_sleep.call_args_list[-1].args == (0.25,)
+
+    @pytest.mark.asyncio
+    async def test_traced_command_records_spans(self, api: PyHatchBabyRestAsync):
+        """Test a sampled call's command is traced through write and read-back."""
+        api._client = AsyncMock()
+        api._client.read_gatt_char.return_value = bytearray(
+            [0, 0, 0, 0, 0, 0x43, 0xFF, 0x80, 0x40, 0x64, 0x53, 5, 0x64, 0x50, 0]
+        )
+        api.tracer.sample_rate = 1
+
+        async def call():
+            api.tracer.begin("ctx")
+            await (await api._send_command("SI01"))
+            await api._command_worker
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await asyncio.create_task(call())
+
+        (trace,) = api.tracer.traces
+        # spans are recorded as they end; the whole burst ends last
+        assert [(span.name, span.detail) for span in trace.spans] == [
+            ("queue", "SI01"),
+            ("write", "SI01"),
+            ("settle", None),
+            ("read", None),
+            ("decode", "000000000043ff8040645305645000"),
+            ("refresh", None),
+            ("callbacks", None),
+            ("commands", None),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_untraced_command_records_nothing(self, api: PyHatchBabyRestAsync):
+        """Test commands outside a sampled call leave no trace."""
+        api._client = AsyncMock()
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch.object(api, "refresh_data", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await (await api._send_command("SI01"))
+
+        assert not api.tracer.traces
+
+    @pytest.mark.asyncio
+    async def test_stream_commands_holds_one_connection(
+        self, api: PyHatchBabyRestAsync
+    ):
+        """Test streamed commands share one connection and one read-back."""
+        api._client = AsyncMock()
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock) as connect,
+            patch.object(api, "refresh_data", new_callable=AsyncMock) as refresh,
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await api.stream_commands(
+                [(0.0, "SC00000001"), (0.0, "SC00000002"), (0.0, "SC00000003")]
+            )
+
+        connect.assert_called_once()
+        refresh.assert_called_once()
+        # every step was already due, so only the last one is written
+        api._client.write_gatt_char.assert_called_once_with(
+            char_specifier=CHAR_TX,
+            data=bytearray("SC00000003", "utf-8"),
+            response=True,
+        )
+        assert api.brightness == 3
+        assert api._active_operations == 0
+
+    def test_command_interval_floor(self, api: PyHatchBabyRestAsync):
+        """Test streamed writes are never paced faster than the floor."""
+        api._write_latency = 0.0
+        assert api.command_interval == pytest.approx(0.1)
+
+        api._write_latency = 0.3
+        assert api.command_interval == pytest.approx(0.3)
+
     def test_active_operations_tracking(self, api: PyHatchBabyRestAsync):
         """Test active operations counter."""
         assert api._active_operations == 0
@@ -206,3 +844,169 @@ class TestPyHatchBabyRestAsync:
         assert api._active_operations == 2
         api._set_active_operations(-1)
         assert api._active_operations == 1
+
+
+class TestVirtualTime:
+    """Latency of the real protocol paths, in virtual time."""
+
+    ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+    @pytest.fixture
+    def clock(self) -> VirtualClock:
+        """Create a virtual clock."""
+        return VirtualClock()
+
+    @pytest.fixture
+    def adapter(self, clock: VirtualClock):
+        """Create a simulated adapter with one device, on the virtual clock."""
+        adapter = SimulatedAdapter(connect_latency=0.5, gatt_latency=0.1, clock=clock)
+        adapter.add_device(self.ADDRESS)
+        with patch(
+            "custom_components.hatch_rest.api.establish_connection",
+            adapter.establish_connection,
+        ):
+            yield adapter
+
+    @pytest.fixture
+    def api(
+        self, clock: VirtualClock, adapter: SimulatedAdapter
+    ) -> PyHatchBabyRestAsync:
+        """Create an API instance for the simulated device."""
+        return PyHatchBabyRestAsync(
+            adapter.devices[self.ADDRESS].ble_device, clock=clock
+        )
+
+    @pytest.mark.asyncio
+    async def test_command_latency(
+        self, api: PyHatchBabyRestAsync, clock: VirtualClock
+    ):
+        """Test a command is accepted, then confirmed, on its exact timeline."""
+        completed = await clock.run(api.set_volume(50))
+        # batch window, connect, write
+        assert clock.time() == pytest.approx(BATCH_WINDOW + 0.5 + 0.1)
+
+        await clock.run(completed)
+        # settle, then a read over the same connection
+        assert clock.time() == pytest.approx(
+            BATCH_WINDOW + 0.5 + 0.1 + SETTLE_TIME + 0.1
+        )
+        assert api.volume == 50
+        assert not api.is_connected
+
+    @pytest.mark.asyncio
+    async def test_stream_reconnects_after_link_drop(
+        self,
+        api: PyHatchBabyRestAsync,
+        adapter: SimulatedAdapter,
+        clock: VirtualClock,
+    ):
+        """Test a stream reconnects and carries on when the link drops."""
+        device = adapter.devices[self.ADDRESS]
+        streaming = asyncio.ensure_future(
+            api.stream_commands([(0, "SC00000001"), (5, "SC00000002")])
+        )
+        await clock.advance(1)
+        assert device.brightness == 1
+        await next(iter(adapter.connections)).disconnect()
+
+        await clock.run(streaming)
+
+        assert device.brightness == 2
+        assert adapter.connect_attempts == 2
+        assert api._active_operations == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_ends_when_device_unreachable(
+        self,
+        api: PyHatchBabyRestAsync,
+        adapter: SimulatedAdapter,
+        clock: VirtualClock,
+    ):
+        """Test a stream ends with an error once it cannot reconnect."""
+        device = adapter.devices[self.ADDRESS]
+        streaming = asyncio.ensure_future(
+            api.stream_commands([(0, "SC00000001"), (5, "SC00000002")])
+        )
+        await clock.advance(1)
+        adapter.slots = 0
+        await next(iter(adapter.connections)).disconnect()
+
+        with pytest.raises(CommandError):
+            await clock.run(streaming)
+
+        assert device.brightness == 1
+        assert api._active_operations == 0
+        assert api._client is None
+
+    @pytest.mark.asyncio
+    async def test_stream_stops_on_shutdown(
+        self,
+        api: PyHatchBabyRestAsync,
+        adapter: SimulatedAdapter,
+        clock: VirtualClock,
+    ):
+        """Test a stream stops writing once the client shuts down."""
+        device = adapter.devices[self.ADDRESS]
+        streaming = asyncio.ensure_future(
+            api.stream_commands([(0, "SC00000001"), (5, "SC00000002")])
+        )
+        await clock.advance(1)
+
+        await clock.run(api.async_shutdown())
+        await clock.run(streaming)
+
+        assert device.writes == 1
+        assert not adapter.connections
+        with pytest.raises(CommandError):
+            api._closing = True
+            await api.stream_commands([(0, "SC00000003")])
+
+    @pytest.mark.asyncio
+    async def test_batched_color_and_brightness_both_kept(
+        self,
+        api: PyHatchBabyRestAsync,
+        adapter: SimulatedAdapter,
+        clock: VirtualClock,
+    ):
+        """Test a color and a brightness set by different callers both apply."""
+        device = adapter.devices[self.ADDRESS]
+        await clock.run(api.refresh_data())
+
+        # e.g. apply_state from the switch and a light brightness change
+        completions = await clock.run(
+            asyncio.gather(api.apply_state(color=(1, 2, 3)), api.set_brightness(50))
+        )
+        await clock.run(asyncio.gather(*completions))
+
+        assert device.writes == 1
+        assert (device.color, device.brightness) == ((1, 2, 3), 50)
+        assert (api.color, api.brightness) == ((1, 2, 3), 50)
+
+    @pytest.mark.asyncio
+    async def test_idle_timeout(self, api: PyHatchBabyRestAsync, clock: VirtualClock):
+        """Test an idle connection closes exactly idle_timeout after a read."""
+        api.idle_timeout = 30
+
+        await clock.run(api.refresh_data())
+        assert api.is_connected
+
+        await clock.advance(29.9)
+        assert api.is_connected
+        await clock.advance(0.2)
+        assert not api.is_connected
+
+    @pytest.mark.asyncio
+    async def test_connect_timeout(
+        self,
+        api: PyHatchBabyRestAsync,
+        clock: VirtualClock,
+        adapter: SimulatedAdapter,
+    ):
+        """Test a connect that hangs is abandoned at CONNECT_TIMEOUT."""
+        adapter.connect_latency = 3600
+
+        await clock.run(api.refresh_data())
+
+        assert clock.time() == pytest.approx(CONNECT_TIMEOUT)
+        assert api.timeouts["connect"] == 1
+        assert api.power is None
@@ -0,0 +1,168 @@
+"""Microbenchmarks of the per-update work done for every device.
+
+Each benchmark times one operation (decoding a feedback frame, encoding a
+command, building coordinator data, calculating an entity's state as Home
+Assistant does on a state write) and reports nanoseconds per operation.
+
+Results are compared against the newest baseline stored in
+tests/benchmarks/ for this or an earlier integration version. Set
+HATCH_REST_BENCHMARK_SAVE=1 to store this version's results as its
+baseline, and HATCH_REST_BENCHMARK_TOLERANCE (e.g. 1.5) to fail when an
+operation got slower than the baseline by more than that factor.
+"""
+
+from collections.abc import Callable, Coroutine
+import json
+import os
+from pathlib import Path
+import platform
+import timeit
+from typing import Any
+
+from awesomeversion import AwesomeVersion
+from bleak.backends.device import BLEDevice
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.hatch_rest.api import PyHatchBabyRestAsync, _decode_feedback
+from custom_components.hatch_rest.const import PyHatchBabyRestSound
+from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
+from custom_components.hatch_rest.light import HatchBabyRestLight
+from custom_components.hatch_rest.media_player import HatchBabyRestMediaPlayer
+from custom_components.hatch_rest.switch import HatchBabyRestSwitch
+
+BASELINES = Path(__file__).parent / "benchmarks"
+MANIFEST = Path(__file__).parents[1] / "custom_components/hatch_rest/manifest.json"
+NUMBER = int(os.environ.get("HATCH_REST_BENCHMARK_NUMBER", "2000"))
+REPEAT = 5
+TOLERANCE = float(os.environ.get("HATCH_REST_BENCHMARK_TOLERANCE", "0"))
+
+FRAME = bytes([0, 0, 0, 0, 0, 0x43, 255, 128, 64, 200, 0x53, 3, 100, 0x50, 0])
+
+
+def _run(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine that completes without suspending."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise AssertionError("benchmarked coroutine suspended")
+
+
+def _measure(operation: Callable[[], Any]) -> float:
+    """Return the best time of an operation over REPEAT runs, in ns."""
+    best = min(timeit.repeat(operation, number=NUMBER, repeat=REPEAT))
+    return best / NUMBER * 1e9
+
+
+def _version() -> str:
+    return json.loads(MANIFEST.read_text())["version"]
+
+
+def _baseline(version: str) -> dict[str, Any] | None:
+    """Return the stored results of the newest version up to version."""
+    stored = sorted(
+        (
+            path
+            for path in BASELINES.glob("*.json")
+            if AwesomeVersion(path.stem) <= version
+        ),
+        key=lambda path: AwesomeVersion(path.stem),
+    )
+    return json.loads(stored[-1].read_text()) if stored else None
+
+
+@pytest.fixture
+def device() -> PyHatchBabyRestAsync:
+    """Create a device client with a known state and no transport."""
+    device = PyHatchBabyRestAsync(BLEDevice("AA:BB:CC:DD:EE:FF", "Hatch Rest", None))
+    device.color, device.brightness, *_ = _decode_feedback(FRAME)
+    device.sound = PyHatchBabyRestSound.ocean
+    device.volume = 100
+    device.power = True
+
+    async def _send_commands(commands: list[str], *args: Any) -> None:
+        return None
+
+    device._send_commands = _send_commands  # type: ignore[method-assign]
+    return device
+
+
+@pytest.fixture
+def coordinator(
+    hass: HomeAssistant, device: PyHatchBabyRestAsync
+) -> HatchBabyRestUpdateCoordinator:
+    """Create a coordinator publishing the device's state."""
+    coordinator = HatchBabyRestUpdateCoordinator(hass, "aabbccddeeff", device)
+    coordinator.data = coordinator.get_current_data()
+    return coordinator
+
+
+@pytest.fixture
+def benchmarks(
+    device: PyHatchBabyRestAsync, coordinator: HatchBabyRestUpdateCoordinator
+) -> dict[str, Callable[[], Any]]:
+    """Return the benchmarked operations by name."""
+    light = HatchBabyRestLight(coordinator)
+    media_player = HatchBabyRestMediaPlayer(coordinator)
+    switch = HatchBabyRestSwitch(coordinator)
+    return {
+        "decode_feedback": lambda: _decode_feedback(FRAME),
+        "encode_power": lambda: _run(device.turn_power_on()),
+        "encode_sound": lambda: _run(device.set_sound(PyHatchBabyRestSound.rain)),
+        "encode_volume": lambda: _run(device.set_volume(128)),
+        "encode_color": lambda: _run(device.set_color(10, 20, 30)),
+        "encode_brightness": lambda: _run(device.set_brightness(64)),
+        "encode_apply_state": lambda: _run(
+            device.apply_state(color=(1, 2, 3), brightness=4, volume=5)
+        ),
+        "get_current_data": coordinator.get_current_data,
+        "light_state": light._async_calculate_state,
+        "media_player_state": media_player._async_calculate_state,
+        "switch_state": switch._async_calculate_state,
+    }
+
+
+def test_decode_feedback():
+    """Test the benchmarked frame decodes as the device reports it."""
+    assert _decode_feedback(FRAME) == (
+        (255, 128, 64),
+        200,
+        PyHatchBabyRestSound.noise,
+        100,
+        True,
+    )
+
+
+def test_benchmarks(benchmarks: dict[str, Callable[[], Any]], record_property) -> None:
+    """Time the per-update operations and compare them with the baseline."""
+    version = _version()
+    results = {name: _measure(operation) for name, operation in benchmarks.items()}
+    baseline = _baseline(version)
+
+    regressions = []
+    for name, ns in results.items():
+        record_property(name, round(ns))
+        if baseline and (before := baseline["results"].get(name)):
+            ratio = ns / before
+            record_property(f"{name}_ratio", round(ratio, 2))
+            if TOLERANCE and ratio > TOLERANCE:
+                regressions.append(f"{name} {ratio:.2f}x")
+
+    if os.environ.get("HATCH_REST_BENCHMARK_SAVE"):
+        BASELINES.mkdir(exist_ok=True)
+        (BASELINES / f"{version}.json").write_text(
+            json.dumps(
+                {
+                    "version": version,
+                    "python": platform.python_version(),
+                    "results": {name: round(ns, 1) for name, ns in results.items()},
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+
+    assert not regressions, (
+        f"Slower than {baseline and baseline['version']}: {regressions}"
+    )
@@ -0,0 +1,94 @@
+"""Tests for Hatch Rest clocks."""
+
+import asyncio
+
+import pytest
+
+from custom_components.hatch_rest.clock import Clock
+
+from .simulation import VirtualClock
+
+
+class TestClock:
+    """Tests for the system Clock."""
+
+    @pytest.mark.asyncio
+    async def test_sleep_and_timers(self):
+        """Test the clock sleeps and fires timers on the event loop."""
+        clock = Clock()
+        fired = asyncio.Event()
+        start = clock.time()
+
+        clock.call_later(0.01, fired.set)
+        await clock.sleep(0.02)
+
+        assert fired.is_set()
+        assert clock.time() - start >= 0.02
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Test the clock's timeout raises TimeoutError."""
+        with pytest.raises(TimeoutError):
+            async with Clock().timeout(0.01):
+                await asyncio.sleep(1)
+
+
+class TestVirtualClock:
+    """Tests for VirtualClock."""
+
+    @pytest.mark.asyncio
+    async def test_run_sleeps_in_virtual_time(self):
+        """Test sleeps resolve in order at their virtual times."""
+        clock = VirtualClock()
+        woken: list[tuple[str, float]] = []
+
+        async def _sleeper(name: str, delay: float) -> None:
+            await clock.sleep(delay)
+            woken.append((name, clock.time()))
+
+        await clock.run(asyncio.gather(_sleeper("slow", 3600), _sleeper("fast", 1.5)))
+
+        assert woken == [("fast", 1.5), ("slow", 3600)]
+
+    @pytest.mark.asyncio
+    async def test_advance_fires_due_timers(self):
+        """Test advance fires due timers only, and skips cancelled ones."""
+        clock = VirtualClock()
+        fired: list[str] = []
+        clock.call_later(1, fired.append, "one")
+        clock.call_later(2, fired.append, "cancelled").cancel()
+        clock.call_later(5, fired.append, "five")
+
+        await clock.advance(2)
+        assert fired == ["one"]
+        assert clock.time() == 2
+
+        await clock.advance(3)
+        assert fired == ["one", "five"]
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Test timeouts expire in virtual time."""
+        clock = VirtualClock()
+
+        async def _slow() -> None:
+            async with clock.timeout(10):
+                await clock.sleep(60)
+
+        with pytest.raises(TimeoutError):
+            await clock.run(_slow())
+        assert clock.time() == 10
+
+    @pytest.mark.asyncio
+    async def test_timeout_not_reached(self):
+        """Test a block finishing in time leaves no timer behind."""
+        clock = VirtualClock()
+
+        async def _fast() -> str:
+            async with clock.timeout(10):
+                await clock.sleep(1)
+            return "done"
+
+        assert await clock.run(_fast()) == "done"
+        await clock.advance(60)
+        assert clock.time() == 61
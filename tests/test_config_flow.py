@@ -13,7 +13,23 @@ from custom_components.hatch_rest.config_flow import (
     format_unique_id,
     short_address,
 )
-from custom_components.hatch_rest.const import DOMAIN
+from custom_components.hatch_rest.const import (
+    BATCH_WINDOW,
+    CONF_BATCH_WINDOW,
+    CONF_IDLE_TIMEOUT,
+    CONF_POLL_INTERVAL,
+    CONF_SETTLE_TIME,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_WRITE_MODE,
+    DOMAIN,
+    IDLE_TIMEOUT,
+    MANUFACTURER_ID,
+    POLL_INTERVAL,
+    SETTLE_TIME,
+    TRACE_SAMPLE_RATE,
+    WRITE_MODE_ACCEPTED,
+    WRITE_MODE_CONFIRMED,
+)
 
 
 class TestHelperFunctions:
@@ -47,23 +63,11 @@ class TestHatchBabyRestConfigFlow:
         self, hass: HomeAssistant, mock_service_info, mock_setup_entry
     ):
         """Test Bluetooth discovery initiates config flow."""
-        mock_api = MagicMock()
-        mock_api.name = "Hatch Rest"
-        mock_api.refresh_data = AsyncMock()
-
-        with patch(
-            "custom_components.hatch_rest.config_flow.async_ble_device_from_address",
-            return_value=MagicMock(),
-        ):
-            with patch(
-                "custom_components.hatch_rest.config_flow.PyHatchBabyRestAsync",
-                return_value=mock_api,
-            ):
-                result = await hass.config_entries.flow.async_init(
-                    DOMAIN,
-                    context={"source": config_entries.SOURCE_BLUETOOTH},
-                    data=mock_service_info,
-                )
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_BLUETOOTH},
+            data=mock_service_info,
+        )
 
         assert result["type"] == FlowResultType.FORM
         assert result["step_id"] == "bluetooth_confirm"
@@ -73,75 +77,37 @@ class TestHatchBabyRestConfigFlow:
         self, hass: HomeAssistant, mock_service_info, mock_setup_entry
     ):
         """Test Bluetooth confirmation creates config entry."""
-        mock_api = MagicMock()
-        mock_api.name = "Hatch Rest"
-        mock_api.refresh_data = AsyncMock()
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_BLUETOOTH},
+            data=mock_service_info,
+        )
 
-        with patch(
-            "custom_components.hatch_rest.config_flow.async_ble_device_from_address",
-            return_value=MagicMock(),
-        ):
-            with patch(
-                "custom_components.hatch_rest.config_flow.PyHatchBabyRestAsync",
-                return_value=mock_api,
-            ):
-                result = await hass.config_entries.flow.async_init(
-                    DOMAIN,
-                    context={"source": config_entries.SOURCE_BLUETOOTH},
-                    data=mock_service_info,
-                )
-
-                result = await hass.config_entries.flow.async_configure(
-                    result["flow_id"],
-                    user_input={},
-                )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input={},
+        )
 
         assert result["type"] == FlowResultType.CREATE_ENTRY
         assert result["title"] == "Hatch Rest"
         assert result["data"][CONF_ADDRESS] == "AA:BB:CC:DD:EE:FF"
 
     @pytest.mark.asyncio
-    async def test_bluetooth_discovery_no_ble_device(
-        self, hass: HomeAssistant, mock_service_info
+    async def test_bluetooth_discovery_does_not_connect(
+        self, hass: HomeAssistant, mock_service_info, mock_setup_entry
     ):
-        """Test Bluetooth discovery aborts when BLE device not found."""
+        """Test Bluetooth discovery works from advertisement data alone."""
         with patch(
-            "custom_components.hatch_rest.config_flow.async_ble_device_from_address",
-            return_value=None,
-        ):
+            "custom_components.hatch_rest.api.PyHatchBabyRestAsync"
+        ) as mock_api_class:
             result = await hass.config_entries.flow.async_init(
                 DOMAIN,
                 context={"source": config_entries.SOURCE_BLUETOOTH},
                 data=mock_service_info,
             )
 
-        assert result["type"] == FlowResultType.ABORT
-        assert result["reason"] == "unknown"
-
-    @pytest.mark.asyncio
-    async def test_bluetooth_discovery_connection_error(
-        self, hass: HomeAssistant, mock_service_info
-    ):
-        """Test Bluetooth discovery aborts on connection error."""
-        mock_api = MagicMock()
-        mock_api.refresh_data = AsyncMock(side_effect=Exception("Connection failed"))
-
-        with patch(
-            "custom_components.hatch_rest.config_flow.async_ble_device_from_address",
-            return_value=MagicMock(),
-        ):
-            with patch(
-                "custom_components.hatch_rest.config_flow.PyHatchBabyRestAsync",
-                return_value=mock_api,
-            ):
-                result = await hass.config_entries.flow.async_init(
-                    DOMAIN,
-                    context={"source": config_entries.SOURCE_BLUETOOTH},
-                    data=mock_service_info,
-                )
-
-        assert result["type"] == FlowResultType.ABORT
-        assert result["reason"] == "unknown"
+        assert result["type"] == FlowResultType.FORM
+        mock_api_class.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_user_step_no_devices(self, hass: HomeAssistant):
@@ -163,30 +129,85 @@ class TestHatchBabyRestConfigFlow:
         self, hass: HomeAssistant, mock_service_info
     ):
         """Test user step shows form with discovered devices."""
-        mock_api = MagicMock()
-        mock_api.name = "Hatch Rest"
-        mock_api.refresh_data = AsyncMock()
-
         with patch(
             "custom_components.hatch_rest.config_flow.async_discovered_service_info",
             return_value=[mock_service_info],
         ):
-            with patch(
-                "custom_components.hatch_rest.config_flow.async_ble_device_from_address",
-                return_value=MagicMock(),
-            ):
-                with patch(
-                    "custom_components.hatch_rest.config_flow.PyHatchBabyRestAsync",
-                    return_value=mock_api,
-                ):
-                    result = await hass.config_entries.flow.async_init(
-                        DOMAIN,
-                        context={"source": config_entries.SOURCE_USER},
-                    )
+            result = await hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": config_entries.SOURCE_USER},
+            )
 
         assert result["type"] == FlowResultType.FORM
         assert result["step_id"] == "user"
 
+    @pytest.mark.asyncio
+    async def test_user_step_lists_devices_by_signal(
+        self, hass: HomeAssistant, mock_service_info, mock_setup_entry
+    ):
+        """Test user step lists every device, strongest first, and creates an entry."""
+        near = MagicMock(
+            address="11:22:33:44:55:66",
+            manufacturer_data={MANUFACTURER_ID: b"\x00"},
+            rssi=-40,
+        )
+        near.name = "Nursery"
+        unnamed = MagicMock(
+            address="66:55:44:33:22:11",
+            manufacturer_data={MANUFACTURER_ID: b"\x00"},
+            rssi=-90,
+        )
+        unnamed.name = "66:55:44:33:22:11"
+
+        with patch(
+            "custom_components.hatch_rest.config_flow.async_discovered_service_info",
+            return_value=[mock_service_info, unnamed, near],
+        ):
+            result = await hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": config_entries.SOURCE_USER},
+            )
+
+        options = result["data_schema"].schema[CONF_ADDRESS].container
+        assert list(options.items()) == [
+            ("11:22:33:44:55:66", "Nursery (5566)"),
+            ("AA:BB:CC:DD:EE:FF", "Hatch Rest (EEFF)"),
+            ("66:55:44:33:22:11", "Hatch Rest (2211)"),
+        ]
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input={CONF_ADDRESS: "11:22:33:44:55:66"},
+        )
+
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert result["title"] == "Nursery"
+        assert result["data"][CONF_ADDRESS] == "11:22:33:44:55:66"
+        assert result["result"].unique_id == "112233445566"
+
+    @pytest.mark.asyncio
+    async def test_user_step_skips_configured_devices(
+        self, hass: HomeAssistant, mock_service_info
+    ):
+        """Test user step omits devices that already have an entry."""
+        MockConfigEntry(
+            domain=DOMAIN,
+            unique_id=format_unique_id(mock_service_info.address),
+            data={CONF_ADDRESS: mock_service_info.address},
+        ).add_to_hass(hass)
+
+        with patch(
+            "custom_components.hatch_rest.config_flow.async_discovered_service_info",
+            return_value=[mock_service_info],
+        ):
+            result = await hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": config_entries.SOURCE_USER},
+            )
+
+        assert result["type"] == FlowResultType.ABORT
+        assert result["reason"] == "no_devices_found"
+
     @pytest.mark.asyncio
     async def test_already_configured(self, hass: HomeAssistant, mock_service_info):
         """Test flow aborts if the device is already configured."""
@@ -202,27 +223,42 @@ class TestHatchBabyRestConfigFlow:
         )
         existing_entry.add_to_hass(hass)
 
-        # Mock API + BLE
-        mock_api = MagicMock()
-        mock_api.name = "Hatch Rest"
-        mock_api.refresh_data = AsyncMock()
-
-        with (
-            patch(
-                "custom_components.hatch_rest.config_flow.async_ble_device_from_address",
-                return_value=MagicMock(),
-            ),
-            patch(
-                "custom_components.hatch_rest.config_flow.PyHatchBabyRestAsync",
-                return_value=mock_api,
-            ),
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_BLUETOOTH},
+            data=mock_service_info,
+        )
+
+        assert result["type"] == FlowResultType.ABORT
+        assert result["reason"] == "already_configured"
+
+    @pytest.mark.asyncio
+    async def test_legacy_short_address_entry_not_added_twice(
+        self, hass: HomeAssistant, mock_service_info
+    ):
+        """Test an entry with a legacy short-address unique ID is matched."""
+        MockConfigEntry(
+            domain=DOMAIN,
+            unique_id=short_address(mock_service_info.address),
+            data={CONF_ADDRESS: mock_service_info.address},
+        ).add_to_hass(hass)
+
+        with patch(
+            "custom_components.hatch_rest.config_flow.async_discovered_service_info",
+            return_value=[mock_service_info],
         ):
             result = await hass.config_entries.flow.async_init(
                 DOMAIN,
-                context={"source": config_entries.SOURCE_BLUETOOTH},
-                data=mock_service_info,
+                context={"source": config_entries.SOURCE_USER},
             )
+        assert result["type"] == FlowResultType.ABORT
+        assert result["reason"] == "no_devices_found"
 
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_BLUETOOTH},
+            data=mock_service_info,
+        )
         assert result["type"] == FlowResultType.ABORT
         assert result["reason"] == "already_configured"
 
@@ -247,3 +283,62 @@ class TestHatchBabyRestConfigFlow:
 
         assert result["type"] == FlowResultType.ABORT
         assert result["reason"] == "no_devices_found"
+
+
+class TestHatchBabyRestOptionsFlow:
+    """Tests for HatchBabyRestOptionsFlow."""
+
+    @pytest.mark.asyncio
+    async def test_options_flow_defaults(
+        self, hass: HomeAssistant, mock_config_entry: MockConfigEntry
+    ):
+        """Test the options form defaults to the built-in values."""
+        mock_config_entry.add_to_hass(hass)
+
+        result = await hass.config_entries.options.async_init(
+            mock_config_entry.entry_id
+        )
+
+        assert result["type"] == FlowResultType.FORM
+        assert result["step_id"] == "init"
+        defaults = {key.schema: key.default() for key in result["data_schema"].schema}
+        assert defaults == {
+            CONF_POLL_INTERVAL: POLL_INTERVAL,
+            CONF_IDLE_TIMEOUT: IDLE_TIMEOUT,
+            CONF_WRITE_MODE: WRITE_MODE_ACCEPTED,
+            CONF_SETTLE_TIME: SETTLE_TIME,
+            CONF_BATCH_WINDOW: BATCH_WINDOW,
+            CONF_TRACE_SAMPLE_RATE: TRACE_SAMPLE_RATE,
+        }
+
+    @pytest.mark.asyncio
+    async def test_options_flow_saves_options(
+        self, hass: HomeAssistant, mock_config_entry: MockConfigEntry
+    ):
+        """Test submitted options are stored on the entry."""
+        mock_config_entry.add_to_hass(hass)
+        result = await hass.config_entries.options.async_init(
+            mock_config_entry.entry_id
+        )
+
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            user_input={
+                CONF_POLL_INTERVAL: 300,
+                CONF_IDLE_TIMEOUT: 30,
+                CONF_WRITE_MODE: WRITE_MODE_CONFIRMED,
+                CONF_SETTLE_TIME: 0.5,
+                CONF_BATCH_WINDOW: 0.1,
+                CONF_TRACE_SAMPLE_RATE: 0.25,
+            },
+        )
+
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert mock_config_entry.options == {
+            CONF_POLL_INTERVAL: 300,
+            CONF_IDLE_TIMEOUT: 30.0,
+            CONF_WRITE_MODE: WRITE_MODE_CONFIRMED,
+            CONF_SETTLE_TIME: 0.5,
+            CONF_BATCH_WINDOW: 0.1,
+            CONF_TRACE_SAMPLE_RATE: 0.25,
+        }
@@ -1,17 +1,79 @@
 """Tests for Hatch Rest coordinator."""
 
+import contextvars
 from datetime import timedelta
-from unittest.mock import AsyncMock
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from homeassistant.core import HomeAssistant
+from homeassistant.components.media_player import MediaPlayerState
+from homeassistant.core import Context, HomeAssistant
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.hatch_rest.const import DOMAIN, PyHatchBabyRestSound
+from custom_components.hatch_rest.api import PyHatchBabyRestAsync, ShutdownReport
+from custom_components.hatch_rest.const import (
+    BATCH_WINDOW,
+    CONF_BATCH_WINDOW,
+    CONF_IDLE_TIMEOUT,
+    CONF_POLL_INTERVAL,
+    CONF_SETTLE_TIME,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_WRITE_MODE,
+    DOMAIN,
+    IDLE_TIMEOUT,
+    POLL_INTERVAL,
+    SETTLE_TIME,
+    TRACE_SAMPLE_RATE,
+    WRITE_MODE_CONFIRMED,
+    PyHatchBabyRestSound,
+)
 from custom_components.hatch_rest.coordinator import (
     HatchBabyRestEntity,
     HatchBabyRestUpdateCoordinator,
+    HatchRestSnapshot,
+    PollPhases,
+    state_store,
 )
+from custom_components.hatch_rest.tracing import current_traces
+
+from .simulation import SimulatedAdapter, VirtualClock
+
+
+class TestHatchRestSnapshot:
+    """Tests for HatchRestSnapshot."""
+
+    def test_from_data(self):
+        """Test snapshot derives entity-facing attributes."""
+        snapshot = HatchRestSnapshot.from_data(
+            {
+                "brightness": 128,
+                "color": (255, 128, 64),
+                "power": True,
+                "sound": PyHatchBabyRestSound.ocean,
+                "volume": 51,
+            }
+        )
+
+        assert snapshot.brightness == 128
+        assert snapshot.rgb_color == (255, 128, 64)
+        assert snapshot.light_is_on is True
+        assert snapshot.source == "Ocean"
+        assert snapshot.media_state == MediaPlayerState.PLAYING
+        assert snapshot.volume_level == pytest.approx(0.2)
+
+    def test_from_data_empty(self):
+        """Test snapshot of missing data."""
+        snapshot = HatchRestSnapshot.from_data(None)
+
+        assert snapshot.power is None
+        assert snapshot.light_is_on is False
+        assert snapshot.source is None
+        assert snapshot.volume_level is None
 
 
 class TestHatchBabyRestUpdateCoordinator:
@@ -40,6 +102,19 @@ class TestHatchBabyRestUpdateCoordinator:
         assert data["sound"] == PyHatchBabyRestSound.ocean
         assert data["volume"] == 100
 
+    def test_snapshot_rebuilt_only_for_new_data(
+        self, mock_coordinator: HatchBabyRestUpdateCoordinator
+    ):
+        """Test snapshot is computed once per published data object."""
+        snapshot = mock_coordinator.snapshot
+
+        assert mock_coordinator.snapshot is snapshot
+
+        mock_coordinator.data = {**mock_coordinator.data, "brightness": 10}
+
+        assert mock_coordinator.snapshot is not snapshot
+        assert mock_coordinator.snapshot.brightness == 10
+
     @pytest.mark.asyncio
     async def test_async_update_data_success(
         self, hass: HomeAssistant, mock_hatch_api: AsyncMock
@@ -103,6 +178,288 @@ class TestHatchBabyRestUpdateCoordinator:
         with pytest.raises(UpdateFailed, match="Device update failed"):
             await coordinator._async_update_data()
 
+    @pytest.mark.asyncio
+    async def test_async_shutdown_releases_device_once(
+        self,
+        hass: HomeAssistant,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+        mock_hatch_api: AsyncMock,
+        caplog: pytest.LogCaptureFixture,
+    ):
+        """Test shutdown drains the device once and reports dropped commands."""
+        mock_hatch_api.async_shutdown.return_value = ShutdownReport([], ["SN05"])
+
+        await mock_coordinator.async_shutdown()
+        await mock_coordinator.async_shutdown()
+
+        mock_hatch_api.async_shutdown.assert_awaited_once()
+        assert "Dropped 1 queued command(s)" in caplog.text
+
+    def test_update_timed_on_event_loop(
+        self,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+        mock_hatch_api: AsyncMock,
+    ):
+        """Test coordinator updates are timed by the device's watchdog."""
+        mock_coordinator.async_set_updated_data(mock_coordinator.get_current_data())
+
+        assert mock_hatch_api.watchdog.stats["coordinator_update"].count == 1
+
+    def test_apply_options(
+        self,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+        mock_hatch_api: AsyncMock,
+    ):
+        """Test options reach the device and move a pending poll."""
+        mock_coordinator._unsub_refresh = MagicMock()
+
+        with patch.object(mock_coordinator, "_schedule_refresh") as mock_schedule:
+            mock_coordinator.async_apply_options(
+                {
+                    CONF_POLL_INTERVAL: 300,
+                    CONF_IDLE_TIMEOUT: 30.0,
+                    CONF_WRITE_MODE: WRITE_MODE_CONFIRMED,
+                    CONF_SETTLE_TIME: 0.5,
+                    CONF_BATCH_WINDOW: 0.1,
+                    CONF_TRACE_SAMPLE_RATE: 0.25,
+                }
+            )
+
+        assert mock_coordinator.update_interval == timedelta(seconds=300)
+        assert mock_hatch_api.wait_for_confirmation is True
+        assert mock_hatch_api.idle_timeout == 30.0
+        assert mock_hatch_api.settle_time == 0.5
+        assert mock_hatch_api.batch_window == 0.1
+        assert mock_hatch_api.tracer.sample_rate == 0.25
+        mock_schedule.assert_called_once()
+
+    def test_apply_empty_options(
+        self,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+        mock_hatch_api: AsyncMock,
+    ):
+        """Test missing options fall back to the defaults."""
+        mock_coordinator.async_apply_options({})
+
+        assert mock_coordinator.update_interval == timedelta(seconds=POLL_INTERVAL)
+        assert mock_hatch_api.wait_for_confirmation is False
+        assert mock_hatch_api.idle_timeout == IDLE_TIMEOUT
+        assert mock_hatch_api.settle_time == SETTLE_TIME
+        assert mock_hatch_api.batch_window == BATCH_WINDOW
+        assert mock_hatch_api.tracer.sample_rate == TRACE_SAMPLE_RATE
+
+
+class TestPollPhases:
+    """Tests for PollPhases and phased poll scheduling."""
+
+    def _coordinator(self, hass: HomeAssistant, mock_hatch_api: AsyncMock):
+        """Create a coordinator without a phase."""
+        return HatchBabyRestUpdateCoordinator(hass, "aabbccddeeff", mock_hatch_api)
+
+    def test_phases_spread_and_rebalance(
+        self, hass: HomeAssistant, mock_hatch_api: AsyncMock
+    ):
+        """Test phases are spread evenly and re-balanced on removal."""
+        phases = PollPhases()
+        coordinators = [self._coordinator(hass, mock_hatch_api) for _ in range(4)]
+        removers = [phases.async_register(c) for c in coordinators]
+
+        assert [c.poll_phase for c in coordinators] == [0, 0.25, 0.5, 0.75]
+
+        removers[1]()
+        assert coordinators[1].poll_phase is None
+        assert [c.poll_phase for c in coordinators if c.poll_phase is not None] == [
+            0,
+            pytest.approx(1 / 3),
+            pytest.approx(2 / 3),
+        ]
+
+    def test_schedule_refresh_on_phase(
+        self, hass: HomeAssistant, mock_hatch_api: AsyncMock
+    ):
+        """Test polls are scheduled on the coordinator's phase of the grid."""
+        coordinator = self._coordinator(hass, mock_hatch_api)
+        coordinator.poll_phase = 0.25
+
+        clock = mock_hatch_api.clock
+        with (
+            patch.object(clock, "time", return_value=1000.0),
+            patch.object(clock, "call_later") as mock_call_later,
+        ):
+            coordinator._schedule_refresh()
+
+        # grid points are 15, 75, ... mod 60; the first past 1030 is 1035
+        assert mock_call_later.call_args.args[0] == 35
+
+    @pytest.mark.asyncio
+    async def test_poll_task_tied_to_entry(
+        self,
+        hass: HomeAssistant,
+        mock_hatch_api: AsyncMock,
+        mock_config_entry: MockConfigEntry,
+    ):
+        """Test a due poll runs as a background task of the config entry."""
+        mock_config_entry.add_to_hass(hass)
+        coordinator = self._coordinator(hass, mock_hatch_api)
+        coordinator.config_entry = mock_config_entry
+
+        with patch.object(
+            mock_config_entry, "async_create_background_task"
+        ) as mock_create_task:
+            coordinator._async_handle_poll_due()
+
+        mock_create_task.assert_called_once()
+        assert mock_create_task.call_args.kwargs == {"eager_start": True}
+        mock_create_task.call_args.args[1].close()
+
+    @pytest.mark.asyncio
+    async def test_polls_run_in_virtual_time(self, hass: HomeAssistant):
+        """Test scheduled polls read the device on the virtual clock."""
+        clock = VirtualClock(start=1000)
+        adapter = SimulatedAdapter(clock=clock)
+        device = adapter.add_device("AA:BB:CC:DD:EE:FF")
+        coordinator = HatchBabyRestUpdateCoordinator(
+            hass,
+            "aabbccddeeff",
+            PyHatchBabyRestAsync(device.ble_device, clock=clock),
+        )
+        coordinator.poll_phase = 0.25
+
+        with patch(
+            "custom_components.hatch_rest.api.establish_connection",
+            adapter.establish_connection,
+        ):
+            # the first listener schedules polling
+            unsub = coordinator.async_add_listener(lambda: None)
+            await clock.advance(34)
+            assert device.reads == 0
+
+            # due at 1035; the read takes the connect and GATT latency
+            await clock.advance(2)
+            assert device.reads == 1
+            assert coordinator.data["volume"] == device.volume
+
+            await clock.advance(POLL_INTERVAL)
+            assert device.reads == 2
+
+        unsub()
+        await coordinator.async_shutdown()
+
+
+class TestStoredState:
+    """Tests for restoring and storing the last known state."""
+
+    @pytest.mark.asyncio
+    async def test_restore(
+        self,
+        hass: HomeAssistant,
+        hass_storage: dict[str, Any],
+        mock_hatch_api: AsyncMock,
+    ):
+        """Test a stored state seeds the device and is marked stale."""
+        hass_storage[f"{DOMAIN}.entry"] = {
+            "version": 1,
+            "key": f"{DOMAIN}.entry",
+            "data": {
+                "power": True,
+                "brightness": 40,
+                "color": [10, 20, 30],
+                "sound": 7,
+                "volume": 60,
+            },
+        }
+        mock_hatch_api.power = None
+        coordinator = HatchBabyRestUpdateCoordinator(
+            hass, "aabbccddeeff", mock_hatch_api, state_store(hass, "entry")
+        )
+
+        assert await coordinator.async_restore()
+
+        assert coordinator.stale
+        assert mock_hatch_api.color == (10, 20, 30)
+        assert mock_hatch_api.sound is PyHatchBabyRestSound.rain
+        assert coordinator.data["brightness"] == 40
+        mock_hatch_api.refresh_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_restore_without_stored_state(
+        self, hass: HomeAssistant, mock_hatch_api: AsyncMock
+    ):
+        """Test nothing is restored without a stored state."""
+        mock_hatch_api.power = None
+        coordinator = HatchBabyRestUpdateCoordinator(
+            hass, "aabbccddeeff", mock_hatch_api, state_store(hass, "entry")
+        )
+
+        assert not await coordinator.async_restore()
+        assert not coordinator.stale
+
+    @pytest.mark.asyncio
+    async def test_restore_skipped_for_live_device(
+        self, hass: HomeAssistant, mock_hatch_api: AsyncMock
+    ):
+        """Test a device client that already holds state is not overwritten."""
+        coordinator = HatchBabyRestUpdateCoordinator(
+            hass, "aabbccddeeff", mock_hatch_api, state_store(hass, "entry")
+        )
+
+        assert not await coordinator.async_restore()
+        assert mock_hatch_api.brightness == 128
+
+    @pytest.mark.asyncio
+    async def test_refresh_clears_stale_and_stores(
+        self,
+        hass: HomeAssistant,
+        hass_storage: dict[str, Any],
+        mock_hatch_api: AsyncMock,
+    ):
+        """Test a live refresh clears the stale flag and stores the state."""
+        coordinator = HatchBabyRestUpdateCoordinator(
+            hass, "aabbccddeeff", mock_hatch_api, state_store(hass, "entry")
+        )
+        coordinator.stale = True
+
+        await coordinator._async_update_data()
+        assert not coordinator.stale
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+        await hass.async_block_till_done()
+
+        assert hass_storage[f"{DOMAIN}.entry"]["data"] == {
+            "power": True,
+            "brightness": 128,
+            "color": [255, 128, 64],
+            "sound": 5,
+            "volume": 100,
+        }
+
+    @pytest.mark.asyncio
+    async def test_refresh_without_read_keeps_stale(
+        self,
+        hass: HomeAssistant,
+        hass_storage: dict[str, Any],
+        mock_hatch_api: AsyncMock,
+    ):
+        """Test a refresh that read no frame keeps the restored data stale."""
+        coordinator = HatchBabyRestUpdateCoordinator(
+            hass, "aabbccddeeff", mock_hatch_api, state_store(hass, "entry")
+        )
+        coordinator.stale = True
+        # refresh_data logs and returns when the device cannot be reached
+        mock_hatch_api.refresh_data.side_effect = None
+
+        await coordinator._async_update_data()
+        coordinator._async_handle_device_update()
+        assert coordinator.stale
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+        await hass.async_block_till_done()
+        assert f"{DOMAIN}.entry" not in hass_storage
+
+        mock_hatch_api.last_read = 5.0
+        coordinator._async_handle_device_update()
+        assert not coordinator.stale
+
 
 class TestHatchBabyRestEntity:
     """Tests for HatchBabyRestEntity."""
@@ -125,6 +482,12 @@ class TestHatchBabyRestEntity:
         assert device_info["name"] == "Hatch Rest"
         assert ("hatch_rest", "aabbccddeeff") in device_info["identifiers"]
 
+    def test_device_info_cached(self, mock_coordinator: HatchBabyRestUpdateCoordinator):
+        """Test device_info is built once per entity."""
+        entity = HatchBabyRestEntity(mock_coordinator)
+
+        assert entity.device_info is entity.device_info
+
     def test_device_info_missing_address_raises(
         self, mock_coordinator: HatchBabyRestUpdateCoordinator
     ):
@@ -150,3 +513,27 @@ class TestHatchBabyRestEntity:
         entity = HatchBabyRestEntity(mock_coordinator)
 
         assert entity.device_name == "Hatch Rest"
+
+    def test_assumed_state(self, mock_coordinator: HatchBabyRestUpdateCoordinator):
+        """Test entities report assumed state while data is restored."""
+        entity = HatchBabyRestEntity(mock_coordinator)
+        assert entity.assumed_state is False
+
+        mock_coordinator.stale = True
+        assert entity.assumed_state is True
+
+    def test_set_context_starts_trace(
+        self, mock_coordinator: HatchBabyRestUpdateCoordinator
+    ):
+        """Test a sampled service call context starts a trace under its ID."""
+        entity = HatchBabyRestEntity(mock_coordinator)
+        tracer = mock_coordinator.hatch_rest_device.tracer
+        tracer.sample_rate = 1
+        context = Context()
+
+        traces = contextvars.copy_context().run(
+            lambda: (entity.async_set_context(context), current_traces())[1]
+        )
+
+        assert [trace.trace_id for trace in traces] == [context.id]
+        assert entity._context is context
@@ -0,0 +1,37 @@
+"""Tests for Hatch Rest diagnostics."""
+
+from collections import Counter
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hatch_rest.api import RouteStats
+from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
+from custom_components.hatch_rest.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+@pytest.mark.asyncio
+async def test_entry_diagnostics(
+    hass: HomeAssistant,
+    mock_config_entry: MockConfigEntry,
+    mock_coordinator: HatchBabyRestUpdateCoordinator,
+):
+    """Test diagnostics expose loop time and device counters, redacted."""
+    device = mock_coordinator.hatch_rest_device
+    device.timeouts = Counter(write=1)
+    device.metrics = Counter(write_retries=2)
+    device.route_stats = {"hci0": RouteStats(2, 1)}
+    device.watchdog._record("decode", 0.2)
+    mock_config_entry.runtime_data = mock_coordinator
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, mock_config_entry)
+
+    assert diagnostics["entry"]["data"]["address"] == "**REDACTED**"
+    assert diagnostics["state"] == mock_coordinator.data
+    assert diagnostics["event_loop"]["worst"] == [{"name": "decode", "duration": 0.2}]
+    assert diagnostics["timeouts"] == {"write": 1}
+    assert diagnostics["metrics"] == {"write_retries": 2}
+    assert diagnostics["route_stats"] == {"hci0": {"attempts": 2, "successes": 1}}
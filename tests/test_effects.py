@@ -0,0 +1,67 @@
+"""Tests for Hatch Rest light transitions and effects."""
+
+from itertools import islice
+
+from custom_components.hatch_rest.effects import (
+    color_command,
+    plan_transition,
+    slow_pulse_commands,
+    transition_commands,
+)
+
+
+class TestPlanTransition:
+    """Tests for plan_transition."""
+
+    def test_steps_limited_by_quantization(self):
+        """Test no more steps are planned than distinct 8-bit values."""
+        steps = plan_transition((0,), (4,), duration=10, min_interval=0.1)
+
+        assert [values for _, values in steps] == [(1,), (2,), (3,), (4,)]
+        assert steps[-1][0] == 10
+
+    def test_steps_limited_by_interval(self):
+        """Test steps are spaced at least min_interval apart."""
+        steps = plan_transition((0,), (255,), duration=1, min_interval=0.1)
+
+        assert len(steps) == 10
+        assert steps[-1] == (1, (255,))
+
+    def test_largest_channel_delta_drives_steps(self):
+        """Test the largest channel change determines the step count."""
+        steps = plan_transition((0, 0), (2, 100), duration=100, min_interval=0.1)
+
+        assert len(steps) == 100
+        assert steps[-1][1] == (2, 100)
+
+    def test_no_change(self):
+        """Test a transition to the current value is a single step."""
+        assert plan_transition((5, 5), (5, 5), 10, 0.1) == [(0.0, (5, 5))]
+
+    def test_zero_duration(self):
+        """Test a zero duration transition jumps to the end."""
+        assert plan_transition((0,), (200,), 0, 0.1) == [(0.0, (200,))]
+
+
+def test_color_command():
+    """Test color tuples encode as SC commands."""
+    assert color_command((255, 128, 64, 200)) == "SCff8040c8"
+
+
+def test_transition_commands():
+    """Test transitions are planned as timed SC commands."""
+    steps = transition_commands((0, 0, 0, 0), (0, 0, 0, 2), 1, 0.1)
+
+    assert steps == [(0.5, "SC00000001"), (1.0, "SC00000002")]
+
+
+def test_slow_pulse_commands():
+    """Test slow pulse alternates between brightness and the floor."""
+    steps = list(islice(slow_pulse_commands((255, 0, 0), 18, 4, 0.1), 4))
+
+    assert steps == [
+        (1.0, "SCff000011"),
+        (2.0, "SCff000010"),
+        (3.0, "SCff000011"),
+        (4.0, "SCff000012"),
+    ]
@@ -0,0 +1,179 @@
+"""Tests for Hatch Rest multi-device fan-out."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hatch_rest.clock import Clock
+from custom_components.hatch_rest.const import (
+    DOMAIN,
+    SERVICE_FAN_OUT,
+    PyHatchBabyRestSound,
+)
+from custom_components.hatch_rest.fanout import (
+    DATA_ADAPTER_SLOTS,
+    AdapterSlots,
+    async_fan_out,
+)
+from custom_components.hatch_rest.services import async_setup_services
+
+
+@pytest.fixture(autouse=True)
+def mock_last_service_info():
+    """Have no adapter heard the devices, without a Bluetooth manager."""
+    with patch(
+        "custom_components.hatch_rest.fanout.bluetooth.async_last_service_info",
+        return_value=None,
+    ) as mock:
+        yield mock
+
+
+def _coordinator(address: str, apply_state: AsyncMock) -> MagicMock:
+    """Create a coordinator around a device with the given apply_state."""
+    coordinator = MagicMock()
+    coordinator.hatch_rest_device.address = address
+    coordinator.hatch_rest_device.clock = Clock()
+    coordinator.hatch_rest_device.apply_state = apply_state
+    return coordinator
+
+
+class TestAdapterSlots:
+    """Tests for AdapterSlots."""
+
+    def test_semaphore_per_source(self):
+        """Test each adapter source gets its own semaphore."""
+        slots = AdapterSlots(slots=2)
+
+        assert slots.semaphore("hci0") is slots.semaphore("hci0")
+        assert slots.semaphore("hci0") is not slots.semaphore("proxy")
+
+
+class TestFanOut:
+    """Tests for async_fan_out."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_per_adapter(self, hass: HomeAssistant):
+        """Test no more than the slot count run at once on one adapter."""
+        active = peak = 0
+
+        async def _apply_state(**kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            active -= 1
+
+        coordinators = {
+            f"entry{i}": _coordinator(
+                f"AA:BB:CC:DD:EE:0{i}", AsyncMock(side_effect=_apply_state)
+            )
+            for i in range(5)
+        }
+        results = await async_fan_out(
+            hass, AdapterSlots(slots=2), coordinators, {"power": True}
+        )
+
+        assert peak == 2
+        assert all(result["success"] for result in results.values())
+        for coordinator in coordinators.values():
+            coordinator.hatch_rest_device.apply_state.assert_awaited_once_with(
+                power=True
+            )
+            coordinator.async_set_updated_data.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_awaits_completion(self, hass: HomeAssistant):
+        """Test the fan-out waits for each device's commands to complete."""
+        completed = hass.loop.create_future()
+        coordinator = _coordinator(
+            "AA:BB:CC:DD:EE:FF", AsyncMock(return_value=completed)
+        )
+        task = asyncio.create_task(
+            async_fan_out(hass, AdapterSlots(), {"entry": coordinator}, {})
+        )
+        await asyncio.sleep(0)
+        assert not task.done()
+
+        completed.set_result(None)
+        results = await task
+        assert results["entry"]["success"]
+
+    @pytest.mark.asyncio
+    async def test_failure_reported_per_device(self, hass: HomeAssistant):
+        """Test one failing device does not fail the others."""
+        good = _coordinator("AA:BB:CC:DD:EE:01", AsyncMock(return_value=None))
+        bad = _coordinator(
+            "AA:BB:CC:DD:EE:02", AsyncMock(side_effect=TimeoutError("gone"))
+        )
+
+        results = await async_fan_out(
+            hass, AdapterSlots(), {"good": good, "bad": bad}, {"power": False}
+        )
+
+        assert results["good"]["success"]
+        assert results["good"]["error"] is None
+        assert not results["bad"]["success"]
+        assert "gone" in results["bad"]["error"]
+        bad.async_set_updated_data.assert_not_called()
+
+
+class TestFanOutService:
+    """Tests for the fan_out service."""
+
+    @pytest.mark.asyncio
+    async def test_fan_out_service(
+        self, hass: HomeAssistant, mock_config_entry: MockConfigEntry, mock_coordinator
+    ):
+        """Test the service converts fields and returns per-entry results."""
+        hass.data[DATA_ADAPTER_SLOTS] = AdapterSlots()
+        async_setup_services(hass)
+        mock_config_entry.add_to_hass(hass)
+        mock_config_entry.mock_state(hass, ConfigEntryState.LOADED)
+        mock_config_entry.runtime_data = mock_coordinator
+
+        with patch.object(
+            mock_coordinator.hatch_rest_device,
+            "apply_state",
+            AsyncMock(return_value=None),
+        ) as mock_apply:
+            response = await hass.services.async_call(
+                DOMAIN,
+                SERVICE_FAN_OUT,
+                {
+                    "config_entry_id": [mock_config_entry.entry_id],
+                    "sound": "Rain",
+                    "volume": 0.5,
+                },
+                blocking=True,
+                return_response=True,
+            )
+
+        mock_apply.assert_awaited_once_with(
+            power=None,
+            color=None,
+            brightness=None,
+            sound=PyHatchBabyRestSound.rain,
+            volume=127,
+        )
+        assert response[mock_config_entry.entry_id]["success"]
+
+    @pytest.mark.asyncio
+    async def test_fan_out_unknown_entry(self, hass: HomeAssistant):
+        """Test the service rejects unknown config entries."""
+        hass.data[DATA_ADAPTER_SLOTS] = AdapterSlots()
+        async_setup_services(hass)
+
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_FAN_OUT,
+                {"config_entry_id": ["missing"]},
+                blocking=True,
+                return_response=True,
+            )
@@ -1,20 +1,28 @@
 """Tests for Hatch Rest integration setup."""
 
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from bleak.backends.device import BLEDevice
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_ADDRESS
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
 from custom_components.hatch_rest import (
+    DATA_DEVICES,
     PLATFORMS,
+    async_remove_entry,
     async_setup_entry,
     async_unload_entry,
     options_update_listener,
 )
-from custom_components.hatch_rest.const import PyHatchBabyRestSound
+from custom_components.hatch_rest.api import ShutdownReport
+from custom_components.hatch_rest.const import (
+    CONF_POLL_INTERVAL,
+    PyHatchBabyRestSound,
+)
 
 
 class TestAsyncSetupEntry:
@@ -27,6 +35,7 @@ class TestAsyncSetupEntry:
         entry.entry_id = "test_entry"
         entry.unique_id = "aabbccddeeff"
         entry.data = {CONF_ADDRESS: "AA:BB:CC:DD:EE:FF"}
+        entry.options = {}
         entry.runtime_data = None
         return entry
 
@@ -111,6 +120,131 @@ class TestAsyncSetupEntry:
                 with pytest.raises(ConfigEntryNotReady):
                     await async_setup_entry(hass, mock_entry)
 
+    @pytest.mark.asyncio
+    async def test_setup_entry_reuses_device(
+        self, hass: HomeAssistant, mock_entry: MagicMock
+    ):
+        """Test setting up an entry again reuses the registered device client."""
+        mock_api = MagicMock()
+        mock_api.name = "Hatch Rest"
+        mock_api.address = "AA:BB:CC:DD:EE:FF"
+        mock_api.refresh_data = AsyncMock()
+        mock_api.async_shutdown = AsyncMock(return_value=ShutdownReport([], []))
+
+        with (
+            patch(
+                "custom_components.hatch_rest.bluetooth.async_ble_device_from_address",
+                return_value=MagicMock(),
+            ),
+            patch(
+                "custom_components.hatch_rest.PyHatchBabyRestAsync",
+                return_value=mock_api,
+            ) as mock_api_class,
+            patch(
+                "homeassistant.config_entries.ConfigEntries.async_forward_entry_setups",
+                new_callable=AsyncMock,
+            ),
+        ):
+            await async_setup_entry(hass, mock_entry)
+            first = mock_entry.runtime_data
+            await first.async_shutdown()
+            await async_setup_entry(hass, mock_entry)
+
+        mock_api_class.assert_called_once()
+        assert hass.data[DATA_DEVICES] == {"AA:BB:CC:DD:EE:FF": mock_api}
+        assert mock_entry.runtime_data is not first
+        assert mock_entry.runtime_data.hatch_rest_device is mock_api
+
+        await async_remove_entry(hass, mock_entry)
+        assert hass.data[DATA_DEVICES] == {}
+
+    @pytest.mark.asyncio
+    async def test_setup_entry_from_stored_state(
+        self, hass: HomeAssistant, hass_storage: dict[str, Any], mock_entry: MagicMock
+    ):
+        """Test a stored state lets setup finish before the device answers."""
+        hass_storage["hatch_rest.test_entry"] = {
+            "version": 1,
+            "key": "hatch_rest.test_entry",
+            "data": {
+                "power": True,
+                "brightness": 40,
+                "color": [10, 20, 30],
+                "sound": 7,
+                "volume": 60,
+            },
+        }
+        mock_api = MagicMock()
+        mock_api.name = "Hatch Rest"
+        mock_api.address = "AA:BB:CC:DD:EE:FF"
+        mock_api.power = None
+        mock_api.refresh_data = AsyncMock(side_effect=Exception("Out of range"))
+
+        with (
+            patch(
+                "custom_components.hatch_rest.bluetooth.async_ble_device_from_address",
+                return_value=MagicMock(),
+            ),
+            patch(
+                "custom_components.hatch_rest.PyHatchBabyRestAsync",
+                return_value=mock_api,
+            ),
+            patch(
+                "homeassistant.config_entries.ConfigEntries.async_forward_entry_setups",
+                new_callable=AsyncMock,
+            ) as mock_forward,
+        ):
+            assert await async_setup_entry(hass, mock_entry) is True
+
+        mock_forward.assert_called_once()
+        mock_entry.async_create_background_task.assert_called_once()
+        mock_entry.async_create_background_task.call_args.args[1].close()
+        coordinator = mock_entry.runtime_data
+        assert coordinator.stale
+        assert coordinator.data["brightness"] == 40
+        mock_api.refresh_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_setup_entry_from_stored_state_device_not_heard(
+        self, hass: HomeAssistant, hass_storage: dict[str, Any], mock_entry: MagicMock
+    ):
+        """Test a stored state lets setup finish before the device advertises."""
+        hass_storage["hatch_rest.test_entry"] = {
+            "version": 1,
+            "key": "hatch_rest.test_entry",
+            "data": {"power": False, "brightness": 40},
+        }
+        mock_api = MagicMock()
+        mock_api.name = "Hatch Rest"
+        mock_api.address = "AA:BB:CC:DD:EE:FF"
+        mock_api.power = None
+        mock_api.refresh_data = AsyncMock()
+
+        with (
+            patch(
+                "custom_components.hatch_rest.bluetooth.async_ble_device_from_address",
+                return_value=None,
+            ),
+            patch(
+                "custom_components.hatch_rest.PyHatchBabyRestAsync",
+                return_value=mock_api,
+            ) as mock_api_class,
+            patch(
+                "homeassistant.config_entries.ConfigEntries.async_forward_entry_setups",
+                new_callable=AsyncMock,
+            ) as mock_forward,
+        ):
+            assert await async_setup_entry(hass, mock_entry) is True
+
+        placeholder = mock_api_class.call_args.args[0]
+        assert isinstance(placeholder, BLEDevice)
+        assert placeholder.address == "AA:BB:CC:DD:EE:FF"
+        mock_forward.assert_called_once()
+        mock_entry.async_create_background_task.assert_called_once()
+        mock_entry.async_create_background_task.call_args.args[1].close()
+        assert mock_entry.runtime_data.stale
+        assert mock_entry.runtime_data.data["brightness"] == 40
+
 
 class TestAsyncUnloadEntry:
     """Tests for async_unload_entry."""
@@ -120,6 +254,7 @@ class TestAsyncUnloadEntry:
         """Test unloading entry."""
         mock_entry = MagicMock(spec=ConfigEntry)
         mock_entry.entry_id = "test_entry"
+        mock_entry.runtime_data = AsyncMock()
 
         with patch(
             "homeassistant.config_entries.ConfigEntries.async_unload_platforms",
@@ -130,16 +265,34 @@ class TestAsyncUnloadEntry:
 
         assert result is True
         mock_unload.assert_called_once_with(mock_entry, PLATFORMS)
+        mock_entry.runtime_data.async_shutdown.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unload_entry_platforms_fail(self, hass: HomeAssistant):
+        """Test the device is left alone when platforms fail to unload."""
+        mock_entry = MagicMock(spec=ConfigEntry)
+        mock_entry.runtime_data = AsyncMock()
+
+        with patch(
+            "homeassistant.config_entries.ConfigEntries.async_unload_platforms",
+            new_callable=AsyncMock,
+            return_value=False,
+        ):
+            assert await async_unload_entry(hass, mock_entry) is False
+
+        mock_entry.runtime_data.async_shutdown.assert_not_called()
 
 
 class TestOptionsUpdateListener:
     """Tests for options_update_listener."""
 
     @pytest.mark.asyncio
-    async def test_options_update_reloads_entry(self, hass: HomeAssistant):
-        """Test options update triggers reload."""
+    async def test_options_update_applies_without_reload(self, hass: HomeAssistant):
+        """Test options update is applied live, without a reload."""
         mock_entry = MagicMock(spec=ConfigEntry)
         mock_entry.entry_id = "test_entry"
+        mock_entry.options = {CONF_POLL_INTERVAL: 120}
+        mock_entry.runtime_data = MagicMock()
 
         with patch(
             "homeassistant.config_entries.ConfigEntries.async_reload",
@@ -147,4 +300,7 @@ class TestOptionsUpdateListener:
         ) as mock_reload:
             await options_update_listener(hass, mock_entry)
 
-        mock_reload.assert_called_once_with("test_entry")
+        mock_entry.runtime_data.async_apply_options.assert_called_once_with(
+            {CONF_POLL_INTERVAL: 120}
+        )
+        mock_reload.assert_not_called()
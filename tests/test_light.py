@@ -1,11 +1,24 @@
 """Tests for Hatch Rest light entity."""
 
-from unittest.mock import AsyncMock
+import asyncio
+from unittest.mock import AsyncMock, patch
 
 import pytest
-from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_EFFECT,
+    ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
+)
 from homeassistant.components.light.const import ColorMode
-
+from homeassistant.core import HomeAssistant
+
+from custom_components.hatch_rest.api import CommandError
+from custom_components.hatch_rest.const import (
+    COLOR_GRADIENT,
+    EFFECT_GRADIENT,
+    EFFECT_SLOW_PULSE,
+)
 from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
 from custom_components.hatch_rest.light import HatchBabyRestLight
 
@@ -18,7 +31,9 @@ class TestHatchBabyRestLight:
         self, mock_coordinator: HatchBabyRestUpdateCoordinator
     ) -> HatchBabyRestLight:
         """Create light entity."""
-        return HatchBabyRestLight(mock_coordinator)
+        entity = HatchBabyRestLight(mock_coordinator)
+        entity.entity_id = "light.hatch_rest_light"
+        return entity
 
     def test_brightness(self, light_entity: HatchBabyRestLight):
         """Test brightness property."""
@@ -26,7 +41,10 @@ class TestHatchBabyRestLight:
 
     def test_brightness_none(self, light_entity: HatchBabyRestLight):
         """Test brightness when not set."""
-        light_entity.coordinator.data["brightness"] = None
+        light_entity.coordinator.data = {
+            **light_entity.coordinator.data,
+            "brightness": None,
+        }
         assert light_entity.brightness is None
 
     def test_color_mode(self, light_entity: HatchBabyRestLight):
@@ -43,26 +61,38 @@ class TestHatchBabyRestLight:
 
     def test_is_on_when_power_and_brightness(self, light_entity: HatchBabyRestLight):
         """Test is_on when power is on and brightness > 0."""
-        light_entity.coordinator.data["power"] = True
-        light_entity.coordinator.data["brightness"] = 100
+        light_entity.coordinator.data = {
+            **light_entity.coordinator.data,
+            "power": True,
+            "brightness": 100,
+        }
         assert light_entity.is_on is True
 
     def test_is_off_when_power_off(self, light_entity: HatchBabyRestLight):
         """Test is_on when power is off."""
-        light_entity.coordinator.data["power"] = False
-        light_entity.coordinator.data["brightness"] = 100
+        light_entity.coordinator.data = {
+            **light_entity.coordinator.data,
+            "power": False,
+            "brightness": 100,
+        }
         assert light_entity.is_on is False
 
     def test_is_off_when_brightness_zero(self, light_entity: HatchBabyRestLight):
         """Test is_on when brightness is 0."""
-        light_entity.coordinator.data["power"] = True
-        light_entity.coordinator.data["brightness"] = 0
+        light_entity.coordinator.data = {
+            **light_entity.coordinator.data,
+            "power": True,
+            "brightness": 0,
+        }
         assert light_entity.is_on is False
 
     def test_is_off_when_brightness_none(self, light_entity: HatchBabyRestLight):
         """Test is_on when brightness is None."""
-        light_entity.coordinator.data["power"] = True
-        light_entity.coordinator.data["brightness"] = None
+        light_entity.coordinator.data = {
+            **light_entity.coordinator.data,
+            "power": True,
+            "brightness": None,
+        }
         assert light_entity.is_on is False
 
     def test_name(self, light_entity: HatchBabyRestLight):
@@ -154,3 +184,93 @@ class TestHatchBabyRestLight:
         light_entity.coordinator.async_set_updated_data.assert_called_once_with(
             {"brightness": 0}
         )
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_gradient_effect(
+        self, light_entity: HatchBabyRestLight
+    ):
+        """Test the gradient effect sets the gradient color."""
+        light_entity._hatch_rest_device.power = True
+        light_entity._hatch_rest_device.set_color = AsyncMock()
+
+        await light_entity.async_turn_on(**{ATTR_EFFECT: EFFECT_GRADIENT})
+
+        light_entity._hatch_rest_device.set_color.assert_called_once_with(
+            *COLOR_GRADIENT
+        )
+
+    def test_effect_from_gradient_color(self, light_entity: HatchBabyRestLight):
+        """Test gradient mode is reported as the current effect."""
+        light_entity.coordinator.data = {
+            **light_entity.coordinator.data,
+            "color": COLOR_GRADIENT,
+        }
+        assert light_entity.effect == EFFECT_GRADIENT
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_with_transition_streams(
+        self, hass: HomeAssistant, light_entity: HatchBabyRestLight
+    ):
+        """Test a transition is streamed instead of sent as one command."""
+        light_entity.hass = hass
+        light_entity._hatch_rest_device.power = True
+        light_entity._hatch_rest_device.command_interval = 0.1
+        light_entity._hatch_rest_device.stream_commands = AsyncMock()
+        light_entity._hatch_rest_device.set_brightness = AsyncMock()
+
+        await light_entity.async_turn_on(**{ATTR_BRIGHTNESS: 138, ATTR_TRANSITION: 2})
+        await hass.async_block_till_done()
+
+        light_entity._hatch_rest_device.set_brightness.assert_not_called()
+        steps = light_entity._hatch_rest_device.stream_commands.call_args.args[0]
+        assert len(steps) == 10
+        assert steps[-1] == (2, "SCff80408a")
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_ends_effect(
+        self, hass: HomeAssistant, light_entity: HatchBabyRestLight
+    ):
+        """Test an effect whose stream fails is no longer reported as active."""
+        light_entity.hass = hass
+        light_entity._hatch_rest_device.power = True
+        light_entity._hatch_rest_device.command_interval = 0.1
+        light_entity._hatch_rest_device.stream_commands = AsyncMock(
+            side_effect=CommandError("Writing SC failed after 3 attempt(s)")
+        )
+
+        with patch.object(light_entity, "async_write_ha_state") as mock_write:
+            await light_entity.async_turn_on(**{ATTR_EFFECT: EFFECT_SLOW_PULSE})
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert light_entity.effect is None
+        assert light_entity._effect_task is None
+        mock_write.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_cancels_running_effect(
+        self, hass: HomeAssistant, light_entity: HatchBabyRestLight
+    ):
+        """Test a new command cancels a running effect."""
+        light_entity.hass = hass
+        light_entity._hatch_rest_device.power = True
+        light_entity._hatch_rest_device.command_interval = 0.1
+
+        async def stream_forever(_):
+            await asyncio.Event().wait()
+
+        light_entity._hatch_rest_device.stream_commands = AsyncMock(
+            side_effect=stream_forever
+        )
+        light_entity._hatch_rest_device.set_brightness = AsyncMock()
+
+        await light_entity.async_turn_on(**{ATTR_EFFECT: EFFECT_SLOW_PULSE})
+        await asyncio.sleep(0)
+        effect_task = light_entity._effect_task
+        assert light_entity.effect == EFFECT_SLOW_PULSE
+
+        await light_entity.async_turn_on(**{ATTR_BRIGHTNESS: 10})
+        await hass.async_block_till_done()
+
+        assert effect_task.cancelled()
+        assert light_entity.effect is None
+        light_entity._hatch_rest_device.set_brightness.assert_called_once_with(10)
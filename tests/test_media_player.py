@@ -8,6 +8,7 @@ from homeassistant.components.media_player.const import (
     MediaPlayerEntityFeature,
     MediaPlayerState,
 )
+from homeassistant.exceptions import HomeAssistantError
 
 from custom_components.hatch_rest.const import PyHatchBabyRestSound
 from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
@@ -41,12 +42,18 @@ class TestHatchBabyRestMediaPlayer:
 
     def test_source(self, media_player_entity: HatchBabyRestMediaPlayer):
         """Test source property returns capitalized sound name."""
-        media_player_entity.coordinator.data["sound"] = PyHatchBabyRestSound.ocean
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "sound": PyHatchBabyRestSound.ocean,
+        }
         assert media_player_entity.source == "Ocean"
 
     def test_source_none(self, media_player_entity: HatchBabyRestMediaPlayer):
         """Test source when sound is None."""
-        media_player_entity.coordinator.data["sound"] = None
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "sound": None,
+        }
         assert media_player_entity.source is None
 
     def test_source_list(self, media_player_entity: HatchBabyRestMediaPlayer):
@@ -64,23 +71,32 @@ class TestHatchBabyRestMediaPlayer:
         self, media_player_entity: HatchBabyRestMediaPlayer
     ):
         """Test state is OFF when power is off."""
-        media_player_entity.coordinator.data["power"] = False
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "power": False,
+        }
         assert media_player_entity.state == MediaPlayerState.OFF
 
     def test_state_paused_when_sound_none(
         self, media_player_entity: HatchBabyRestMediaPlayer
     ):
         """Test state is PAUSED when sound is none."""
-        media_player_entity.coordinator.data["power"] = True
-        media_player_entity.coordinator.data["sound"] = PyHatchBabyRestSound.none
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "power": True,
+            "sound": PyHatchBabyRestSound.none,
+        }
         assert media_player_entity.state == MediaPlayerState.PAUSED
 
     def test_state_playing_when_sound_active(
         self, media_player_entity: HatchBabyRestMediaPlayer
     ):
         """Test state is PLAYING when sound is active."""
-        media_player_entity.coordinator.data["power"] = True
-        media_player_entity.coordinator.data["sound"] = PyHatchBabyRestSound.ocean
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "power": True,
+            "sound": PyHatchBabyRestSound.ocean,
+        }
         assert media_player_entity.state == MediaPlayerState.PLAYING
 
     def test_supported_features(self, media_player_entity: HatchBabyRestMediaPlayer):
@@ -94,18 +110,27 @@ class TestHatchBabyRestMediaPlayer:
 
     def test_volume_level(self, media_player_entity: HatchBabyRestMediaPlayer):
         """Test volume_level property."""
-        media_player_entity.coordinator.data["volume"] = 128
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "volume": 128,
+        }
         # Volume is stored as 0-255, converted to 0-1 float
         assert media_player_entity.volume_level == pytest.approx(128 / 255)
 
     def test_volume_level_max(self, media_player_entity: HatchBabyRestMediaPlayer):
         """Test volume_level at max."""
-        media_player_entity.coordinator.data["volume"] = 255
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "volume": 255,
+        }
         assert media_player_entity.volume_level == pytest.approx(1.0)
 
     def test_volume_level_none(self, media_player_entity: HatchBabyRestMediaPlayer):
         """Test volume_level when volume is None."""
-        media_player_entity.coordinator.data["volume"] = None
+        media_player_entity.coordinator.data = {
+            **media_player_entity.coordinator.data,
+            "volume": None,
+        }
         assert media_player_entity.volume_level is None
 
     @pytest.mark.asyncio
@@ -223,3 +248,15 @@ class TestHatchBabyRestMediaPlayer:
         await media_player_entity.async_media_play()
 
         media_player_entity._hatch_rest_device.set_sound.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_async_set_volume_level_timeout(
+        self, media_player_entity: HatchBabyRestMediaPlayer
+    ):
+        """Test a command that ran out of time surfaces as HomeAssistantError."""
+        media_player_entity._hatch_rest_device.set_volume = AsyncMock(
+            side_effect=TimeoutError
+        )
+
+        with pytest.raises(HomeAssistantError, match="did not respond in time"):
+            await media_player_entity.async_set_volume_level(0.5)
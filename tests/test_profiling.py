@@ -0,0 +1,161 @@
+"""Tests for Hatch Rest in-place profiling."""
+
+import asyncio
+from collections import Counter
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hatch_rest.api import RouteStats
+from custom_components.hatch_rest.const import (
+    DOMAIN,
+    SERVICE_PROFILE,
+    SERVICE_RECORD,
+)
+from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
+from custom_components.hatch_rest.recording import (
+    EVENT_READ,
+    EVENT_WRITE,
+    GattRecorder,
+    load_capture,
+)
+from custom_components.hatch_rest.tracing import span
+
+
+@pytest.fixture(autouse=True)
+def device_stats(mock_coordinator: HatchBabyRestUpdateCoordinator) -> None:
+    """Give the device some timeout, metric and route counts."""
+    device = mock_coordinator.hatch_rest_device
+    device.timeouts = Counter(read=1)
+    device.metrics = Counter(skipped_writes=2)
+    device.route_stats = {"hci0": RouteStats(3, 2)}
+
+
+class TestProfileService:
+    """Tests for the profile service."""
+
+    @pytest.mark.asyncio
+    async def test_profile_written_after_operations(
+        self,
+        hass: HomeAssistant,
+        loaded_entry: MockConfigEntry,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+        tmp_path: Path,
+    ):
+        """Test the capture is written once the requested operations ran."""
+        hass.config.config_dir = str(tmp_path)
+        tracer = mock_coordinator.hatch_rest_device.tracer
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_PROFILE,
+            {"config_entry_id": loaded_entry.entry_id, "operations": 1},
+            blocking=True,
+            return_response=True,
+        )
+        assert tracer.capture is not None
+
+        with tracer.operation("refresh"), span("decode", b"\x43\xff"):
+            pass
+        # operations past the requested count are not captured
+        with tracer.operation("refresh"):
+            pass
+        await hass.async_block_till_done()
+
+        assert tracer.capture is None
+        assert Path(response["path"]).parent == tmp_path
+        profile = json.loads(Path(response["path"]).read_text(encoding="utf-8"))
+        assert profile["entry_id"] == loaded_entry.entry_id
+        assert [(s["name"], s["detail"]) for s in profile["spans"]] == [
+            ("decode", "43ff"),
+            ("refresh", None),
+        ]
+        assert profile["timeouts"] == {"read": 1}
+        assert profile["metrics"] == {"skipped_writes": 2}
+        assert profile["route_stats"] == {"hci0": {"attempts": 3, "successes": 2}}
+
+    @pytest.mark.asyncio
+    async def test_profile_already_running(
+        self,
+        hass: HomeAssistant,
+        loaded_entry: MockConfigEntry,
+    ):
+        """Test a second profile of the same device is rejected."""
+        data = {"config_entry_id": loaded_entry.entry_id}
+        await hass.services.async_call(
+            DOMAIN, SERVICE_PROFILE, data, blocking=True, return_response=True
+        )
+
+        with pytest.raises(ServiceValidationError, match="already profiling"):
+            await hass.services.async_call(
+                DOMAIN, SERVICE_PROFILE, data, blocking=True, return_response=True
+            )
+
+
+class TestRecordService:
+    """Tests for the record service."""
+
+    @pytest.mark.asyncio
+    async def test_recording_written_after_duration(
+        self,
+        hass: HomeAssistant,
+        loaded_entry: MockConfigEntry,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+        tmp_path: Path,
+    ):
+        """Test the traffic seen while recording is written as JSON lines."""
+        hass.config.config_dir = str(tmp_path)
+        device = mock_coordinator.hatch_rest_device
+        elapsed = asyncio.Event()
+
+        async def sleep(delay: float) -> None:
+            assert delay == 60
+            await elapsed.wait()
+
+        with patch.object(device.clock, "sleep", side_effect=sleep):
+            response = await hass.services.async_call(
+                DOMAIN,
+                SERVICE_RECORD,
+                {"config_entry_id": loaded_entry.entry_id, "duration": 60},
+                blocking=True,
+                return_response=True,
+            )
+            await hass.async_block_till_done(wait_background_tasks=False)
+            assert isinstance(device.recorder, GattRecorder)
+            device.recorder.record(EVENT_WRITE, "SI01")
+            device.recorder.record(EVENT_READ, b"\x43\xff")
+
+            elapsed.set()
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert device.recorder is None
+        assert Path(response["path"]).parent == tmp_path
+        assert response["path"].endswith(".jsonl")
+        events = load_capture(response["path"])
+        assert [(e.kind, e.data) for e in events] == [
+            (EVENT_WRITE, "SI01"),
+            (EVENT_READ, "43ff"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_recording_already_running(
+        self,
+        hass: HomeAssistant,
+        loaded_entry: MockConfigEntry,
+    ):
+        """Test a second recording of the same device is rejected."""
+        data = {"config_entry_id": loaded_entry.entry_id}
+        await hass.services.async_call(
+            DOMAIN, SERVICE_RECORD, data, blocking=True, return_response=True
+        )
+        await hass.async_block_till_done(wait_background_tasks=False)
+
+        with pytest.raises(ServiceValidationError, match="already recording"):
+            await hass.services.async_call(
+                DOMAIN, SERVICE_RECORD, data, blocking=True, return_response=True
+            )
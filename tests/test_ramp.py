@@ -0,0 +1,178 @@
+"""Tests for Hatch Rest ramps."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.hatch_rest.api import CommandError
+from custom_components.hatch_rest.clock import Clock
+from custom_components.hatch_rest.ramp import HatchRestRamp, RampStep, plan_ramp
+
+
+class TestPlanRamp:
+    """Tests for plan_ramp."""
+
+    def test_only_changing_values_become_steps(self):
+        """Test a ramp has one step per distinct quantized value."""
+        steps = plan_ramp((255, 128, 0, 0), 0, 600, brightness=10)
+
+        assert len(steps) == 10
+        assert steps[0] == RampStep(60, color=(255, 128, 0, 1))
+        assert steps[-1] == RampStep(600, color=(255, 128, 0, 10))
+
+    def test_color_and_volume_share_offsets(self):
+        """Test color and volume changes at the same offset share a step."""
+        steps = plan_ramp((0, 0, 0, 0), 4, 60, brightness=2, volume=0)
+
+        assert steps == [
+            RampStep(15, volume=3),
+            RampStep(30, color=(0, 0, 0, 1), volume=2),
+            RampStep(45, volume=1),
+            RampStep(60, color=(0, 0, 0, 2), volume=0),
+        ]
+
+    def test_steps_limited_by_min_interval(self):
+        """Test short ramps are limited to one step per RAMP_MIN_INTERVAL."""
+        steps = plan_ramp((0, 0, 0, 0), None, 10, brightness=255)
+
+        assert len(steps) == 5
+
+    def test_no_change(self):
+        """Test a ramp to the current values has no steps."""
+        assert plan_ramp((1, 2, 3, 4), 5, 60, brightness=4, volume=5) == []
+
+    def test_unknown_state(self):
+        """Test nothing is planned before the device state is known."""
+        assert plan_ramp(None, None, 60, brightness=4, volume=5) == []
+
+
+class TestHatchRestRamp:
+    """Tests for HatchRestRamp."""
+
+    @pytest.fixture
+    def device(self) -> MagicMock:
+        """Create a mock device."""
+        device = MagicMock()
+        device.address = "AA:BB:CC:DD:EE:FF"
+        device.clock = Clock()
+        device.warm_up = AsyncMock(return_value=True)
+        device.set_color_brightness = AsyncMock()
+        device.set_volume = AsyncMock()
+        return device
+
+    @pytest.mark.asyncio
+    async def test_run_writes_each_step(self, hass: HomeAssistant, device: MagicMock):
+        """Test each step is warmed up and written."""
+        ramp = HatchRestRamp(
+            hass,
+            device,
+            [RampStep(0, color=(1, 2, 3, 4)), RampStep(0.01, volume=0)],
+        )
+
+        ramp.async_start()
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert not ramp.running
+        assert device.warm_up.call_count == 2
+        device.set_color_brightness.assert_called_once_with(1, 2, 3, 4)
+        device.set_volume.assert_called_once_with(0)
+
+    @pytest.mark.asyncio
+    async def test_run_catches_up_after_disconnect(
+        self, hass: HomeAssistant, device: MagicMock
+    ):
+        """Test steps missed while disconnected collapse to the latest values."""
+        device.warm_up = AsyncMock(side_effect=[False, True])
+        ramp = HatchRestRamp(
+            hass,
+            device,
+            [
+                RampStep(0, color=(0, 0, 0, 1)),
+                RampStep(0.01, color=(0, 0, 0, 2), volume=7),
+                RampStep(0.02, color=(0, 0, 0, 3)),
+            ],
+        )
+
+        with patch("custom_components.hatch_rest.ramp.RAMP_RETRY_INTERVAL", 0.05):
+            ramp.async_start()
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        device.set_color_brightness.assert_called_once_with(0, 0, 0, 3)
+        device.set_volume.assert_called_once_with(7)
+
+    @pytest.mark.asyncio
+    async def test_run_stops_when_device_unreachable(
+        self, hass: HomeAssistant, device: MagicMock
+    ):
+        """Test the ramp gives up once the resume timeout passes."""
+        device.warm_up = AsyncMock(return_value=False)
+        ramp = HatchRestRamp(hass, device, [RampStep(0, volume=1)])
+
+        with (
+            patch("custom_components.hatch_rest.ramp.RAMP_RESUME_TIMEOUT", 0),
+            patch("custom_components.hatch_rest.ramp.RAMP_RETRY_INTERVAL", 0),
+        ):
+            ramp.async_start()
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        device.set_volume.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_run_retries_failed_write(
+        self, hass: HomeAssistant, device: MagicMock
+    ):
+        """Test a failed write reconnects and retries instead of ending the ramp."""
+        device.set_color_brightness = AsyncMock(
+            side_effect=[CommandError("Writing SC failed"), None]
+        )
+        device.set_volume = AsyncMock(side_effect=[TimeoutError, None, None])
+        ramp = HatchRestRamp(
+            hass,
+            device,
+            [RampStep(0, color=(1, 2, 3, 4), volume=5), RampStep(0.05, volume=6)],
+        )
+
+        with patch("custom_components.hatch_rest.ramp.RAMP_RETRY_INTERVAL", 0):
+            ramp.async_start()
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert not ramp.running
+        assert device.warm_up.call_count == 4
+        assert device.set_color_brightness.call_count == 2
+        assert [call.args for call in device.set_volume.call_args_list] == [
+            (5,),
+            (5,),
+            (6,),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_run_stops_when_writes_keep_failing(
+        self, hass: HomeAssistant, device: MagicMock
+    ):
+        """Test the ramp gives up on failing writes once the resume timeout passes."""
+        device.set_volume = AsyncMock(side_effect=CommandError("Writing SV failed"))
+        ramp = HatchRestRamp(hass, device, [RampStep(0, volume=1)])
+
+        with (
+            patch("custom_components.hatch_rest.ramp.RAMP_RESUME_TIMEOUT", 0.02),
+            patch("custom_components.hatch_rest.ramp.RAMP_RETRY_INTERVAL", 0.01),
+        ):
+            ramp.async_start()
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert not ramp.running
+        assert device.set_volume.call_count >= 2
+
+    @pytest.mark.asyncio
+    async def test_cancel(self, hass: HomeAssistant, device: MagicMock):
+        """Test a ramp can be cancelled."""
+        ramp = HatchRestRamp(hass, device, [RampStep(3600, volume=1)])
+
+        ramp.async_start()
+        assert ramp.running
+        ramp.async_cancel()
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert not ramp.running
+        device.set_volume.assert_not_called()
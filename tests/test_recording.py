@@ -0,0 +1,117 @@
+"""Tests for Hatch Rest GATT recording and replay."""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bleak.backends.device import BLEDevice
+from homeassistant.core import HomeAssistant
+
+from custom_components.hatch_rest.api import PyHatchBabyRestAsync
+from custom_components.hatch_rest.const import PyHatchBabyRestSound
+from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
+from custom_components.hatch_rest.recording import (
+    GattEvent,
+    GattRecorder,
+    async_replay,
+    load_capture,
+)
+
+# color (255, 128, 64) at brightness 100, ocean at volume 100, powered on
+FRAME = "000000000043ff8040645305645000"
+# the same with the power off
+FRAME_OFF = "000000000043ff80406453056450c0"
+
+
+class TestGattRecorder:
+    """Tests for recording GATT traffic."""
+
+    @pytest.mark.asyncio
+    async def test_records_writes_and_reads(self, mock_ble_device: BLEDevice):
+        """Test an opted-in client records its commands and raw frames."""
+        api = PyHatchBabyRestAsync(mock_ble_device)
+        api.recorder = GattRecorder()
+        api._client = AsyncMock()
+        api._client.read_gatt_char.return_value = bytearray.fromhex(FRAME)
+
+        with (
+            patch.object(api, "_client_connect", new_callable=AsyncMock),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await (await api._send_command("SI01"))
+
+        assert [(e.kind, e.data) for e in api.recorder.events] == [
+            ("write", "SI01"),
+            ("read", FRAME),
+        ]
+
+    def test_save_and_load(self, tmp_path: Path):
+        """Test a capture survives a JSON lines round trip."""
+        recorder = GattRecorder()
+        recorder.record("connect", "hci0")
+        recorder.record("read", bytes.fromhex(FRAME))
+        recorder.record("disconnect")
+        path = str(tmp_path / "capture.jsonl")
+
+        recorder.save(path)
+
+        loaded = load_capture(path)
+        assert [(e.kind, e.data) for e in loaded] == [
+            ("connect", "hci0"),
+            ("read", FRAME),
+            ("disconnect", None),
+        ]
+        # times are kept to the microsecond
+        assert [e.time for e in loaded] == [
+            pytest.approx(e.time, abs=1e-6) for e in recorder.events
+        ]
+        assert len(Path(path).read_text(encoding="utf-8").splitlines()) == 3
+
+    def test_limit_drops_oldest(self):
+        """Test the recorder keeps only the newest events."""
+        recorder = GattRecorder(limit=2)
+        for command in ("SI01", "SV10", "SV20"):
+            recorder.record("write", command)
+
+        assert [e.data for e in recorder.events] == ["SV10", "SV20"]
+
+
+class TestReplay:
+    """Tests for replaying a capture."""
+
+    @pytest.mark.asyncio
+    async def test_replay_through_coordinator(
+        self, hass: HomeAssistant, mock_ble_device: BLEDevice
+    ):
+        """Test replayed frames are decoded and reach the coordinator."""
+        api = PyHatchBabyRestAsync(mock_ble_device)
+        coordinator = HatchBabyRestUpdateCoordinator(hass, "aabbccddeeff", api)
+        events = [
+            GattEvent(0.0, "connect", "hci0"),
+            GattEvent(0.1, "read", FRAME),
+            GattEvent(0.2, "write", "SV20"),
+            GattEvent(0.3, "read", FRAME_OFF),
+            GattEvent(0.4, "disconnect"),
+        ]
+
+        report = await async_replay(api, events, speed=None)
+
+        assert (report.reads, report.writes) == (2, 1)
+        assert coordinator.data == {
+            "brightness": 100,
+            "color": (255, 128, 64),
+            "power": False,
+            "sound": PyHatchBabyRestSound.ocean,
+            "volume": 100,
+        }
+
+    @pytest.mark.asyncio
+    async def test_replay_accelerated(self, mock_ble_device: BLEDevice):
+        """Test replay keeps the recorded spacing, scaled by speed."""
+        api = PyHatchBabyRestAsync(mock_ble_device)
+        events = [GattEvent(0.0, "write", "SV10"), GattEvent(0.5, "write", "SV20")]
+
+        report = await async_replay(api, events, speed=10)
+
+        assert 0.05 <= report.elapsed < 0.5
+        assert api.volume == 0x20
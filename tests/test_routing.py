@@ -0,0 +1,61 @@
+"""Tests for Hatch Rest Bluetooth routing."""
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.hatch_rest.routing import (
+    async_device_routes,
+    async_track_device,
+)
+
+
+def _scanner_device(source: str, rssi: int) -> MagicMock:
+    """Create a scanner device heard with the given RSSI."""
+    scanner_device = MagicMock()
+    scanner_device.scanner.source = source
+    scanner_device.advertisement.rssi = rssi
+    return scanner_device
+
+
+class TestRouting:
+    """Tests for device routing."""
+
+    def test_device_routes_best_rssi_first(self, hass: HomeAssistant):
+        """Test routes are ordered by RSSI."""
+        weak = _scanner_device("hci0", -90)
+        strong = _scanner_device("proxy", -50)
+
+        with patch(
+            "custom_components.hatch_rest.routing.bluetooth.async_scanner_devices_by_address",
+            return_value=[weak, strong],
+        ) as mock_devices:
+            routes = async_device_routes(hass, "aa:bb:cc:dd:ee:ff")
+
+        mock_devices.assert_called_once_with(
+            hass, "AA:BB:CC:DD:EE:FF", connectable=True
+        )
+        assert routes == [
+            ("proxy", strong.ble_device),
+            ("hci0", weak.ble_device),
+        ]
+
+    def test_track_device(self, hass: HomeAssistant):
+        """Test advertisements keep the BLEDevice current until stopped."""
+        device = MagicMock(address="AA:BB:CC:DD:EE:FF")
+        unsub = MagicMock()
+
+        with patch(
+            "custom_components.hatch_rest.routing.bluetooth.async_register_callback",
+            return_value=unsub,
+        ) as mock_register:
+            stop = async_track_device(hass, device)
+
+        assert device.routes_callback is not None
+        service_info = MagicMock()
+        mock_register.call_args.args[1](service_info, MagicMock())
+        assert device.device is service_info.device
+
+        stop()
+        unsub.assert_called_once()
+        assert device.routes_callback is None
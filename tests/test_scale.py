@@ -0,0 +1,232 @@
+"""Scalability harness: many Hatch Rest entries sharing one adapter.
+
+Sets up real config entries for N simulated devices behind a simulated
+adapter with a limited number of connection slots, then runs a seeded mix
+of polls and service calls through the whole integration and records
+throughput, p95 command latency, slot exhaustion, memory per device and
+event loop lag as test properties. Run larger fleets with
+HATCH_REST_SCALE=1,10,50.
+
+Device clients and the adapter share a virtual clock, so the default
+settle times, poll schedules and BLE latencies apply without the run
+taking real time; throughput and latency are in virtual seconds, and
+identical from run to run.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import functools
+import os
+import random
+import statistics
+from time import perf_counter
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hatch_rest.api import PyHatchBabyRestAsync
+from custom_components.hatch_rest.const import DOMAIN
+
+from .simulation import SimulatedAdapter, VirtualClock
+
+SCALES = [int(n) for n in os.environ.get("HATCH_REST_SCALE", "1,10").split(",")]
+OPERATIONS_PER_DEVICE = 6
+POLL_SHARE = 0.4
+# virtual seconds a device's user waits between operations, at most
+THINK_TIME = 30.0
+LAG_INTERVAL = 0.005
+
+
+@dataclass
+class ScaleReport:
+    """What a fleet run measured."""
+
+    devices: int
+    operations: int = 0
+    failures: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    connect_attempts: int = 0
+    slot_exhaustions: int = 0
+    memory_per_device: float = 0.0
+    loop_lags: list[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Operations completed per virtual second."""
+        return (self.operations - self.failures) / self.elapsed
+
+    @property
+    def p95_latency(self) -> float:
+        """95th percentile service call latency, in virtual seconds."""
+        return statistics.quantiles(self.latencies, n=20)[-1]
+
+    @property
+    def exhaustion_rate(self) -> float:
+        """Share of connect attempts that found no free slot."""
+        return self.slot_exhaustions / max(self.connect_attempts, 1)
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the headline figures."""
+        return {
+            "devices": self.devices,
+            "throughput": round(self.throughput, 3),
+            "p95_latency": round(self.p95_latency, 3),
+            "failures": self.failures,
+            "slot_exhaustion_rate": round(self.exhaustion_rate, 3),
+            "memory_per_device": round(self.memory_per_device),
+            "max_loop_lag": round(max(self.loop_lags, default=0.0), 4),
+        }
+
+
+def _address(index: int) -> str:
+    return ":".join(f"{byte:02X}" for byte in (0xAA, 0xBB, 0xCC, 0, 0, index))
+
+
+async def _monitor_loop_lag(lags: list[float]) -> None:
+    """Record how late the event loop wakes a short (real) sleep."""
+    while True:
+        start = perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(perf_counter() - start - LAG_INTERVAL)
+
+
+async def _run_device(
+    hass: HomeAssistant,
+    clock: VirtualClock,
+    entry: MockConfigEntry,
+    rng: random.Random,
+    report: ScaleReport,
+) -> None:
+    """Run a device's share of the poll and command mix."""
+    registry = er.async_get(hass)
+    entity_ids = {
+        entity.domain: entity.entity_id
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id)
+    }
+    calls = [
+        ("light", "turn_on", {"brightness": rng.randint(1, 255)}),
+        ("media_player", "volume_set", {"volume_level": rng.random()}),
+        ("switch", "turn_on", {}),
+        ("switch", "turn_off", {}),
+    ]
+    for _ in range(OPERATIONS_PER_DEVICE):
+        await clock.sleep(rng.random() * THINK_TIME)
+        report.operations += 1
+        if rng.random() < POLL_SHARE:
+            await entry.runtime_data.async_refresh()
+            report.failures += not entry.runtime_data.last_update_success
+            continue
+        domain, service, data = rng.choice(calls)
+        start = clock.time()
+        try:
+            await hass.services.async_call(
+                domain,
+                service,
+                {"entity_id": entity_ids[domain], **data},
+                blocking=True,
+            )
+        except Exception:  # noqa: BLE001
+            report.failures += 1
+        else:
+            report.latencies.append(clock.time() - start)
+
+
+async def _run_fleet(hass: HomeAssistant, devices: int) -> ScaleReport:
+    clock = VirtualClock()
+    adapter = SimulatedAdapter(
+        connect_latency=1.0, gatt_latency=0.05, retry_backoff=0.25, clock=clock
+    )
+    report = ScaleReport(devices)
+    entries = []
+    # one more entry than measured; the first loads the platforms
+    for index in range(devices + 1):
+        address = _address(index)
+        adapter.add_device(address)
+        entries.append(
+            MockConfigEntry(
+                domain=DOMAIN,
+                data={CONF_ADDRESS: address},
+                unique_id=address.replace(":", "").lower(),
+            )
+        )
+
+    with (
+        patch(
+            "custom_components.hatch_rest.PyHatchBabyRestAsync",
+            functools.partial(PyHatchBabyRestAsync, clock=clock),
+        ),
+        patch(
+            "custom_components.hatch_rest.bluetooth.async_ble_device_from_address",
+            adapter.ble_device,
+        ),
+        patch(
+            "custom_components.hatch_rest.routing.async_device_routes",
+            lambda hass, address: [("hci0", adapter.ble_device(hass, address))],
+        ),
+        patch(
+            "custom_components.hatch_rest.api.establish_connection",
+            adapter.establish_connection,
+        ),
+    ):
+        warm_up, *entries = entries
+        warm_up.add_to_hass(hass)
+        assert await clock.run(hass.config_entries.async_setup(warm_up.entry_id))
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for entry in entries:
+            entry.add_to_hass(hass)
+            assert await clock.run(hass.config_entries.async_setup(entry.entry_id))
+            assert entry.state is ConfigEntryState.LOADED
+        await hass.async_block_till_done()
+        report.memory_per_device = (
+            tracemalloc.get_traced_memory()[0] - before
+        ) / devices
+        tracemalloc.stop()
+
+        monitor = asyncio.create_task(_monitor_loop_lag(report.loop_lags))
+        rng = random.Random(devices)
+        start = clock.time()
+        await clock.run(
+            asyncio.gather(
+                *(
+                    _run_device(hass, clock, entry, random.Random(rng.random()), report)
+                    for entry in entries
+                )
+            )
+        )
+        report.elapsed = clock.time() - start
+        monitor.cancel()
+
+        report.connect_attempts = adapter.connect_attempts
+        report.slot_exhaustions = adapter.slot_exhaustions
+        assert adapter.peak_connections <= adapter.slots
+        for entry in (warm_up, *entries):
+            assert await clock.run(hass.config_entries.async_unload(entry.entry_id))
+        await hass.async_block_till_done()
+    assert not adapter.connections
+    return report
+
+
+@pytest.mark.parametrize("devices", SCALES)
+@pytest.mark.asyncio
+async def test_fleet_scales(hass: HomeAssistant, devices: int, record_property) -> None:
+    """Test a fleet runs its poll and command mix within the adapter's slots."""
+    report = await _run_fleet(hass, devices)
+
+    for name, value in report.as_dict().items():
+        record_property(name, value)
+
+    assert report.latencies
+    if devices <= SimulatedAdapter().slots:
+        # with a slot per device nothing should wait or fail
+        assert report.failures == 0
+        assert report.slot_exhaustions == 0
+    # retries absorb contention; failures stay rare
+    assert report.failures <= report.operations * 0.1
@@ -0,0 +1,89 @@
+"""Tests for Hatch Rest services."""
+
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hatch_rest.const import (
+    DOMAIN,
+    SERVICE_START_RAMP,
+    SERVICE_STOP_RAMP,
+)
+from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
+
+
+class TestRampServices:
+    """Tests for the ramp services."""
+
+    @pytest.mark.asyncio
+    async def test_start_ramp(
+        self,
+        hass: HomeAssistant,
+        loaded_entry: MockConfigEntry,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+    ):
+        """Test start_ramp plans and starts a ramp."""
+        with patch(
+            "custom_components.hatch_rest.services.HatchRestRamp.async_start"
+        ) as mock_start:
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_START_RAMP,
+                {
+                    "config_entry_id": loaded_entry.entry_id,
+                    "duration": {"minutes": 10},
+                    "brightness": 138,
+                },
+                blocking=True,
+            )
+
+        mock_start.assert_called_once()
+        ramp = mock_coordinator.ramp
+        assert ramp is not None
+        assert len(ramp.steps) == 10
+        assert ramp.steps[-1].color == (255, 128, 64, 138)
+
+    @pytest.mark.asyncio
+    async def test_start_ramp_replaces_running_ramp(
+        self,
+        hass: HomeAssistant,
+        loaded_entry: MockConfigEntry,
+        mock_coordinator: HatchBabyRestUpdateCoordinator,
+    ):
+        """Test starting a ramp cancels the previous one."""
+        data = {
+            "config_entry_id": loaded_entry.entry_id,
+            "duration": {"minutes": 10},
+            "volume": 0,
+        }
+        await hass.services.async_call(DOMAIN, SERVICE_START_RAMP, data, blocking=True)
+        first = mock_coordinator.ramp
+        assert first is not None and first.running
+
+        await hass.services.async_call(DOMAIN, SERVICE_START_RAMP, data, blocking=True)
+        await hass.async_block_till_done()
+
+        assert not first.running
+        assert mock_coordinator.ramp is not first
+
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_STOP_RAMP,
+            {"config_entry_id": loaded_entry.entry_id},
+            blocking=True,
+        )
+        assert mock_coordinator.ramp is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_entry(self, hass: HomeAssistant, loaded_entry):
+        """Test services reject unknown config entries."""
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_STOP_RAMP,
+                {"config_entry_id": "missing"},
+                blocking=True,
+            )
@@ -1,9 +1,12 @@
 """Tests for Hatch Rest switch entity."""
 
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from homeassistant.exceptions import HomeAssistantError
 
+from custom_components.hatch_rest.api import CommandError
+from custom_components.hatch_rest.const import PyHatchBabyRestSound
 from custom_components.hatch_rest.coordinator import HatchBabyRestUpdateCoordinator
 from custom_components.hatch_rest.switch import HatchBabyRestSwitch
 
@@ -20,17 +23,26 @@ class TestHatchBabyRestSwitch:
 
     def test_is_on_true(self, switch_entity: HatchBabyRestSwitch):
         """Test is_on when power is True."""
-        switch_entity.coordinator.data["power"] = True
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": True,
+        }
         assert switch_entity.is_on is True
 
     def test_is_on_false(self, switch_entity: HatchBabyRestSwitch):
         """Test is_on when power is False."""
-        switch_entity.coordinator.data["power"] = False
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": False,
+        }
         assert switch_entity.is_on is False
 
     def test_is_on_none(self, switch_entity: HatchBabyRestSwitch):
         """Test is_on when power is None."""
-        switch_entity.coordinator.data["power"] = None
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": None,
+        }
         assert switch_entity.is_on is None
 
     def test_name(self, switch_entity: HatchBabyRestSwitch):
@@ -45,7 +57,10 @@ class TestHatchBabyRestSwitch:
     @pytest.mark.asyncio
     async def test_async_turn_on_when_off(self, switch_entity: HatchBabyRestSwitch):
         """Test turning on when switch is off."""
-        switch_entity.coordinator.data["power"] = False
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": False,
+        }
         switch_entity._hatch_rest_device.turn_power_on = AsyncMock()
         switch_entity.coordinator.async_set_updated_data = AsyncMock()
         switch_entity.coordinator.get_current_data = lambda: {"power": True}
@@ -60,7 +75,10 @@ class TestHatchBabyRestSwitch:
         self, switch_entity: HatchBabyRestSwitch
     ):
         """Test turning on when switch is already on does nothing."""
-        switch_entity.coordinator.data["power"] = True
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": True,
+        }
         switch_entity._hatch_rest_device.turn_power_on = AsyncMock()
 
         await switch_entity.async_turn_on()
@@ -70,7 +88,10 @@ class TestHatchBabyRestSwitch:
     @pytest.mark.asyncio
     async def test_async_turn_off_when_on(self, switch_entity: HatchBabyRestSwitch):
         """Test turning off when switch is on."""
-        switch_entity.coordinator.data["power"] = True
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": True,
+        }
         switch_entity._hatch_rest_device.turn_power_off = AsyncMock()
         switch_entity.coordinator.async_set_updated_data = AsyncMock()
         switch_entity.coordinator.get_current_data = lambda: {"power": False}
@@ -85,9 +106,51 @@ class TestHatchBabyRestSwitch:
         self, switch_entity: HatchBabyRestSwitch
     ):
         """Test turning off when switch is already off does nothing."""
-        switch_entity.coordinator.data["power"] = False
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": False,
+        }
         switch_entity._hatch_rest_device.turn_power_off = AsyncMock()
 
         await switch_entity.async_turn_off()
 
         switch_entity._hatch_rest_device.turn_power_off.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_async_apply_state(self, switch_entity: HatchBabyRestSwitch):
+        """Test apply_state converts service data for the device."""
+        switch_entity._hatch_rest_device.apply_state = AsyncMock()
+        switch_entity.coordinator.async_set_updated_data = MagicMock()
+
+        await switch_entity.async_apply_state(
+            power=True, rgb_color=(1, 2, 3), sound="rain", volume=1.0
+        )
+
+        switch_entity._hatch_rest_device.apply_state.assert_called_once_with(
+            power=True,
+            color=(1, 2, 3),
+            brightness=None,
+            sound=PyHatchBabyRestSound.rain,
+            volume=255,
+        )
+        switch_entity.coordinator.async_set_updated_data.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_command_error(
+        self, switch_entity: HatchBabyRestSwitch
+    ):
+        """Test a failed write surfaces as HomeAssistantError."""
+        switch_entity.coordinator.data = {
+            **switch_entity.coordinator.data,
+            "power": False,
+        }
+        switch_entity._hatch_rest_device.turn_power_on = AsyncMock(
+            side_effect=CommandError("Writing SI01 failed after 3 attempt(s)")
+        )
+        switch_entity.coordinator.async_set_updated_data = MagicMock()
+
+        with pytest.raises(HomeAssistantError, match="Writing SI01 failed") as err:
+            await switch_entity.async_turn_on()
+
+        assert isinstance(err.value.__cause__, CommandError)
+        switch_entity.coordinator.async_set_updated_data.assert_not_called()
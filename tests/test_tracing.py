@@ -0,0 +1,108 @@
+"""Tests for Hatch Rest command tracing."""
+
+import asyncio
+
+import pytest
+
+from custom_components.hatch_rest.tracing import (
+    Trace,
+    Tracer,
+    current_traces,
+    span,
+    use_traces,
+)
+
+
+class TestTracer:
+    """Tests for Tracer sampling and span recording."""
+
+    def test_span_without_trace_is_noop(self):
+        """Test spans cost nothing outside a traced call."""
+        assert span("write") is span("read")
+
+    @pytest.mark.asyncio
+    async def test_unsampled_call_not_traced(self):
+        """Test a zero sample rate records nothing."""
+
+        async def call():
+            Tracer(sample_rate=0).begin("ctx")
+            return current_traces()
+
+        assert await asyncio.create_task(call()) == ()
+
+    @pytest.mark.asyncio
+    async def test_spans_recorded_into_trace(self):
+        """Test spans are recorded with their detail and errors."""
+        tracer = Tracer(sample_rate=1)
+
+        async def call():
+            tracer.begin("ctx")
+            with span("write", "SI01"):
+                pass
+            with pytest.raises(TimeoutError), span("read"):
+                raise TimeoutError
+
+        await asyncio.create_task(call())
+
+        (trace,) = tracer.traces
+        assert trace.trace_id == "ctx"
+        assert [(s.name, s.detail) for s in trace.spans] == [
+            ("write", "SI01"),
+            ("read", None),
+        ]
+        assert trace.spans[0].error is None
+        assert trace.spans[1].error == "TimeoutError()"
+
+    @pytest.mark.asyncio
+    async def test_same_call_shares_trace(self):
+        """Test entities acting on one call record into one trace."""
+        tracer = Tracer(sample_rate=1)
+
+        async def call():
+            tracer.begin("ctx")
+            with span("write"):
+                pass
+
+        await asyncio.gather(call(), call())
+
+        (trace,) = tracer.traces
+        assert len(trace.spans) == 2
+
+    def test_use_traces_is_scoped(self):
+        """Test traces set for work on behalf of calls are reset afterwards."""
+        traces = [Trace("ctx")]
+
+        with use_traces(traces):
+            assert current_traces() is traces
+        assert current_traces() == ()
+
+
+class TestCapture:
+    """Tests for capturing every operation of a device."""
+
+    @pytest.mark.asyncio
+    async def test_capture_counts_top_level_operations(self):
+        """Test nested operations belong to the operation that runs them."""
+        tracer = Tracer()
+        capture = asyncio.create_task(tracer.async_capture(2, 10))
+        await asyncio.sleep(0)
+
+        with tracer.operation("commands"), tracer.operation("refresh"):
+            pass
+        assert not capture.done()
+        with tracer.operation("refresh"):
+            pass
+
+        trace = await capture
+        assert [s.name for s in trace.spans] == ["refresh", "commands", "refresh"]
+        assert tracer.capture is None
+
+    @pytest.mark.asyncio
+    async def test_capture_ends_after_duration(self):
+        """Test a capture ends after its duration with what it recorded."""
+        tracer = Tracer()
+
+        trace = await tracer.async_capture(5, 0.01)
+
+        assert trace.spans == []
+        assert tracer.capture is None
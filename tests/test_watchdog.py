@@ -0,0 +1,48 @@
+"""Tests for the Hatch Rest event loop watchdog."""
+
+import pytest
+
+from custom_components.hatch_rest.watchdog import LoopWatchdog
+
+
+class TestLoopWatchdog:
+    """Tests for LoopWatchdog."""
+
+    def test_steps_counted(self):
+        """Test every step is counted per name."""
+        watchdog = LoopWatchdog()
+
+        for _ in range(3):
+            with watchdog.step("decode"):
+                pass
+        with watchdog.step("state_write"):
+            pass
+
+        assert watchdog.stats["decode"].count == 3
+        assert watchdog.stats["state_write"].count == 1
+        assert watchdog.stats["decode"].slow == 0
+        assert watchdog.as_dict()["worst"] == []
+
+    def test_slow_steps_flagged(self, caplog: pytest.LogCaptureFixture):
+        """Test steps over the threshold are logged and kept, worst first."""
+        watchdog = LoopWatchdog(threshold=0.1, keep=2)
+
+        for name, duration in (("a", 0.2), ("b", 0.5), ("c", 0.05), ("d", 0.3)):
+            watchdog._record(name, duration)
+
+        assert "b blocked the event loop for 0.500s" in caplog.text
+        assert "c blocked" not in caplog.text
+        assert watchdog.stats["a"].slow == 1
+        assert watchdog.as_dict()["worst"] == [
+            {"name": "b", "duration": 0.5},
+            {"name": "d", "duration": 0.3},
+        ]
+
+    def test_step_recorded_on_error(self):
+        """Test a step that raises is still timed."""
+        watchdog = LoopWatchdog()
+
+        with pytest.raises(ValueError), watchdog.step("decode"):
+            raise ValueError
+
+        assert watchdog.stats["decode"].count == 1